@@ -1,42 +1,111 @@
 # -*- coding: utf-8 -*-
+import time
 from typing import List, Optional, Dict
+from blocos import BlockMap
+from compactacao import planeja
+from extents import FreeExtents
+from ocupacao import MapaOcupacao
+
+POLITICAS = ("first-fit", "best-fit", "worst-fit", "next-fit")
 
 class FileManager:
-    def __init__(self, total_blocks: int):
+    def __init__(self, total_blocks: int, backend: str = "lista",
+                 politica: str = "first-fit", compactar: bool = False):
+        """
+        backend: "lista" (um nome por bloco) ou "bitmap" (BlockMap compacto,
+        com o id do arquivo como dono de cada bloco).
+        politica: escolha do espaco livre no create (ver POLITICAS).
+        compactar: quando o arquivo nao cabe contiguo mas ha blocos livres
+                   suficientes, desliza arquivos para abrir espaco.
+        """
+        if politica not in POLITICAS:
+            raise ValueError(f"politica desconhecida: {politica}")
         self.total_blocks = total_blocks
-        self.blocks: List[Optional[str]] = [None] * total_blocks
+        self.backend = backend
+        self.politica = politica
+        if backend == "lista":
+            self.blocks: List[Optional[str]] = [None] * total_blocks
+        elif backend == "bitmap":
+            self.mapa = BlockMap(total_blocks)
+            self._ids: Dict[str, int] = {}
+            self._nomes: List[str] = []
+        else:
+            raise ValueError(f"backend desconhecido: {backend}")
         # Mapeia arquivo -> (offset, tamanho, criador)
         self.files: Dict[str, Dict] = {}
+        # Indice dos extents livres, mantido junto com self.files
+        self.livres = FreeExtents(0, total_blocks,
+                                  ordenar_por_tamanho=(politica == "best-fit"))
+        # Mapa por trechos (nome de cada arquivo), com historico de versoes
+        self.ocupacao = MapaOcupacao(total_blocks)
+        self._cursor = 0  # next-fit: onde terminou a ultima alocacao
+        self.creates = 0
+        self.falhas_create = 0
+        self.compactar = compactar
+        self.compactacoes = 0
+        self.blocos_movidos = 0
+        self.tempo_compactacao = 0.0
 
+    # ------------------------------
+    # Armazenamento dos blocos
+    # ------------------------------
+    def _find(self, size: int) -> Optional[int]:
+        """Escolhe o offset no indice de extents conforme a politica."""
+        if self.politica == "first-fit":
+            return self.livres.first_fit(size)
+        if self.politica == "best-fit":
+            return self.livres.best_fit(size)
+        if self.politica == "worst-fit":
+            return self.livres.worst_fit(size)
+        return self.livres.next_fit(size, self._cursor)
+
+    def _mark(self, offset: int, size: int, name: str):
+        self.ocupacao.marca(offset, size, name)
+        if self.backend == "bitmap":
+            if name not in self._ids:
+                self._ids[name] = len(self._nomes)
+                self._nomes.append(name)
+            self.mapa.mark(offset, size, self._ids[name])
+            return
+        for j in range(offset, offset + size):
+            self.blocks[j] = name
+
+    def _clear(self, offset: int, size: int):
+        self.ocupacao.limpa(offset, size)
+        if self.backend == "bitmap":
+            self.mapa.clear(offset, size)
+            return
+        for j in range(offset, offset + size):
+            self.blocks[j] = None
+
+    # ------------------------------
+    # Operacoes
+    # ------------------------------
     def load_existing(self, existing: List[tuple]):
         """
         Carrega arquivos ja existentes no disco.
         existing: lista de (nome, offset, tamanho, criador)
         """
         for name, offset, size, creator in existing:
-            for i in range(offset, offset + size):
-                self.blocks[i] = name
+            self.livres.occupy(offset, size)
+            self._mark(offset, size, name)
             self.files[name] = {"offset": offset, "size": size, "creator": creator}
 
     def create(self, pid: int, name: str, size: int, is_real_time: bool) -> bool:
-        """Cria arquivo com alocacao contigua first-fit."""
-        free_count = 0
-        offset = None
-        for i in range(self.total_blocks):
-            if self.blocks[i] is None:
-                free_count += 1
-                if free_count == size:
-                    offset = i - size + 1
-                    break
-            else:
-                free_count = 0
-
+        """Cria arquivo com alocacao contigua segundo a politica."""
+        offset = self._find(size)
+        if (offset is None and self.compactar and self.livres.total_livre >= size
+                and self._compacta(size)):
+            offset = self._find(size)
         if offset is None:
+            self.falhas_create += 1
             return False  # nao ha espaco
 
         # marca blocos
-        for j in range(offset, offset + size):
-            self.blocks[j] = name
+        self.livres.take(offset, size)
+        self._cursor = (offset + size) % self.total_blocks
+        self.creates += 1
+        self._mark(offset, size, name)
         self.files[name] = {"offset": offset, "size": size, "creator": pid}
         return True
 
@@ -51,12 +120,76 @@ class FileManager:
 
         offset = self.files[name]["offset"]
         size = self.files[name]["size"]
-        for j in range(offset, offset + size):
-            self.blocks[j] = None
+        self.livres.release(offset, size)
+        self._clear(offset, size)
         del self.files[name]
         return True
 
+    def _compacta(self, size: int) -> bool:
+        """
+        Move o minimo de arquivos para abrir 'size' blocos contiguos. Blocos
+        ocupados sem entrada em self.files (nome recriado) ficam no lugar.
+        """
+        inicio_t = time.perf_counter()
+        moveis = [(info["offset"], info["size"], name) for name, info in self.files.items()]
+        ocupado_arquivos = {offset: tam for offset, tam, _ in moveis}
+        fixos = []
+        pos = 0
+        for livre_off, livre_tam in list(self.livres) + [(self.total_blocks, 0)]:
+            # trechos ocupados entre dois extents livres, menos os arquivos
+            while pos < livre_off:
+                tam = ocupado_arquivos.get(pos)
+                if tam is not None:
+                    pos += tam
+                    continue
+                fim = pos + 1
+                while fim < livre_off and fim not in ocupado_arquivos:
+                    fim += 1
+                fixos.append((pos, fim - pos))
+                pos = fim
+            pos = livre_off + livre_tam
+        plano = planeja(moveis, fixos, 0, self.total_blocks, size)
+        if plano is None:
+            self.tempo_compactacao += time.perf_counter() - inicio_t
+            return False
+        for name, antigo, novo, tam in plano:
+            self.livres.release(antigo, tam)
+            self.livres.take(novo, tam)
+            self._clear(antigo, tam)
+            self._mark(novo, tam, name)
+            self.files[name]["offset"] = novo
+            self.blocos_movidos += tam
+        self.compactacoes += 1
+        self.tempo_compactacao += time.perf_counter() - inicio_t
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        """Metricas de ocupacao e fragmentacao do disco."""
+        livre = self.livres.total_livre
+        maior = self.livres.largest()
+        return {
+            "politica": self.politica,
+            "creates": self.creates,
+            "falhas_create": self.falhas_create,
+            "compactacoes": self.compactacoes,
+            "blocos_movidos": self.blocos_movidos,
+            "tempo_compactacao_s": self.tempo_compactacao,
+            "livre": livre,
+            "maior_livre": maior,
+            "extents_livres": self.livres.n_extents,
+            # 0 = todo o espaco livre e contiguo, ->1 = muito fragmentado
+            "fragmentacao_externa": 1 - maior / livre if livre else 0.0,
+        }
+
     def show_map(self) -> str:
-        """Retorna string com mapa do disco (nome ou 0)."""
-        return "".join(b if b is not None else "0" for b in self.blocks)
+        """Retorna string com mapa do disco (nome ou 0), montada pelos trechos."""
+        return "".join((name if name is not None else "0") * size
+                       for _, size, name in self.ocupacao.trechos())
+
+    def mapa_trechos(self) -> List[tuple]:
+        """Mapa do disco em trechos (offset, tamanho, nome ou None = livre)."""
+        return list(self.ocupacao.trechos())
 
+    def mudancas(self, desde: int) -> tuple:
+        """(versao, trechos alterados desde a versao 'desde'), ver MapaOcupacao.mudancas."""
+        return self.ocupacao.mudancas(desde)
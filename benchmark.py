@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from arquivos import POLITICAS, FileManager
+from despachador import Despachador
+from escalonador import Escalonador
+from gerador import Carga, grava
+from memoria import ALOCADORES, MemoryManager, RT_BLOCKS, USER_BLOCKS
+from recursos import Recursos
+from saida import Saida
+from simulador import Simulador
+
+
+def pico_rss_kb() -> Optional[int]:
+    """Pico de memoria residente do processo, em KB (None se indisponivel)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reporta em bytes, Linux em KB
+    return pico // 1024 if sys.platform == "darwin" else pico
+
+
+def _latencias(amostras_ns: List[int]) -> Dict[str, float]:
+    if not amostras_ns:
+        return {"ops": 0}
+    amostras_ns.sort()
+    n = len(amostras_ns)
+    return {
+        "ops": n,
+        "media_ns": sum(amostras_ns) / n,
+        "p50_ns": amostras_ns[n // 2],
+        "p99_ns": amostras_ns[min(n - 1, n * 99 // 100)],
+    }
+
+
+def bench_simulacao(carga: Carga, pasta: str, alocador: str = "extents") -> Dict[str, float]:
+    """Roda a simulacao por eventos, sem log, sobre a carga gerada."""
+    arq_p = os.path.join(pasta, "processos.txt")
+    arq_a = os.path.join(pasta, "arquivos.txt")
+    grava(carga, arq_p, arq_a)
+
+    memoria = MemoryManager(alocador)
+    escalonador = Escalonador(memoria, Recursos(), Saida("silencioso"))
+    despachador = Despachador(escalonador, memoria, arq_p, arq_a)
+    inicio = time.perf_counter()
+    despachador.load_processes()
+    despachador.load_filesystem()
+    simulador = Simulador(escalonador, despachador)
+    simulador.executar()
+    duracao = time.perf_counter() - inicio
+    admitidos = len(despachador.por_pid)
+    return {
+        "alocador": alocador,
+        "processos": admitidos,
+        "decisoes": simulador.decisoes,
+        "relogio": simulador.relogio,
+        "segundos": duracao,
+        "processos_por_s": admitidos / duracao if duracao else 0.0,
+        "decisoes_por_s": simulador.decisoes / duracao if duracao else 0.0,
+    }
+
+
+def bench_memoria(alocador: str, n_ops: int, semente: int) -> Dict[str, object]:
+    """Latencia de allocate/free com uma sequencia aleatoria de pedidos."""
+    r = random.Random(semente)
+    memoria = MemoryManager(alocador)
+    vivos: List[int] = []
+    aloca_ns: List[int] = []
+    libera_ns: List[int] = []
+    relogio = time.perf_counter_ns
+    for pid in range(n_ops):
+        if vivos and r.random() < 0.45:
+            alvo = vivos.pop(r.randrange(len(vivos)))
+            t = relogio()
+            memoria.free(alvo)
+            libera_ns.append(relogio() - t)
+            continue
+        prioridade = 0 if r.random() < 0.2 else 1
+        tam = r.randint(1, RT_BLOCKS // 4 if prioridade == 0 else USER_BLOCKS // 16)
+        t = relogio()
+        offset = memoria.allocate(pid, tam, prioridade)
+        aloca_ns.append(relogio() - t)
+        if offset is not None:
+            vivos.append(pid)
+    return {"allocate": _latencias(aloca_ns), "free": _latencias(libera_ns),
+            "stats": memoria.stats()}
+
+
+def bench_arquivos(politica: str, backend: str, n_ops: int, semente: int) -> Dict[str, object]:
+    """Latencia de create/delete e do mapa do disco no FileManager."""
+    r = random.Random(semente)
+    fm = FileManager(4096, backend, politica)
+    vivos: List[str] = []
+    cria_ns: List[int] = []
+    deleta_ns: List[int] = []
+    relogio = time.perf_counter_ns
+    for i in range(n_ops):
+        if vivos and r.random() < 0.45:
+            nome = vivos.pop(r.randrange(len(vivos)))
+            t = relogio()
+            fm.delete(0, nome, True)
+            deleta_ns.append(relogio() - t)
+            continue
+        nome = f"f{i}"
+        t = relogio()
+        ok = fm.create(0, nome, r.randint(1, 64), True)
+        cria_ns.append(relogio() - t)
+        if ok:
+            vivos.append(nome)
+    t = relogio()
+    fm.show_map()
+    mapa_ns = relogio() - t
+    t = relogio()
+    fm.mapa_trechos()
+    trechos_ns = relogio() - t
+    # o que um monitor que consulta a cada 64 operacoes leria
+    t = relogio()
+    fm.mudancas(max(fm.ocupacao.versao - 64, 0))
+    mudancas_ns = relogio() - t
+    return {"create": _latencias(cria_ns), "delete": _latencias(deleta_ns),
+            "show_map_ns": mapa_ns, "mapa_trechos_ns": trechos_ns, "mudancas_ns": mudancas_ns,
+            "stats": fm.stats()}
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executa(carga: Carga, n_ops: int) -> Dict[str, object]:
+    resultado: Dict[str, object] = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "carga": asdict(carga),
+        "n_ops": n_ops,
+    }
+    with tempfile.TemporaryDirectory() as pasta:
+        # "linear" (busca bloco a bloco original) fica so no micro-benchmark
+        resultado["simulacao"] = [bench_simulacao(carga, pasta, a)
+                                  for a in ALOCADORES if a != "linear"]
+    resultado["memoria"] = {a: bench_memoria(a, n_ops, carga.semente) for a in ALOCADORES}
+    resultado["arquivos"] = {f"{b}/{p}": bench_arquivos(p, b, n_ops, carga.semente)
+                             for b in ("lista", "bitmap") for p in POLITICAS}
+    resultado["pico_rss_kb"] = pico_rss_kb()
+    return resultado
+
+
+def compara(atual: Dict[str, object], anterior: Dict[str, object]) -> List[str]:
+    """Razao atual/anterior das vazoes e latencias medias."""
+    linhas: List[str] = []
+    for a, b in zip(atual["simulacao"], anterior["simulacao"]):
+        linhas.append(f"simulacao {a['alocador']}: processos/s x{a['processos_por_s'] / b['processos_por_s']:.2f}")
+    for secao, ops in (("memoria", ("allocate", "free")), ("arquivos", ("create", "delete"))):
+        for nome, res in atual[secao].items():
+            ant = anterior[secao].get(nome)
+            if ant is None:
+                continue
+            for op in ops:
+                if res[op]["ops"] and ant[op]["ops"]:
+                    linhas.append(f"{secao} {nome} {op}: media x{res[op]['media_ns'] / ant[op]['media_ns']:.2f}")
+    return linhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do simulador")
+    parser.add_argument("--processos", type=int, default=5000)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--chegada", choices=("uniforme", "poisson", "rajadas"), default="poisson")
+    parser.add_argument("--taxa", type=float, default=0.5)
+    parser.add_argument("--ops", type=int, default=20000, help="operacoes de alocador e de disco")
+    parser.add_argument("--saida", default="bench.json", help="arquivo JSON com os resultados")
+    parser.add_argument("--compara", help="JSON de uma execucao anterior")
+    args = parser.parse_args()
+
+    carga = Carga(n_processos=args.processos, semente=args.semente,
+                  chegada=args.chegada, taxa=args.taxa)
+    resultado = executa(carga, args.ops)
+    with open(args.saida, "w") as f:
+        json.dump(resultado, f, indent=2)
+    for sim in resultado["simulacao"]:
+        print(f"{sim['alocador']}: {sim['processos_por_s']:.0f} processos/s, "
+              f"{sim['decisoes_por_s']:.0f} decisoes/s")
+    print(f"pico RSS: {resultado['pico_rss_kb']} KB -> {args.saida}")
+    if args.compara:
+        with open(args.compara) as f:
+            print("\n".join(compara(resultado, json.load(f))))
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from array import array
+from typing import Optional
+
+
+class BlockMap:
+    """
+    Mapa compacto de blocos: um byte de ocupacao por bloco (0 livre,
+    1 ocupado) e um array com o id do dono de cada bloco (-1 = livre).
+
+    A busca contigua e feita por bytearray.find, que percorre a mascara
+    em C, e marcar/liberar um intervalo e uma atribuicao por fatia.
+    """
+
+    def __init__(self, total_blocks: int):
+        self.total_blocks = total_blocks
+        self.ocupado = bytearray(total_blocks)
+        self.dono = array("l", [-1]) * total_blocks
+
+    def find_run(self, size: int, start: int = 0, end: Optional[int] = None) -> Optional[int]:
+        """Offset do primeiro trecho livre de 'size' blocos em [start, end)."""
+        if size <= 0:
+            return None
+        if end is None:
+            end = self.total_blocks
+        i = self.ocupado.find(bytes(size), start, end)
+        return None if i < 0 else i
+
+    def mark(self, offset: int, size: int, dono: Optional[int] = None):
+        self.ocupado[offset:offset + size] = b"\x01" * size
+        if dono is not None:
+            self.dono[offset:offset + size] = array("l", [dono]) * size
+
+    def clear(self, offset: int, size: int):
+        self.ocupado[offset:offset + size] = bytes(size)
+        self.dono[offset:offset + size] = array("l", [-1]) * size
+
+    def count_free(self, start: int = 0, end: Optional[int] = None) -> int:
+        if end is None:
+            end = self.total_blocks
+        return self.ocupado.count(0, start, end)
+
+    def largest_run(self, start: int = 0, end: Optional[int] = None) -> int:
+        """Tamanho do maior trecho livre em [start, end)."""
+        if end is None:
+            end = self.total_blocks
+        maior = 0
+        pos = self.ocupado.find(0, start, end)
+        while pos >= 0:
+            fim = self.ocupado.find(1, pos, end)
+            if fim < 0:
+                fim = end
+            maior = max(maior, fim - pos)
+            pos = self.ocupado.find(0, fim, end)
+        return maior
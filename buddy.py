@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import heapq
+from typing import Dict, List, Optional, Set
+
+
+class BuddyAllocator:
+    """
+    Alocador buddy para uma regiao [start, end).
+
+    A regiao e dividida em blocos raiz de tamanho potencia de 2 (alinhados ao
+    inicio da regiao), entao regioes como a de usuario (960 blocos) tambem
+    funcionam. Cada ordem tem uma lista livre (conjunto + heap pelo menor
+    offset) e um bitmask guarda as ordens nao vazias, de modo que uma falha
+    de alocacao custa O(1) e alocar/liberar/coalescer custa O(log n).
+    """
+
+    def __init__(self, start: int, end: int):
+        self.start = start
+        self.end = end
+        tamanho = end - start
+        self._max_ordem = max(tamanho.bit_length(), 1)
+        self._livres: List[Set[int]] = [set() for _ in range(self._max_ordem)]
+        self._heaps: List[List[int]] = [[] for _ in range(self._max_ordem)]
+        self._mask = 0
+        # offset relativo -> ordem do bloco alocado
+        self._ordem: Dict[int, int] = {}
+        # (base, ordem) de cada bloco raiz, em ordem de base
+        self._raizes: List[tuple] = []
+        self.total_livre = 0
+        self.desperdicio = 0  # fragmentacao interna (blocos arredondados)
+
+        base = 0
+        for k in range(self._max_ordem - 1, -1, -1):
+            if tamanho & (1 << k):
+                self._raizes.append((base, k))
+                self._add(base, k)
+                base += 1 << k
+        self.total_livre = tamanho
+
+    def _add(self, rel: int, k: int):
+        self._livres[k].add(rel)
+        heapq.heappush(self._heaps[k], rel)
+        self._mask |= 1 << k
+
+    def _remove(self, rel: int, k: int):
+        livres = self._livres[k]
+        livres.discard(rel)
+        if not livres:
+            self._mask &= ~(1 << k)
+            self._heaps[k].clear()
+        elif len(self._heaps[k]) > 2 * len(livres) + 16:
+            self._heaps[k] = sorted(livres)
+
+    def _pop_menor(self, k: int) -> int:
+        heap, livres = self._heaps[k], self._livres[k]
+        while True:
+            rel = heapq.heappop(heap)
+            if rel in livres:
+                self._remove(rel, k)
+                return rel
+
+    def _ordem_raiz(self, rel: int) -> int:
+        for base, k in self._raizes:
+            if rel < base + (1 << k):
+                return k
+        return 0
+
+    def largest(self) -> int:
+        """Tamanho do maior bloco livre."""
+        return 1 << (self._mask.bit_length() - 1) if self._mask else 0
+
+    def allocate(self, size: int) -> Optional[int]:
+        """Aloca um bloco de 2^k >= size e retorna o offset, ou None."""
+        if size <= 0:
+            return None
+        k = (size - 1).bit_length()
+        candidatos = self._mask >> k
+        if not candidatos:
+            return None
+        j = k + (candidatos & -candidatos).bit_length() - 1
+        rel = self._pop_menor(j)
+        while j > k:
+            j -= 1
+            self._add(rel + (1 << j), j)
+        self._ordem[rel] = k
+        self.total_livre -= 1 << k
+        self.desperdicio += (1 << k) - size
+        return rel + self.start
+
+    def occupy(self, offset: int, size: int):
+        """
+        Marca como alocado o bloco de 2^k >= size que comeca em 'offset'
+        (alinhado), dividindo o bloco livre que o contem. Usado para
+        reconstruir o alocador a partir de um mapa de donos.
+        """
+        rel = offset - self.start
+        k = (size - 1).bit_length()
+        for base, kr in self._raizes:
+            if rel < base + (1 << kr):
+                break
+        j = k
+        while j <= kr:
+            bloco = base + ((rel - base) >> j << j)
+            if bloco in self._livres[j]:
+                break
+            j += 1
+        else:
+            raise ValueError(f"bloco {offset} (ordem {k}) nao esta livre")
+        self._remove(bloco, j)
+        while j > k:
+            j -= 1
+            metade = bloco + (1 << j)
+            if rel >= metade:
+                self._add(bloco, j)
+                bloco = metade
+            else:
+                self._add(metade, j)
+        self._ordem[rel] = k
+        self.total_livre -= 1 << k
+        self.desperdicio += (1 << k) - size
+
+    def free(self, offset: int, size: int):
+        """Libera o bloco em 'offset', coalescendo com os buddies livres."""
+        rel = offset - self.start
+        k = self._ordem.pop(rel)
+        self.total_livre += 1 << k
+        self.desperdicio -= (1 << k) - size
+        limite = self._ordem_raiz(rel)
+        while k < limite:
+            buddy = rel ^ (1 << k)
+            if buddy not in self._livres[k]:
+                break
+            self._remove(buddy, k)
+            rel = min(rel, buddy)
+            k += 1
+        self._add(rel, k)
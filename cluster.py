@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Cluster: N maquinas (nos) simuladas no mesmo processo e no mesmo relogio,
+cada uma com sua memoria, seus dispositivos e seus escalonadores (nucleos).
+O despachador e unico: MemoriaCluster coloca cada processo admitido no no
+onde ele cabe e que tem menos processos residentes por nucleo, e o
+simulador o entrega ao nucleo menos carregado desse no. O disco (sistema
+de arquivos) continua um so, compartilhado pelos nos.
+
+Migracao (opcional): um processo esperando dispositivos vai para outro no
+quando (a) um nucleo desse no esta ocioso e tem os dispositivos livres, ou
+(b) um pedido esperando memoria nao cabe em no nenhum e a saida do
+processo abre espaco para ele. Copiar os blocos custa CUSTO_MIGRACAO ticks
+mais um a cada BLOCOS_POR_TICK blocos, em que o processo ainda nao roda
+(entra no destino como quem inicializa).
+"""
+
+from collections import ChainMap
+from typing import Dict, Iterator, List, Optional
+
+from despachador import JANELA_ADMISSAO, Despachador
+from escalonador import Escalonador
+from memoria import MemoryManager
+from processo import Processo
+from recursos import Recursos
+from simulador import ARQUIVOS, CHEGADA, SimuladorMultinucleo
+
+CUSTO_MIGRACAO = 2
+BLOCOS_POR_TICK = 64
+
+
+class No:
+    """Uma maquina do cluster: memoria, dispositivos e nucleos proprios, com seus contadores."""
+
+    def __init__(self, indice: int, nucleos: List[Escalonador]):
+        self.indice = indice
+        self.nucleos = nucleos
+        self.memoria = nucleos[0].memoria
+        self.recursos = nucleos[0].recursos
+        self.inicio = 0  # indice global do primeiro nucleo no simulador
+        self.colocados = 0  # processos admitidos neste no
+        self.ticks_cpu = 0
+        self.area_memoria = [0, 0]
+        self.area_dispositivos = 0
+        self.migracoes_entrada = 0
+        self.migracoes_saida = 0
+        self.blocos_migrados = 0  # blocos recebidos por migracao
+        self.custo_migracao = 0  # ticks de copia dos processos recebidos
+
+    def carga(self) -> float:
+        """Processos residentes (com memoria neste no) por nucleo."""
+        return len(self.memoria.owners) / len(self.nucleos)
+
+
+class MemoriaCluster:
+    """
+    Memoria vista pelo despachador: allocate escolhe o no (onde cabe, o de
+    menor carga; empate: o de menor indice) e no_de guarda o no de cada pid.
+    Os escalonadores liberam direto na memoria do seu no.
+    """
+
+    def __init__(self, nos: List[No]):
+        self.nos = nos
+        self.no_de: Dict[int, int] = {}
+        self.compactar = nos[0].memoria.compactar
+        self.capacidade = tuple(sum(no.memoria.capacidade[r] for no in nos) for r in range(2))
+
+    @property
+    def ao_mover(self):
+        return self.nos[0].memoria.ao_mover
+
+    @ao_mover.setter
+    def ao_mover(self, funcao):
+        for no in self.nos:
+            no.memoria.ao_mover = funcao
+
+    @property
+    def liberacoes(self) -> int:
+        return sum(no.memoria.liberacoes for no in self.nos)
+
+    @property
+    def owners(self) -> ChainMap:
+        return ChainMap(*(no.memoria.owners for no in self.nos))
+
+    @property
+    def ocupados(self) -> List[int]:
+        return [sum(no.memoria.ocupados[r] for no in self.nos) for r in range(2)]
+
+    def maior_livre(self, is_real_time: int) -> int:
+        return max(no.memoria.maior_livre(is_real_time) for no in self.nos)
+
+    def allocate(self, pid: int, size: int, is_real_time: int) -> Optional[int]:
+        cabem = [no for no in self.nos if no.memoria.maior_livre(is_real_time) >= size]
+        for no in sorted(cabem, key=lambda no: (no.carga(), no.indice)):
+            offset = no.memoria.allocate(pid, size, is_real_time)
+            if offset is not None:
+                self.no_de[pid] = no.indice
+                no.colocados += 1
+                return offset
+        return None
+
+    def free(self, pid: int):
+        self.nos[self.no_de[pid]].memoria.free(pid)
+
+
+class DespachadorCluster(Despachador):
+    """Despachador unico do cluster; o controle de admissao soma o limite de cada no."""
+
+    def __init__(self, nos: List[No], process_file: Optional[str], fileops_file: Optional[str],
+                 janela: int = JANELA_ADMISSAO):
+        super().__init__(nos[0].nucleos[0], MemoriaCluster(nos), process_file, fileops_file, janela)
+        self.nos = nos
+        self.contencoes = 0
+
+    def _aceita(self, admitidos: List[Processo]) -> bool:
+        carga = sum(n.carga() for no in self.nos for n in no.nucleos)
+        if carga + len(admitidos) < self.escalonador.config.limite_admissao * len(self.nos):
+            return True
+        self.contencoes += 1
+        self.contido = True
+        return False
+
+
+class SimuladorCluster(SimuladorMultinucleo):
+    """
+    Simulacao por eventos do cluster: os nucleos de todos os nos num relogio
+    so, com o roubo de trabalho restrito ao no (memoria e dispositivos sao
+    dele) e, com 'migracao', processos esperando levados para outro no (ver
+    o modulo). relatorio() da a utilizacao e as migracoes de cada no.
+    """
+
+    def __init__(self, nos: List[No], despachador: DespachadorCluster, roubo: bool = True,
+                 migracao: bool = True, custo_migracao: int = CUSTO_MIGRACAO,
+                 blocos_por_tick: int = BLOCOS_POR_TICK):
+        super().__init__([n for no in nos for n in no.nucleos], despachador, roubo)
+        self.nos = nos
+        self.memoria = despachador.memoria
+        self.migracao = migracao
+        self.custo_migracao = custo_migracao
+        self.blocos_por_tick = blocos_por_tick
+        self.migracoes = 0
+        # nos nucleos, indice e a lista de irmaos sao os do no
+        self.no_do_nucleo: List[No] = []
+        for no in nos:
+            no.inicio = len(self.no_do_nucleo)
+            for j, nucleo in enumerate(no.nucleos):
+                nucleo.indice = j
+                nucleo.nucleos = no.nucleos
+                self.no_do_nucleo.append(no)
+        # a utilizacao por no e integrada mesmo sem metricas
+        self.integra = True
+
+    def executar(self, ate: Optional[int] = None) -> bool:
+        terminou = super().executar(ate)
+        if terminou:
+            saida = self.escalonador.saida
+            saida.nos(self.relatorio(), self.despachador.contencoes)
+            saida.flush()
+        return terminou
+
+    def _integra(self, tempo: int):
+        ticks = tempo - self._integrado
+        for no in self.nos:
+            ocupados = no.memoria.ocupados
+            no.area_memoria[0] += ocupados[0] * ticks
+            no.area_memoria[1] += ocupados[1] * ticks
+            no.area_dispositivos += no.recursos.em_uso * ticks
+        if self.metricas is not None:
+            nucleos = self.nucleos
+            tamanhos = [sum(len(n.niveis[k]) for n in nucleos) for k in range(6)]
+            self.metricas.avanca(tamanhos, self.memoria, None, self._integrado, ticks)
+            for no in self.nos:
+                self.metricas.dispositivos(no.recursos, ticks, f"no{no.indice}.")
+        self._integrado = tempo
+
+    def _menos_carregado(self, no: No) -> Escalonador:
+        return min(no.nucleos, key=lambda n: n.carga() + self.ocupado[no.inicio + n.indice])
+
+    def _chegada(self):
+        despachador = self.despachador
+        while True:
+            for proc in despachador.admitir():
+                no = self.nos[self.memoria.no_de[proc.pid]]
+                self._menos_carregado(no).processos.put(proc)
+            if not despachador.has_pending():
+                break
+            if self.migracao and not despachador.contido and self._migra_por_memoria():
+                continue  # abriu espaco para quem esperava: tenta de novo
+            if self.memoria_ocupada():
+                break
+            despachador.descarta_pendentes()
+        if despachador.tem_operacoes():
+            self.agenda(self.relogio, ARQUIVOS)
+        if not despachador.has_pending():
+            for nucleo in self.nucleos:
+                nucleo.despachador_finalizado = True
+        self._acorda()
+
+    def _decisao_nucleo(self, i: int):
+        super()._decisao_nucleo(i)
+        nucleo, no = self.nucleos[i], self.no_do_nucleo[i]
+        if self.ocupado[i]:
+            no.ticks_cpu += nucleo.ultima_fatia
+        elif self.migracao and self._migra_dispositivos(no, nucleo):
+            ticks = nucleo.ticks_ate_pronto()
+            if ticks is not None:
+                self._agenda_nucleo(i, self.relogio + ticks)
+
+    # ------------------------------
+    # Migracao
+    # ------------------------------
+    @staticmethod
+    def _esperando(no: No) -> Iterator[Processo]:
+        """Processos do no bloqueados esperando dispositivos, na ordem dos pedidos."""
+        return (proc for proc, _ in list(no.recursos.pedidos.values()))
+
+    def _migra_dispositivos(self, destino: No, nucleo: Escalonador) -> bool:
+        """Nucleo ocioso: traz de outro no um processo cujos dispositivos estao livres aqui."""
+        for origem in self.nos:
+            if origem is destino or not origem.recursos.pedidos:
+                continue
+            for proc in self._esperando(origem):
+                if (destino.recursos.disponivel(proc.scanner_req, proc.printer_id,
+                                                proc.modem_req, proc.sata_id)
+                        and self._migra(proc, origem, destino, nucleo)):
+                    return True
+        return False
+
+    def _migra_por_memoria(self) -> bool:
+        """
+        O menor pedido esperando memoria nao cabe em no nenhum: leva para
+        outro no um processo bloqueado cuja saida abre espaco para ele.
+        """
+        despachador = self.despachador
+        for r, espera in enumerate(despachador.esperando_memoria):
+            falta = despachador._menor_esperando[r]
+            if not espera or self.memoria.maior_livre(r) >= falta:
+                continue
+            for origem in self.nos:
+                for proc in self._esperando(origem):
+                    if (0 if proc.init_priority == 0 else 1) != r:
+                        continue
+                    if origem.memoria.livre_sem(proc.pid) < falta:
+                        continue
+                    destinos = [no for no in self.nos if no is not origem]
+                    for destino in sorted(destinos, key=lambda no: (no.carga(), no.indice)):
+                        if self._migra(proc, origem, destino):
+                            return True
+        return False
+
+    def _migra(self, proc: Processo, origem: No, destino: No,
+               nucleo: Optional[Escalonador] = None) -> bool:
+        """Move um processo bloqueado de 'origem' para 'destino'; False se nao cabe la."""
+        if destino.memoria.maior_livre(proc.init_priority) < proc.mem_blocks:
+            return False
+        offset = destino.memoria.allocate(proc.pid, proc.mem_blocks, proc.init_priority)
+        if offset is None:
+            return False
+        dono = origem.nucleos[proc.nucleo]
+        for fila in dono.niveis:
+            if proc.pid in fila.bloqueados:
+                fila.retira_bloqueado(proc.pid)
+                break
+        # quem estava atras dele nos dispositivos da origem pode ser atendido
+        dono._desbloqueia(origem.recursos.cancela(proc.pid))
+        origem.memoria.free(proc.pid)
+        proc.offset = offset
+        self.memoria.no_de[proc.pid] = destino.indice
+        custo = self.custo_migracao + proc.mem_blocks // self.blocos_por_tick
+        proc.remaining_init += custo
+        if nucleo is None:
+            nucleo = self._menos_carregado(destino)
+        nucleo.adiciona_fila(proc, forca=True)
+        origem.migracoes_saida += 1
+        destino.migracoes_entrada += 1
+        destino.blocos_migrados += proc.mem_blocks
+        destino.custo_migracao += custo
+        self.migracoes += 1
+        self.escalonador.saida.migracao(proc, origem.indice, destino.indice, custo)
+        if self.despachador.has_pending():
+            # a memoria liberada na origem pode admitir quem espera
+            self.agenda(self.relogio, CHEGADA)
+        self._acorda()
+        return True
+
+    # ------------------------------
+    # Relatorio
+    # ------------------------------
+    def relatorio(self) -> List[Dict[str, object]]:
+        """Utilizacao (fracao do tempo simulado) e migracoes de cada no."""
+        tempo = self._integrado or 1
+        resultado = []
+        for no in self.nos:
+            capacidade = no.memoria.capacidade
+            resultado.append({
+                "no": no.indice,
+                "nucleos": len(no.nucleos),
+                "processos": no.colocados,
+                "cpu_utilizacao": no.ticks_cpu / (tempo * len(no.nucleos)),
+                "memoria_utilizacao": {"rt": no.area_memoria[0] / (tempo * capacidade[0]),
+                                       "user": no.area_memoria[1] / (tempo * capacidade[1])},
+                "dispositivos_utilizacao": no.area_dispositivos / (tempo * len(no.recursos.espera)),
+                "transbordos": sum(n.transbordos for n in no.nucleos),
+                "migracoes_entrada": no.migracoes_entrada,
+                "migracoes_saida": no.migracoes_saida,
+                "blocos_migrados": no.blocos_migrados,
+                "custo_migracao_ticks": no.custo_migracao,
+            })
+        return resultado
+
+
+def monta(n_nos: int, nucleos_por_no: int, config, saida, metricas=None,
+          process_file: Optional[str] = "processes.txt", fileops_file: Optional[str] = "files.txt",
+          alocador: str = "extents", compactar: bool = False, migracao: bool = True,
+          registros=None, arquivos=None) -> SimuladorCluster:
+    """Cluster de 'n_nos' maquinas iguais, com a entrada ja carregada (registros/arquivos: ja lidos)."""
+    nos = []
+    for i in range(n_nos):
+        memoria = MemoryManager(alocador, total_blocks=config.total_blocks,
+                                rt_blocks=config.rt_blocks, compactar=compactar)
+        recursos = Recursos()
+        nos.append(No(i, [Escalonador(memoria, recursos, saida, metricas, config)
+                          for _ in range(nucleos_por_no)]))
+    despachador = DespachadorCluster(nos, process_file, fileops_file)
+    despachador.load_processes(registros)
+    despachador.load_filesystem(arquivos)
+    return SimuladorCluster(nos, despachador, migracao=migracao)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from typing import Hashable, Iterable, List, Optional, Tuple
+
+
+def planeja(moveis: Iterable[Tuple[int, int, Hashable]], fixos: Iterable[Tuple[int, int]],
+            inicio: int, fim: int, tamanho: int) -> Optional[List[Tuple[Hashable, int, int, int]]]:
+    """
+    Plano de compactacao para abrir 'tamanho' blocos contiguos em [inicio, fim).
+
+    moveis: trechos ocupados (offset, tamanho, chave) que podem mudar de
+    lugar; fixos: (offset, tamanho) que nao podem. Os moveis deslizam para o
+    inicio, em ordem de offset, e o plano para assim que o buraco aberto
+    antes do proximo trecho ja basta; assim so e movido o prefixo
+    necessario. Retorna os movimentos (chave, offset antigo, offset novo,
+    tamanho), a aplicar nessa ordem (cada destino fica a esquerda da origem
+    e ja esta livre quando o movimento e feito), ou None se nem compactando
+    cabe (os fixos dividem o espaco livre).
+    """
+    trechos = sorted([(o, t, c, True) for o, t, c in moveis] + [(o, t, None, False) for o, t in fixos],
+                     key=lambda trecho: trecho[0])
+    movimentos: List[Tuple[Hashable, int, int, int]] = []
+    cursor = inicio
+    for offset, tam, chave, movel in trechos:
+        if offset - cursor >= tamanho:
+            return movimentos
+        if not movel:
+            cursor = offset + tam
+            continue
+        if offset != cursor:
+            movimentos.append((chave, offset, cursor, tam))
+        cursor += tam
+    return movimentos if fim - cursor >= tamanho else None
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+# Valores padrao (os mesmos de antes de virarem configuracao por instancia)
+USER_QUANTUM_MS: Dict[int, int] = {1: 6, 2: 5, 3: 4, 4: 3, 5: 2}
+MAX_QUEUE_SIZE = 100
+# ciclos sem executar => sobe prioridade (min 1); Processo.age sempre usou 6
+AGING_THRESHOLD_TICKS = 6
+TOTAL_BLOCKS = 1024
+RT_BLOCKS = 64
+
+
+@dataclass
+class Configuracao:
+    """Parametros de uma simulacao; cada escalonador/memoria recebe a sua."""
+    quantum: Dict[int, int] = field(default_factory=lambda: dict(USER_QUANTUM_MS))
+    limiar_aging: int = AGING_THRESHOLD_TICKS
+    capacidade_fila: int = MAX_QUEUE_SIZE
+    total_blocks: int = TOTAL_BLOCKS
+    rt_blocks: int = RT_BLOCKS
+    # escalonamento dos processos de usuario (ver politicas.ESCALONAMENTOS)
+    politica: str = "mlfq"
+    semente: int = 0  # gerador da politica "loteria"
+    # controle de admissao: o despachador para de admitir quando os nucleos
+    # somam tantos processos nas filas (None = capacidade de todos os niveis)
+    limite_prontos: Optional[int] = None
+
+    def __post_init__(self):
+        if sorted(self.quantum) != [1, 2, 3, 4, 5] or min(self.quantum.values()) < 1:
+            raise ValueError(f"quantum precisa de valores >= 1 para as prioridades 1..5: {self.quantum}")
+        if not 0 < self.rt_blocks < self.total_blocks:
+            raise ValueError("rt_blocks precisa estar entre 0 e total_blocks")
+        if self.limiar_aging < 1 or self.capacidade_fila < 1:
+            raise ValueError("limiar_aging e capacidade_fila precisam ser >= 1")
+        if self.limite_prontos is not None and self.limite_prontos < 1:
+            raise ValueError("limite_prontos precisa ser >= 1")
+
+    @property
+    def user_blocks(self) -> int:
+        return self.total_blocks - self.rt_blocks
+
+    @property
+    def limite_admissao(self) -> int:
+        if self.limite_prontos is not None:
+            return self.limite_prontos
+        return 6 * self.capacidade_fila  # RT + 5 niveis de usuario
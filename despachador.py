@@ -1,174 +1,341 @@
 
 from processo import Processo
 from memoria import MemoryManager
-from typing import List
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 from arquivos import FileManager
+from entrada import (Leitor, disco_binario, disco_jsonl, formato, operacoes_binario, operacoes_jsonl,
+                     processos_binario, processos_jsonl)
+from saida import OP_NEGADA, OP_OK, OP_SEM_ESPACO, OP_SEM_PROCESSO
+import heapq
+
+JANELA_ADMISSAO = 4096
+
+def ler_processos(path: str, inicio: Optional[int] = None) -> Leitor:
+    """
+    Le o arquivo de processos sob demanda (texto, binario ou JSONL, ver
+    entrada.py); inicio: Leitor.posicao de uma leitura anterior, para continuar dali.
+    """
+    tipo = formato(path)
+    if tipo == "binario":
+        return processos_binario(path, inicio)
+    if tipo == "jsonl":
+        return processos_jsonl(path, inicio)
+    return Leitor(_processos_texto(path, inicio), inicio)
+
+def _processos_texto(path: str, inicio: Optional[int]) -> Iterator[Tuple[int, tuple]]:
+    """Um registro por linha, com o byte seguinte a ela."""
+    with open(path, "rb") as f:
+        posicao = 0
+        if inicio is not None:
+            f.seek(inicio)
+            posicao = inicio
+        for line in f:
+            posicao += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            # formato: <tempo_init>, <prioridade>, <tempo_cpu>, <blocos_mem>, <printer>, <scanner>, <modem>, <sata>
+            tempo_inicio, prioridade, tempo_cpu, blocos_mem, printer_code, scanner_req, modem_req, sata_code = map(int, line.split(b","))
+            yield posicao, (tempo_inicio, prioridade, tempo_cpu,
+                            blocos_mem, printer_code, scanner_req,
+                            modem_req, sata_code)
+
+def ler_disco(path: str) -> Tuple[int, List[tuple]]:
+    """Cabecalho do arquivo do sistema de arquivos: (total de blocos, segmentos (nome, offset, tamanho))."""
+    tipo = formato(path)
+    if tipo == "binario":
+        return disco_binario(path)
+    if tipo == "jsonl":
+        return disco_jsonl(path)
+    with open(path) as f:
+        linhas = (line.strip() for line in f)
+        linhas = (line for line in linhas if line)
+        total_blocks = int(next(linhas))
+        n_segments = int(next(linhas))
+        segmentos = []
+        for _ in range(n_segments):
+            name, offset, size = next(linhas).split(",")
+            segmentos.append((name.strip(), int(offset), int(size)))
+    return total_blocks, segmentos
+
+def ler_operacoes(path: str, inicio: Optional[int] = None) -> Leitor:
+    """Le as operacoes (pid, op, nome, tamanho) sob demanda, depois dos segmentos (inicio: ver ler_processos)."""
+    tipo = formato(path)
+    if tipo == "binario":
+        return operacoes_binario(path, inicio)
+    if tipo == "jsonl":
+        return operacoes_jsonl(path, inicio)
+    return Leitor(_operacoes_texto(path, inicio), inicio)
+
+def _operacoes_texto(path: str, inicio: Optional[int]) -> Iterator[Tuple[int, tuple]]:
+    with open(path, "rb") as f:
+        posicao = 0
+        if inicio is not None:
+            f.seek(inicio)
+            posicao = inicio
+        else:
+            # pula o cabecalho: total de blocos, numero de segmentos e os segmentos
+            lidas, cabecalho = 0, 2
+            while lidas < cabecalho:
+                line = f.readline()
+                if not line:
+                    return
+                posicao += len(line)
+                if line.strip():
+                    lidas += 1
+                    if lidas == 2:
+                        cabecalho += int(line)
+        # operacoes
+        for line in f:
+            posicao += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            parts = line.split(b",")
+            pid = int(parts[0])
+            op = int(parts[1])
+            name = parts[2].strip().decode()
+            size = int(parts[3]) if op == 0 else None
+            yield posicao, (pid, op, name, size)
+
+def ler_arquivos(path: str) -> Tuple[int, List[tuple], List[tuple]]:
+    """Arquivo do sistema de arquivos inteiro: (total de blocos, segmentos, operacoes)."""
+    total_blocks, segmentos = ler_disco(path)
+    return total_blocks, segmentos, list(ler_operacoes(path))
 
 class Despachador:
-    def __init__(self, escalonador, memoria, processos, arquivos):
+    def __init__(self, escalonador, memoria, processos, arquivos, janela: int = JANELA_ADMISSAO,
+                 saida=None):
+        """
+        janela: quantos registros ficam em memoria de cada vez, tanto no heap
+        de admissao (ordenado por tempo_inicio) quanto na espera por memoria.
+        saida: destino dos logs (padrao: a mesma saida do escalonador).
+        """
         self.process_file = processos
         self.fileops_file = arquivos
 
-        self.processos_pendentes = [] 
-        self.processes = []
         self.memoria = memoria
-        self.pid = 0
+        # compactacao da memoria move processos: mantem proc.offset em dia
+        memoria.ao_mover = self._moveu
         self.escalonador = escalonador
-        self.proc_existentes = []
+        self.saida = saida if saida is not None else escalonador.saida
+        # pid -> processo, para todos os admitidos
+        self.por_pid: Dict[int, Processo] = {}
+        # operacoes de arquivo: lidas sob demanda, executadas na ordem do arquivo
+        self._ops: Optional[Iterator[tuple]] = None
+        self._op_pendente: Optional[tuple] = None
+        self.ops_feitas = 0
+        self.arquivos_finalizados = False
+        self.file_manager: Optional[FileManager] = None
+        self.janela = janela
+        self._registros: Optional[Iterator[Tuple[int, ...]]] = None
+        self._lidos = 0
+        # (tempo_inicio, ordem no arquivo, registro); a ordem no arquivo e o
+        # pid, que assim nao depende da ordem de admissao nem da janela
+        self.chegadas: List[tuple] = []
+        # entradas (como em chegadas) que nao couberam, por regiao (0 = tempo real, 1 = usuario)
+        self.esperando_memoria: List[Deque[tuple]] = [deque(), deque()]
+        self._menor_esperando = [0, 0]
+        self._liberacoes_vistas = 0
+        # a ultima passada parou porque o escalonador nao aceitava mais (contencao)
+        self.contido = False
 
-    def load_processes(self):
-        with open(self.process_file) as f:
-            lines = [line.strip() for line in f if line.strip()]
-        for pid, line in enumerate(lines):
-            # formato: <tempo_init>, <prioridade>, <tempo_cpu>, <blocos_mem>, <printer>, <scanner>, <modem>, <sata>
-            parts = list(map(int, line.split(",")))
-            tempo_inicio, prioridade, tempo_cpu, blocos_mem, printer_code, scanner_req, modem_req, sata_code = parts
-            self.processes.append((tempo_inicio, prioridade, tempo_cpu,
-                              blocos_mem, printer_code, scanner_req,
-                              modem_req, sata_code))
-
-    def load_filesystem(self):
-        with open(self.fileops_file) as f:
-            lines = [line.strip() for line in f if line.strip()]
-        total_blocks = int(lines[0])
-        n_segments = int(lines[1])
-        fm = FileManager(total_blocks)
+    def load_processes(self, registros: Optional[Iterable[Tuple[int, ...]]] = None):
+        """registros: registros ja lidos (ex.: compartilhados entre simulacoes)."""
+        if registros is not None:
+            self._registros = iter(registros)
+        else:
+            self._registros = ler_processos(self.process_file)
+
+    def load_filesystem(self, dados: Optional[Tuple[int, List[tuple], List[tuple]]] = None):
+        """dados: resultado de ler_arquivos, se ja foi lido."""
+        if dados is None:
+            total_blocks, segmentos = ler_disco(self.fileops_file)
+            self._ops = ler_operacoes(self.fileops_file)
+        else:
+            total_blocks, segmentos, ops = dados
+            self._ops = iter(ops)
+        # o disco compacta junto com a memoria (mesma opcao)
+        fm = FileManager(total_blocks, compactar=self.memoria.compactar)
         # carregar segmentos existentes
-        for i in range(2, 2 + n_segments):
-            name, offset, size = lines[i].split(",")
-            fm.load_existing([(name.strip(), int(offset), int(size), 0)])
+        fm.load_existing([(name, offset, size, 0) for name, offset, size in segmentos])
         self.file_manager = fm
-        # operac�es
-        self.file_ops = []
-        for line in lines[2 + n_segments:]:
-            parts = line.split(",")
-            pid = int(parts[0])
-            op = int(parts[1])
-            name = parts[2].strip()
-            size = int(parts[3]) if op == 0 else None
-            self.file_ops.append((pid, op, name, size))
+
+    def _moveu(self, pid: int, offset: int):
+        self.por_pid[pid].offset = offset
 
     def has_pending(self):
-        return len(self.processos_pendentes) > 0 or len(self.relacao_processos) > 0
+        return (self._registros is not None or len(self.chegadas) > 0
+                or len(self.esperando_memoria[0]) > 0 or len(self.esperando_memoria[1]) > 0)
 
-    def criar_processo(self):
-        self.relacao_processos =    self.processes
+    def _n_esperando(self) -> int:
+        return len(self.esperando_memoria[0]) + len(self.esperando_memoria[1])
+
+    def _le_chegadas(self):
+        """Completa o heap de admissao com registros do arquivo, ate a janela."""
+        while self._registros is not None and len(self.chegadas) < self.janela:
+            registro = next(self._registros, None)
+            if registro is None:
+                self._registros = None
+                break
+            heapq.heappush(self.chegadas, (registro[0], self._lidos, registro))
+            self._lidos += 1
+
+    def _admite(self, entrada) -> Optional[Processo]:
+        """Tenta alocar memoria para uma entrada (tempo, ordem, registro); cria o Processo se couber."""
+        _, pid, registro = entrada
+        tempo_inicio, prioridade, tempo_cpu, blocos_mem, printer_code, scanner_req, modem_req, sata_code = registro
+        offset = self.memoria.allocate(pid, blocos_mem, prioridade)
+        if offset is None:
+            return None
+
+        proc = Processo(
+        pid=pid,
+        start=tempo_inicio,
+        init_priority=prioridade,
+        cpu_time=tempo_cpu,
+        mem_blocks=blocos_mem,
+        printer_id=printer_code,
+        scanner_req=scanner_req,
+        modem_req=modem_req,
+        sata_id=sata_code
+        )
+
+        proc.offset = offset
+        self.saida.admissao(proc)
 
-        while(self.relacao_processos or self.processos_pendentes):
-            contador = 0
-            for tempo_inicio, prioridade, tempo_cpu, blocos_mem, printer_code, scanner_req, modem_req, sata_code in self.processos_pendentes.copy():
-                logs: List[str] = []
-                offset = self.memoria.allocate(self.pid, blocos_mem, prioridade)
+        self.por_pid[proc.pid] = proc
+        return proc
 
-                if offset is None:
+    def _retenta(self, admitidos: List[Processo]):
+        """Tenta de novo quem esperava memoria, na ordem de chegada."""
+        for r, espera in enumerate(self.esperando_memoria):
+            # nem o menor pedido cabe: nao vale percorrer a fila
+            if not espera or self._menor_esperando[r] > self.memoria.maior_livre(r):
+                continue
+            restantes: Deque[tuple] = deque()
+            for entrada in espera:
+                if self.contido or not self._aceita(admitidos):
+                    restantes.append(entrada)
                     continue
+                proc = self._admite(entrada)
+                if proc is None:
+                    restantes.append(entrada)
                 else:
-                    proc = Processo(
-                    pid=self.pid,
-                    start=tempo_inicio,
-                    init_priority=prioridade,
-                    cpu_time=tempo_cpu,
-                    mem_blocks=blocos_mem,
-                    printer_id=printer_code,
-                    scanner_req=scanner_req,
-                    modem_req=modem_req,
-                    sata_id=sata_code
-                    )
-
-                    proc.mem_offset = offset
-
-                    logs.append("dispatcher =>")
-                    logs.append(f"PID: {proc.pid}")
-                    logs.append(f"offset: {proc.mem_offset}")
-                    logs.append(f"blocks: {proc.mem_blocks}")
-                    logs.append(f"priority: {proc.init_priority}")
-                    logs.append(f"time: {proc.cpu_time}")
-                    logs.append(f"scanners: {proc.scanner_req}")
-                    logs.append(f"printers: {proc.printer_id}")
-                    logs.append(f"modems: {proc.modem_req}")
-                    logs.append(f"sata: {proc.sata_id}")
-                    logs.append("\n")
-                    temp = "\n".join(logs)
-                    print(temp)
-
-                    del self.processos_pendentes[contador]
-                    self.proc_existentes.append(proc)
-                    self.escalonador.processos.put(proc)
-
-                    self.pid+=1
-                    contador-=1
-                contador+=1
-            
-            for tempo_inicio, prioridade, tempo_cpu, blocos_mem, printer_code, scanner_req, modem_req, sata_code in self.relacao_processos.copy():
-                logs: List[str] = []
-                offset = self.memoria.allocate(self.pid, blocos_mem, prioridade)
-
-                if offset is None:
+                    admitidos.append(proc)
+            self.esperando_memoria[r] = restantes
+            self._menor_esperando[r] = min((reg[3] for _, _, reg in restantes), default=0)
+
+    def _aceita(self, admitidos: List[Processo]) -> bool:
+        if self.escalonador.aceita(len(admitidos)):
+            return True
+        self.contido = True
+        return False
+
+    def admitir(self) -> List[Processo]:
+        """
+        Admite o que couber: primeiro quem esperava memoria (so se algum
+        free liberou blocos desde a ultima tentativa), depois os registros
+        novos em ordem de tempo_inicio. Para de ler o arquivo quando a fila
+        de espera por memoria enche a janela, e para tudo quando o
+        escalonador ja tem processos demais nas filas (contido); o resto
+        fica para a proxima passada, depois de algum processo terminar.
+        """
+        admitidos: List[Processo] = []
+        self.contido = False
+        if self.memoria.liberacoes != self._liberacoes_vistas:
+            self._liberacoes_vistas = self.memoria.liberacoes
+            self._retenta(admitidos)
+
+        while not self.contido and self._n_esperando() < self.janela:
+            self._le_chegadas()
+            if not self.chegadas:
+                break
+            while self.chegadas:
+                if not self._aceita(admitidos):
+                    break
+                entrada = heapq.heappop(self.chegadas)
+                proc = self._admite(entrada)
+                if proc is not None:
+                    admitidos.append(proc)
                     continue
-                else:
-                    proc = Processo(
-                    pid=self.pid,
-                    start=tempo_inicio,
-                    init_priority=prioridade,
-                    cpu_time=tempo_cpu,
-                    mem_blocks=blocos_mem,
-                    printer_id=printer_code,
-                    scanner_req=scanner_req,
-                    modem_req=modem_req,
-                    sata_id=sata_code
-                    )
-
-                    proc.mem_offset = offset
-
-                    logs.append("dispatcher =>")
-                    logs.append(f"PID: {proc.pid}")
-                    logs.append(f"offset: {proc.mem_offset}")
-                    logs.append(f"blocks: {proc.mem_blocks}")
-                    logs.append(f"priority: {proc.init_priority}")
-                    logs.append(f"time: {proc.cpu_time}")
-                    logs.append(f"scanners: {proc.scanner_req}")
-                    logs.append(f"printers: {proc.printer_id}")
-                    logs.append(f"modems: {proc.modem_req}")
-                    logs.append(f"sata: {proc.sata_id}")
-                    logs.append("\n")
-                    temp = "\n".join(logs)
-                    print(temp)
-
-                    del self.relacao_processos[contador]
-                    self.proc_existentes.append(proc)
-                    self.escalonador.processos.put(proc)
-                    self.pid+=1
-                    contador-=1
-                contador+=1 
-        
-        self.escalonador.despachador_finalizado = True
-        logs: List[str] = []
-        logs.append("\nSistema de arquivos =>")
-        for i, (pid, op, name, size) in enumerate(self.file_ops, start=1):
-            temp = []
-            proc = next((p for p in self.proc_existentes if p.pid == pid), None)
+                registro = entrada[2]
+                r = 0 if registro[1] == 0 else 1
+                espera = self.esperando_memoria[r]
+                if not espera or registro[3] < self._menor_esperando[r]:
+                    self._menor_esperando[r] = registro[3]
+                espera.append(entrada)
+        return admitidos
+
+    def descarta_pendentes(self):
+        """Descarta o que nao coube nem com a memoria vazia (nunca sera admitido)."""
+        for espera in self.esperando_memoria:
+            for _, _, (_, prioridade, _, blocos_mem, *_) in espera:
+                self.saida.descarte(blocos_mem, prioridade)
+            espera.clear()
+
+    def tem_operacoes(self) -> bool:
+        return self._ops is not None
+
+    def executa_arquivos(self):
+        """
+        Executa, na ordem do arquivo, as operacoes cujo processo ja foi
+        admitido. Para na primeira de um processo que ainda vai chegar; se
+        nao ha mais nada para admitir, ela falha (o processo nao existe).
+        """
+        while self._ops is not None:
+            op = self._op_pendente
+            if op is None:
+                op = next(self._ops, None)
+                if op is None:
+                    self._ops = None
+                    return
+            pid, tipo, name, size = op
+            proc = self.por_pid.get(pid)
+            if proc is None and self.has_pending():
+                self._op_pendente = op
+                return
+            self._op_pendente = None
+            self.ops_feitas += 1
             if proc is None:
-                logs.append(f"Operacao {i} => Falha\nO processo {pid} nao existe.")
-                continue
-            if op == 0:  # criar
+                resultado = OP_SEM_PROCESSO
+            elif tipo == 0:  # criar
                 ok = self.file_manager.create(proc.pid, name, size, proc.is_real_time)
-                if ok:
-                    logs.append(f"Operacao {i} => Sucesso\nO processo {pid} criou o arquivo {name}.")
-                else:
-                    logs.append(f"Operacao {i} => Falha\nO processo {pid} nao pode criar o arquivo {name} (falta de espaco).")
+                resultado = OP_OK if ok else OP_SEM_ESPACO
             else:  # deletar
                 ok = self.file_manager.delete(proc.pid, name, proc.is_real_time)
-                if ok:
-                    logs.append(f"Operacao {i} => Sucesso\nO processo {pid} deletou o arquivo {name}.")
-                else:
-                    logs.append(f"Operacao {i} => Falha\nO processo {pid} nao pode deletar o arquivo {name}.")
-        logs.append("\nMapa de ocupacao do disco:")
-        logs.append(self.file_manager.show_map())
-        temp = "\n".join(logs)
-        while self.escalonador.finalizado == False:
-            continue
-        print(temp)
-
+                resultado = OP_OK if ok else OP_NEGADA
+            self.saida.operacao(self.ops_feitas, pid, tipo, name, resultado)
 
+    def finaliza_arquivos(self):
+        """Executa o que sobrou das operacoes e mostra o mapa do disco."""
+        if self.file_manager is None or self.arquivos_finalizados:
+            return
+        self.arquivos_finalizados = True
+        self.executa_arquivos()
+        if self.saida.ativo:
+            self.saida.mapa_disco(self.file_manager.show_map())
 
+    def criar_processo(self):
+        while self.has_pending():
+            with self.escalonador.cond:
+                vista = self.escalonador.fatias
+                admitidos = self.admitir()
+                for proc in admitidos:
+                    self.escalonador.entrega(proc)
+                # operacoes de arquivo dos processos que acabaram de chegar
+                self.executa_arquivos()
+                if not admitidos and (self._n_esperando() or self.contido):
+                    if not self.memoria.owners:
+                        self.descarta_pendentes()
+                    else:
+                        # nada coube: espera uma fatia terminar e liberar memoria
+                        self.escalonador.aguarda_fatia(vista)
 
+        with self.escalonador.cond:
+            self.escalonador.finaliza_despachador()
+            self.executa_arquivos()
+        self.escalonador.fim.wait()
+        self.finaliza_arquivos()
+        self.saida.flush()
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Formatos de entrada alem do texto: binario em colunas (lido com mmap, sem
+copia) e JSONL (um objeto por linha, lido sob demanda). ler_processos,
+ler_disco e ler_operacoes do despachador reconhecem o formato sozinhos.
+
+Binario: MAGICO, tamanho do cabecalho (uint64), cabecalho JSON e, alinhadas
+em 8 bytes, uma coluna de inteiros de 64 bits por campo, todas com n
+linhas. Nas operacoes de arquivo o nome e o indice na tabela de nomes do
+cabecalho e o tamanho e -1 no deletar.
+
+JSONL de processos: {"tempo_inicio": 0, "prioridade": 1, "tempo_cpu": 3,
+"blocos_mem": 64, "impressora": 0, "scanner": 1, "modem": 0, "sata": 0}
+(ou a lista dos 8 valores). JSONL de arquivos: a primeira linha e
+{"total_blocks": N, "segmentos": [[nome, offset, tamanho], ...]} e cada
+linha seguinte uma operacao {"pid": 0, "op": "criar", "nome": "A",
+"tamanho": 5} (op tambem pode ser 0 = criar, 1 = deletar).
+
+Os leitores devolvem um Leitor, que sabe o byte seguinte ao ultimo
+registro lido (posicao); com inicio=posicao a leitura continua dali sem
+reler o comeco do arquivo (retomada de snapshot).
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGICO_PROCESSOS = b"SOPROC\x00\x01"
+MAGICO_ARQUIVOS = b"SOARQS\x00\x01"
+VERSAO = 1
+FORMATOS = ("texto", "binario", "jsonl")
+
+CAMPOS_PROCESSO = ("tempo_inicio", "prioridade", "tempo_cpu", "blocos_mem",
+                   "impressora", "scanner", "modem", "sata")
+CAMPOS_OPERACAO = ("pid", "op", "nome", "tamanho")
+_OPS = {"criar": 0, "deletar": 1}
+
+
+class Leitor:
+    """
+    Registros de um arquivo de entrada, sob demanda. posicao: byte do
+    arquivo logo depois do ultimo registro devolvido (no binario, na
+    primeira coluna); None enquanto nada foi lido (e ai se le do inicio).
+    """
+
+    def __init__(self, pares: Iterator[Tuple[int, tuple]], posicao: Optional[int] = None):
+        self._pares = pares
+        self.posicao = posicao
+
+    def __iter__(self) -> "Leitor":
+        return self
+
+    def __next__(self) -> tuple:
+        self.posicao, registro = next(self._pares)
+        return registro
+
+    def close(self):
+        self._pares.close()
+
+
+def formato(path: str) -> str:
+    """Formato do arquivo de entrada, pelo conteudo (ver FORMATOS)."""
+    with open(path, "rb") as f:
+        inicio = f.read(64)
+    if inicio[:8] in (MAGICO_PROCESSOS, MAGICO_ARQUIVOS):
+        return "binario"
+    if inicio.lstrip()[:1] in (b"{", b"["):
+        return "jsonl"
+    return "texto"
+
+
+# ------------------------------
+# Binario
+# ------------------------------
+def _grava(path: str, magico: bytes, cabecalho: Dict[str, object], colunas: List[array]):
+    bruto = json.dumps(dict(cabecalho, versao=VERSAO), separators=(",", ":")).encode("utf-8")
+    tamanho = len(magico) + 8 + len(bruto)
+    with open(path, "wb") as f:
+        f.write(magico)
+        f.write(struct.pack("<Q", len(bruto)))
+        f.write(bruto)
+        f.write(bytes(-tamanho % 8))
+        for coluna in colunas:
+            if sys.byteorder == "big":
+                coluna.byteswap()
+            f.write(coluna.tobytes())
+
+
+def _linhas(path: str, magico: bytes, inicio: Optional[int] = None) -> Iterator[tuple]:
+    """
+    Primeiro item: o cabecalho; depois (posicao, linha) para cada linha da
+    tabela, montada direto das colunas no arquivo mapeado, a partir da que
+    comeca no byte 'inicio' da primeira coluna (linhas de tamanho fixo). O
+    mmap fica aberto ate o fim da leitura.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:len(magico)] != magico:
+            raise ValueError(f"{path} nao esta no formato binario esperado")
+        n = struct.unpack_from("<Q", mm, len(magico))[0]
+        base_cabecalho = len(magico) + 8
+        cabecalho = json.loads(mm[base_cabecalho:base_cabecalho + n].decode("utf-8"))
+        if cabecalho["versao"] != VERSAO:
+            raise ValueError(f"versao de entrada nao suportada: {cabecalho['versao']}")
+        yield cabecalho
+        dados = base_cabecalho + n + (-(base_cabecalho + n) % 8)
+        linhas, k = cabecalho["n"], len(cabecalho["colunas"])
+        primeira = 0 if inicio is None else (inicio - dados) // 8
+        posicoes = range(dados + 8 * (primeira + 1), dados + 8 * (linhas + 1), 8)
+        if sys.byteorder == "big":
+            valores = array("q", mm[dados:dados + 8 * linhas * k])
+            valores.byteswap()
+            yield from zip(posicoes, zip(*(valores[i * linhas + primeira:(i + 1) * linhas]
+                                           for i in range(k))))
+            return
+        with memoryview(mm) as base, base[dados:dados + 8 * linhas * k] as bruto, \
+                bruto.cast("q") as valores:
+            colunas = [valores[i * linhas + primeira:(i + 1) * linhas] for i in range(k)]
+            try:
+                yield from zip(posicoes, zip(*colunas))
+            finally:
+                for coluna in colunas:
+                    coluna.release()
+
+
+def grava_processos(registros: Iterable[tuple], path: str) -> int:
+    """Grava os registros de processos no formato binario; retorna quantos."""
+    colunas = [array("q") for _ in CAMPOS_PROCESSO]
+    for registro in registros:
+        for coluna, valor in zip(colunas, registro):
+            coluna.append(valor)
+    _grava(path, MAGICO_PROCESSOS, {"n": len(colunas[0]), "colunas": CAMPOS_PROCESSO}, colunas)
+    return len(colunas[0])
+
+
+def grava_arquivos(total_blocks: int, segmentos: List[tuple],
+                   operacoes: Iterable[tuple], path: str) -> int:
+    """Grava disco e operacoes (pid, op, nome, tamanho) no formato binario."""
+    colunas = [array("q") for _ in CAMPOS_OPERACAO]
+    pid, op, nome, tamanho = colunas
+    ids: Dict[str, int] = {}
+    for p, o, name, size in operacoes:
+        pid.append(p)
+        op.append(o)
+        nome.append(ids.setdefault(name, len(ids)))
+        tamanho.append(-1 if size is None else size)
+    cabecalho = {"n": len(pid), "colunas": CAMPOS_OPERACAO, "total_blocks": total_blocks,
+                 "segmentos": [list(s) for s in segmentos], "nomes": list(ids)}
+    _grava(path, MAGICO_ARQUIVOS, cabecalho, colunas)
+    return len(pid)
+
+
+def processos_binario(path: str, inicio: Optional[int] = None) -> Leitor:
+    return Leitor(_processos_binario(path, inicio), inicio)
+
+
+def _processos_binario(path: str, inicio: Optional[int]) -> Iterator[Tuple[int, tuple]]:
+    linhas = _linhas(path, MAGICO_PROCESSOS, inicio)
+    next(linhas)
+    yield from linhas
+
+
+def disco_binario(path: str) -> Tuple[int, List[tuple]]:
+    linhas = _linhas(path, MAGICO_ARQUIVOS)
+    cabecalho = next(linhas)
+    linhas.close()
+    return cabecalho["total_blocks"], [tuple(s) for s in cabecalho["segmentos"]]
+
+
+def operacoes_binario(path: str, inicio: Optional[int] = None) -> Leitor:
+    return Leitor(_operacoes_binario(path, inicio), inicio)
+
+
+def _operacoes_binario(path: str, inicio: Optional[int]) -> Iterator[Tuple[int, tuple]]:
+    linhas = _linhas(path, MAGICO_ARQUIVOS, inicio)
+    nomes = next(linhas)["nomes"]
+    for posicao, (pid, op, nome, tamanho) in linhas:
+        yield posicao, (pid, op, nomes[nome], None if tamanho < 0 else tamanho)
+
+
+# ------------------------------
+# JSONL
+# ------------------------------
+def _objetos(path: str, inicio: Optional[int] = None) -> Iterator[Tuple[int, object]]:
+    """(byte depois da linha, objeto) de cada linha, a partir do byte 'inicio'."""
+    with open(path, "rb") as f:
+        posicao = 0
+        if inicio is not None:
+            f.seek(inicio)
+            posicao = inicio
+        for line in f:
+            posicao += len(line)
+            if line.strip():
+                yield posicao, json.loads(line)
+
+
+def processos_jsonl(path: str, inicio: Optional[int] = None) -> Leitor:
+    return Leitor(_processos_jsonl(path, inicio), inicio)
+
+
+def _processos_jsonl(path: str, inicio: Optional[int]) -> Iterator[Tuple[int, tuple]]:
+    for posicao, obj in _objetos(path, inicio):
+        if isinstance(obj, list):
+            yield posicao, tuple(int(v) for v in obj)
+        else:
+            # dispositivos ausentes = nao usa
+            yield posicao, tuple(int(obj.get(c, 0)) if i >= 4 else int(obj[c])
+                                 for i, c in enumerate(CAMPOS_PROCESSO))
+
+
+def disco_jsonl(path: str) -> Tuple[int, List[tuple]]:
+    objetos = _objetos(path)
+    _, cabecalho = next(objetos)
+    objetos.close()
+    return int(cabecalho["total_blocks"]), [(n, int(o), int(t)) for n, o, t in cabecalho.get("segmentos", [])]
+
+
+def operacoes_jsonl(path: str, inicio: Optional[int] = None) -> Leitor:
+    return Leitor(_operacoes_jsonl(path, inicio), inicio)
+
+
+def _operacoes_jsonl(path: str, inicio: Optional[int]) -> Iterator[Tuple[int, tuple]]:
+    objetos = _objetos(path, inicio)
+    if inicio is None:
+        next(objetos)  # cabecalho do disco
+    for posicao, obj in objetos:
+        op = _OPS.get(obj["op"], obj["op"])
+        tamanho = obj.get("tamanho")
+        yield posicao, (int(obj["pid"]), int(op), obj["nome"],
+                        int(tamanho) if op == 0 and tamanho is not None else None)
+
+
+def grava_processos_jsonl(registros: Iterable[tuple], path: str) -> int:
+    n = 0
+    with open(path, "w") as f:
+        for registro in registros:
+            f.write(json.dumps(dict(zip(CAMPOS_PROCESSO, registro))) + "\n")
+            n += 1
+    return n
+
+
+def grava_arquivos_jsonl(total_blocks: int, segmentos: List[tuple],
+                         operacoes: Iterable[tuple], path: str) -> int:
+    n = 0
+    with open(path, "w") as f:
+        f.write(json.dumps({"total_blocks": total_blocks,
+                            "segmentos": [list(s) for s in segmentos]}) + "\n")
+        for pid, op, nome, tamanho in operacoes:
+            obj = {"pid": pid, "op": "criar" if op == 0 else "deletar", "nome": nome}
+            if op == 0:
+                obj["tamanho"] = tamanho
+            f.write(json.dumps(obj) + "\n")
+            n += 1
+    return n
+
+
+if __name__ == "__main__":
+    # uso: python entrada.py processos|arquivos <origem> <destino(.bin|.jsonl)>
+    # a origem pode estar em qualquer formato; .jsonl no destino grava JSONL
+    from despachador import ler_disco, ler_operacoes, ler_processos
+    if len(sys.argv) != 4 or sys.argv[1] not in ("processos", "arquivos"):
+        sys.exit("uso: python entrada.py processos|arquivos <origem> <destino(.bin|.jsonl)>")
+    tipo, origem, destino = sys.argv[1:]
+    jsonl = destino.endswith(".jsonl")
+    if tipo == "processos":
+        grava = grava_processos_jsonl if jsonl else grava_processos
+        n = grava(ler_processos(origem), destino)
+    else:
+        grava = grava_arquivos_jsonl if jsonl else grava_arquivos
+        n = grava(*ler_disco(origem), ler_operacoes(origem), destino)
+    print(f"{n} registros -> {destino}")
@@ -5,138 +5,278 @@ from typing import Deque, Dict, List, Optional
 from fila import Fila
 from processo import Processo
 from memoria import MemoryManager
+from saida import Saida
+from metricas import Metricas
+from configuracao import Configuracao
+from politicas import nova_politica
 import queue
-
-USER_QUANTUM_MS: Dict[int, int] = {1: 6, 2: 5, 3: 4, 4: 3, 5: 2}
-MAX_QUEUE_SIZE = 100
-AGING_THRESHOLD_TICKS = 3
+import threading
 
 class Escalonador:
-    def __init__(self, memoria, recursos):
-        self.rt_queue = Fila("RT")
-        self.user_queues: Dict[int, Fila] = {p: Fila(f"U{p}") for p in range(1, 6)}
+    def __init__(self, memoria, recursos, saida: Optional[Saida] = None,
+                 metricas: Optional[Metricas] = None, config: Optional[Configuracao] = None):
+        self.config = config if config is not None else Configuracao()
+        capacidade, limiar = self.config.capacidade_fila, self.config.limiar_aging
+        # escalonamento dos processos de usuario (tempo real e sempre FIFO)
+        self.politica = nova_politica(self.config)
+        self.rt_queue = Fila("RT", capacidade, limiar)
+        self.user_queues: Dict[int, Fila] = {p: self.politica.fila(f"U{p}", capacidade, limiar)
+                                             for p in range(1, 6)}
+        # nivel 0 = RT, 1..5 = usuario; bit n ligado => nivel n tem processo pronto
+        self.niveis: List[Fila] = [self.rt_queue] + [self.user_queues[p] for p in range(1, 6)]
+        self.mascara_prontos = 0
+        # Transbordo: chegadas que encontraram a fila do nivel cheia esperam
+        # aqui, em ordem, e entram quando abre vaga. So processos novos (sem
+        # dispositivos) transbordam; reinsercoes e migracoes entram sempre,
+        # e o despachador segura as chegadas quando os nucleos enchem (aceita)
+        self.transbordo: List[Deque[Processo]] = [deque() for _ in self.niveis]
+        self.em_transbordo = 0
+        self.transbordos = 0  # chegadas que transbordaram
+        self.contencoes = 0  # vezes que a admissao foi segurada
         self.tick_count = 0
+        self.ultima_fatia = 0  # ticks de CPU da ultima fatia executada
+        self.relogio = 0  # ticks simulados desde o inicio (fatias + ocioso)
         self.processos = queue.Queue() 
         self.memoria = memoria
         self.recursos = recursos
+        # destino dos logs, compartilhado com o despachador
+        self.saida = saida if saida is not None else Saida()
+        self.metricas = metricas
+        # falso quando o simulador multinucleo integra as metricas do sistema todo
+        self.integra_metricas = True
+        # Modo multinucleo: este e o nucleo 'indice' de 'nucleos' (todos
+        # compartilham memoria e recursos); com um nucleo so, nucleos = [self]
+        self.indice = 0
+        self.nucleos: List["Escalonador"] = [self]
         self.finalizado = False
         self.despachador_finalizado = False
+        # Sincronizacao com o despachador: 'cond' protege filas, memoria e
+        # recursos; 'fatias' conta fatias executadas e 'fim' marca o termino.
+        self.cond = threading.Condition()
+        self.fatias = 0
+        self.fim = threading.Event()
 
     def has_ready(self) -> bool:
-        return len(self.rt_queue) > 0 or any(len(self.user_queues[p]) > 0 for p in range(1, 6))
+        return (len(self.rt_queue) > 0 or any(len(self.user_queues[p]) > 0 for p in range(1, 6))
+                or self.em_transbordo > 0)
+
+    def entrega(self, proc: Processo):
+        """Chamado pelo despachador (com 'cond' adquirido) para um novo processo."""
+        self.processos.put(proc)
+        self.cond.notify_all()
+
+    def finaliza_despachador(self):
+        """Chamado pelo despachador (com 'cond' adquirido) ao admitir tudo."""
+        self.despachador_finalizado = True
+        self.cond.notify_all()
+
+    def aguarda_fatia(self, vista: int):
+        """Bloqueia (com 'cond' adquirido) ate terminar uma fatia apos 'vista'."""
+        while self.fatias == vista and not self.fim.is_set():
+            self.cond.wait()
+
+    def _finaliza(self):
+        self.finalizado = True
+        self.fim.set()
+        self.cond.notify_all()
+
+    def _atualiza_nivel(self, nivel: int):
+        if self.niveis[nivel].q:
+            self.mascara_prontos |= 1 << nivel
+        else:
+            self.mascara_prontos &= ~(1 << nivel)
+
+    def _atualiza_niveis(self):
+        mascara = 0
+        for nivel, fila in enumerate(self.niveis):
+            if fila.q:
+                mascara |= 1 << nivel
+        self.mascara_prontos = mascara
 
-    def adiciona_fila(self, proc: Processo):
+    def adiciona_fila(self, proc: Processo, forca: bool = False) -> bool:
+        """Enfileira no nivel do processo; com a fila cheia ele vai para o transbordo (False)."""
         if proc.init_priority == 0:
-            return self.rt_queue.push(proc)
-        prio = min(max(proc.current_priority, 1), 5)
-        return self.user_queues[prio].push(proc)
+            nivel = 0
+        else:
+            nivel = self.politica.enfileira(proc)
+        proc.nucleo = self.indice
+        if not self.niveis[nivel].push(proc, forca):
+            self.transbordo[nivel].append(proc)
+            self.em_transbordo += 1
+            self.transbordos += 1
+            self.saida.transbordo(proc, self.niveis[nivel].name)
+            return False
+        self._atualiza_nivel(nivel)
+        return True
 
-    def proximo_processo(self) -> Optional[Processo]:
-        # RT tem precedência absoluta
-        proc = self.rt_queue.pop()
-        if proc:
-            if proc.remaining_init == 0:
-                return proc
-            else:
-                proc_temp = self.proximo_processo()
-                self.rt_queue.push(proc)
-                return proc_temp
-
-        # Escolhe a fila de maior prioridade (número menor)
-        for prio in range(1, 6):
-            proc = self.user_queues[prio].pop()
-            
-            if proc != None:
-                if proc.remaining_init == 0:
-                    request = proc.checa_recursos()
-                    if request == False:
-                        request = self.recursos.request(proc, proc.pid, proc.scanner_req, proc.printer_id, proc.modem_req, proc.sata_id)
-                        if request == False:
-                            proc_temp = self.proximo_processo()
-                            self.user_queues[prio].push(proc)
-                            return proc_temp
-                else:
-                    proc_temp = self.proximo_processo()
-                    self.user_queues[prio].push(proc)
-                    return proc_temp
+    def _reabastece(self):
+        """Passa do transbordo para as filas que tem vaga, na ordem de chegada."""
+        for nivel, espera in enumerate(self.transbordo):
+            fila = self.niveis[nivel]
+            while espera and len(fila) < fila.capacity:
+                proc = espera.popleft()
+                self.em_transbordo -= 1
+                self.adiciona_fila(proc)
 
+    def aceita(self, extra: int = 0) -> bool:
+        """
+        Controle de admissao: False (e conta uma contencao) se os nucleos,
+        somados a 'extra' processos ja admitidos e ainda nao entregues,
+        chegaram a config.limite_admissao processos nas filas.
+        """
+        if sum(n.carga() for n in self.nucleos) + extra < self.config.limite_admissao:
+            return True
+        self.contencoes += 1
+        return False
 
-            if proc:
+    def proximo_processo(self) -> Optional[Processo]:
+        # RT (nivel 0) tem precedência absoluta; depois o menor nivel de usuario
+        while self.mascara_prontos:
+            nivel = (self.mascara_prontos & -self.mascara_prontos).bit_length() - 1
+            fila = self.niveis[nivel]
+            proc = fila.pop()
+            if nivel == 0 or proc.checa_recursos() or self.recursos.request(
+                    proc, proc.pid, proc.scanner_req, proc.printer_id, proc.modem_req, proc.sata_id):
+                self._atualiza_nivel(nivel)
                 return proc
+            # sem recursos: fica na fila de espera dos dispositivos
+            fila.bloqueia(proc)
+            self._atualiza_nivel(nivel)
         return None
 
-    def run_one_slice(self, proc: Processo) -> str:
-        logs: List[str] = []
-        request = 0
+    def _desbloqueia(self, acordados: List[Processo]):
+        """Processos que receberam dispositivos no release voltam a concorrer."""
+        for proc in reversed(acordados):
+            # o processo pode estar bloqueado na fila de outro nucleo
+            dono = self.nucleos[proc.nucleo]
+            nivel = dono.politica.nivel(proc)
+            dono.niveis[nivel].desbloqueia(proc)
+            dono._atualiza_nivel(nivel)
+
+    def carga(self) -> int:
+        """Processos nas filas (e no transbordo) deste nucleo, mais os recebidos e nao consumidos."""
+        return sum(len(fila) for fila in self.niveis) + self.em_transbordo + self.processos.qsize()
+
+    def cede(self) -> Optional[Processo]:
+        """Retira o proximo processo pronto para outro nucleo (roubo de trabalho)."""
+        if not self.mascara_prontos:
+            return None
+        nivel = (self.mascara_prontos & -self.mascara_prontos).bit_length() - 1
+        proc = self.niveis[nivel].pop()
+        self._atualiza_nivel(nivel)
+        return proc
+
+    def recebe_processos(self):
+        # quem esperava vaga entra antes dos que acabaram de chegar
+        if self.em_transbordo:
+            self._reabastece()
+        # consome todos os processos que chegaram
+        while not self.processos.empty():
+            proc = self.processos.get()
+            self.saida.recebido(proc)
+            if self.metricas is not None:
+                self.metricas.chegou(proc, self.relogio)
+            self.adiciona_fila(proc)
+
+    def passo(self) -> Optional[Processo]:
+        """Recebe chegadas, escolhe e executa uma fatia; None se ninguem pode rodar."""
+        self.recebe_processos()
+        proc = self.proximo_processo()
+        if proc != None:
+            self.run_one_slice(proc)
+        return proc
+
+    def _avanca(self, ticks: int):
+        """Avanca o relogio (com a fila/memoria/dispositivos como estao agora)."""
+        if self.metricas is not None and self.integra_metricas:
+            self.metricas.avanca([len(fila) for fila in self.niveis], self.memoria,
+                                 self.recursos, self.relogio, ticks)
+        self.relogio += ticks
+
+    def ocioso(self, ticks: int = 1):
+        """Avanca 'ticks' de tempo sem processo em execucao."""
+        self._avanca(ticks)
+        # cada tick ocioso conta uma vez por processo na fila RT
+        self.rt_queue.incrementar_tempo_espera(ticks * len(self.rt_queue))
+        for fila in self.user_queues:
+            self.user_queues[fila].incrementar_tempo_espera(ticks)
+        self._atualiza_niveis()
+
+    def ticks_ate_pronto(self) -> Optional[int]:
+        """Ticks ociosos ate algum processo terminar a inicializacao (None: nunca)."""
+        ticks = None
+        falta = self.rt_queue.proxima_chegada()
+        if falta is not None:
+            ticks = -(-falta // len(self.rt_queue))
+        for fila in self.user_queues.values():
+            falta = fila.proxima_chegada()
+            if falta is not None and (ticks is None or falta < ticks):
+                ticks = falta
+        return ticks
+
+    def run_one_slice(self, proc: Processo):
+        # o log da fatia e montado pela saida a partir do estado inicial e
+        # final, entao a fatia inteira e aplicada de uma vez
+        prioridade = proc.current_priority
+        restante = proc.remaining_cpu
+        metricas = self.metricas
+        if metricas is not None:
+            metricas.despachou(proc, self.relogio)
 
         if proc.is_real_time:
-            logs.append(f"\nExecutando {proc}")
-            while proc.remaining_cpu > 0:
-                logs.append(f"{proc} instruction {proc.cpu_time - proc.remaining_cpu + 1}")
-                proc.remaining_cpu -= 1
-                self.tick_count += 1
-            logs.append(f"{proc} return SIGINT\n")
+            self.ultima_fatia = proc.remaining_cpu
+            self.tick_count += proc.remaining_cpu
+            self._avanca(proc.remaining_cpu)
+            proc.remaining_cpu = 0
+            if metricas is not None:
+                metricas.concluiu(proc, self.relogio)
             self.memoria.free(proc.pid)
-            logs.append(f"Processo P{proc.pid} concluido, memoria liberada")
+            self.saida.fatia(proc, prioridade, restante, True)
             for fila in self.user_queues:
                 self.user_queues[fila].incrementar_tempo_espera(self.tick_count)
+            self._atualiza_niveis()
             self.tick_count = 0
-            if self.has_ready() != True and self.despachador_finalizado:
-                self.finalizado = True
-            return "\n".join(logs)
-
-        quantum = USER_QUANTUM_MS[proc.current_priority]
-        ran = 0
-        
-        request = proc.checa_recursos()
-        if request == False:
-            request = self.recursos.request(proc, proc.pid, proc.scanner_req, proc.printer_id, proc.modem_req, proc.sata_id)
+            return
 
-
-        logs.append(f"\nExecutando {proc}")
-        while ran < quantum and proc.remaining_cpu > 0:
-            logs.append(f"{proc} instruction {proc.cpu_time - proc.remaining_cpu + 1}")
-            proc.remaining_cpu -= 1
-            self.tick_count += 1
-            ran += 1
+        # os recursos ja foram obtidos em proximo_processo
+        ran = min(self.politica.fatia(proc), proc.remaining_cpu)
+        proc.remaining_cpu -= ran
+        self.tick_count += ran
+        self.ultima_fatia = ran
+        self._avanca(ran)
 
         if proc.remaining_cpu == 0:
-            logs.append(f"{proc} return SIGINT")
+            if metricas is not None:
+                metricas.concluiu(proc, self.relogio)
             self.memoria.free(proc.pid)
-            logs.append(f"Processo P{proc.pid} concluido, memoria liberada")
-            self.recursos.release(proc, proc.pid)
-            if self.has_ready() != True and self.despachador_finalizado:
-                self.finalizado = True
-            return "\n".join(logs)
+            self.saida.fatia(proc, prioridade, restante, True)
+            self._desbloqueia(self.recursos.release(proc, proc.pid))
+            return
+        self.saida.fatia(proc, prioridade, restante, False)
 
-        # Realimentação: não terminou → rebaixa (até 5), zera aging, reinsere
-        if proc.current_priority < 5:
-            proc.current_priority += 1
-        proc.aging_counter = 0
+        # politica (MLFQ: rebaixa ate 5 e zera o aging) e nivel de reinsercao
+        nivel = self.politica.fim_fatia(proc, ran)
 
         for fila in self.user_queues:
             self.user_queues[fila].incrementar_tempo_espera(self.tick_count)
 
-        self.user_queues[proc.current_priority].push(proc)
-        return "\n".join(logs)
+        # o processo ja ocupava a fila: volta mesmo que ela tenha enchido
+        self.niveis[nivel].push(proc, forca=True)
+        self._atualiza_niveis()
         
     def main(self):
         while True:
-            proc = None
-            # consome todos os processos que chegaram
-            while not self.processos.empty():
-                proc = self.processos.get()
-                print(f"[Escalonador] Recebi processo {proc}")
-                self.adiciona_fila(proc)
+            with self.cond:
+                # sem nada para executar: dorme ate chegar processo ou acabar
+                while self.processos.empty() and not self.has_ready():
+                    if self.despachador_finalizado:
+                        self._finaliza()
+                        return
+                    self.cond.wait()
 
-            proc = self.proximo_processo()
-            if proc != None:
-                print(self.run_one_slice(proc))
-
-            else:
-                for fila in self.rt_queue:
-                    self.rt_queue.incrementar_tempo_espera(1)
-
-                for fila in self.user_queues:
-                    self.user_queues[fila].incrementar_tempo_espera(1)
-                continue
+                proc = self.passo()
+                if proc != None:
+                    self.fatias += 1
+                    self.cond.notify_all()
+                else:
+                    self.ocioso(1)
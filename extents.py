@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+from array import array
+from heapq import heappop, heappush
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class ArvoreMaximos:
+    """
+    Arvore de segmentos de maximos sobre os indices [0, n).
+
+    Cada folha guarda um valor >= 0 e cada no interno o maximo dos filhos:
+    atualizar uma folha e achar a primeira folha com valor >= x a partir de
+    um indice (ou a ultima nao nula antes dele) custam O(log n).
+    """
+
+    def __init__(self, tamanho: int):
+        n = 2
+        while n < tamanho:
+            n *= 2
+        self._n = n
+        self._tree = array("q", [0]) * (2 * n)
+
+    def maximo(self) -> int:
+        return self._tree[1]
+
+    def get(self, i: int) -> int:
+        return self._tree[i + self._n]
+
+    def set(self, i: int, valor: int):
+        t = self._tree
+        i += self._n
+        t[i] = valor
+        i >>= 1
+        while i:
+            a, b = t[2 * i], t[2 * i + 1]
+            t[i] = a if a > b else b
+            i >>= 1
+
+    def leftmost(self, lo: int, minimo: int) -> int:
+        """Menor indice >= lo com valor >= 'minimo', ou -1."""
+        t, n = self._tree, self._n
+        if lo >= n:
+            return -1
+        i = lo + n
+        while True:
+            if t[i] >= minimo:
+                while i < n:
+                    i = 2 * i if t[2 * i] >= minimo else 2 * i + 1
+                return i - n
+            while i & 1:
+                i >>= 1
+            if i == 0:
+                return -1
+            i += 1
+
+    def rightmost(self, hi: int) -> int:
+        """Maior indice <= hi com valor > 0, ou -1."""
+        t, n = self._tree, self._n
+        if hi < 0:
+            return -1
+        i = min(hi, n - 1) + n
+        while True:
+            if t[i] > 0:
+                while i < n:
+                    i = 2 * i + 1 if t[2 * i + 1] > 0 else 2 * i
+                return i - n
+            while i > 1 and not i & 1:
+                i >>= 1
+            if i == 1:
+                return -1
+            i -= 1
+
+
+class _PorTamanho:
+    """
+    Extents livres agrupados por tamanho, para o best-fit.
+
+    Uma ArvoreMaximos indexada pelo tamanho conta quantos extents ha de cada
+    tamanho, entao o menor tamanho que cabe e uma descida na arvore. Os
+    offsets de cada tamanho ficam num heap com remocao preguicosa: a entrada
+    so e descartada quando chega ao topo e o extent ja nao tem aquele tamanho.
+    """
+
+    def __init__(self, extents: ArvoreMaximos, tamanho_max: int):
+        self._extents = extents
+        self._contagem = ArvoreMaximos(tamanho_max + 1)
+        self._offsets: Dict[int, List[int]] = {}
+
+    def troca(self, i: int, antigo: int, novo: int):
+        """O extent em 'i' passou de 'antigo' para 'novo' blocos (0 = nenhum)."""
+        contagem = self._contagem
+        if antigo:
+            contagem.set(antigo, contagem.get(antigo) - 1)
+        if novo:
+            vivos = contagem.get(novo) + 1
+            contagem.set(novo, vivos)
+            heap = self._offsets.setdefault(novo, [])
+            heappush(heap, i)
+            if len(heap) > 2 * vivos + 8:
+                # muitas entradas velhas: refaz o heap so com as validas
+                get = self._extents.get
+                heap[:] = sorted({o for o in heap if get(o) == novo})
+
+    def menor(self, size: int) -> int:
+        """Indice do menor extent com pelo menos 'size' blocos (empate: menor indice)."""
+        tamanho = self._contagem.leftmost(size, 1)
+        heap = self._offsets[tamanho]
+        get = self._extents.get
+        while get(heap[0]) != tamanho:
+            heappop(heap)
+        return heap[0]
+
+
+class FreeExtents:
+    """
+    Espaco livre de uma regiao [start, end) mantido como extents ordenados.
+
+    Cada folha da arvore guarda o tamanho do extent livre que comeca naquele
+    bloco (0 se nenhum comeca ali) e cada no interno guarda o maximo dos
+    filhos. Assim first-fit, busca de vizinhos e atualizacoes custam O(log n),
+    e os extents sao sempre coalescidos, o que mantem os mesmos offsets da
+    varredura bloco a bloco.
+
+    Com ordenar_por_tamanho=True os extents tambem sao indexados por tamanho
+    (_PorTamanho), e o best-fit custa O(log n) amortizado.
+    """
+
+    def __init__(self, start: int, end: int, livre: bool = True,
+                 ordenar_por_tamanho: bool = False):
+        self.start = start
+        self.end = end
+        self._arvore = ArvoreMaximos(end - start)
+        self._por_tamanho: Optional[_PorTamanho] = None
+        if ordenar_por_tamanho:
+            self._por_tamanho = _PorTamanho(self._arvore, end - start)
+        self.total_livre = 0
+        self.n_extents = 0
+        if livre and end > start:
+            self._set(0, end - start)
+            self.total_livre = end - start
+            self.n_extents = 1
+
+    def _set(self, i: int, valor: int):
+        if self._por_tamanho is None:
+            self._arvore.set(i, valor)
+            return
+        antigo = self._arvore.get(i)
+        self._arvore.set(i, valor)
+        self._por_tamanho.troca(i, antigo, valor)
+
+    def _get(self, i: int) -> int:
+        return self._arvore.get(i)
+
+    # ------------------------------
+    # Consultas
+    # ------------------------------
+    def largest(self) -> int:
+        """Tamanho do maior extent livre."""
+        return self._arvore.maximo()
+
+    def first_fit(self, size: int) -> Optional[int]:
+        """Offset do primeiro extent com pelo menos 'size' blocos."""
+        if size <= 0 or self._arvore.maximo() < size:
+            return None
+        return self._arvore.leftmost(0, size) + self.start
+
+    def best_fit(self, size: int) -> Optional[int]:
+        """Offset do menor extent com pelo menos 'size' blocos (empate: menor offset)."""
+        if size <= 0 or self._arvore.maximo() < size:
+            return None
+        if self._por_tamanho is None:
+            raise ValueError("best-fit exige ordenar_por_tamanho=True")
+        return self._por_tamanho.menor(size) + self.start
+
+    def worst_fit(self, size: int) -> Optional[int]:
+        """Offset do maior extent livre (empate: menor offset)."""
+        maior = self._arvore.maximo()
+        if size <= 0 or maior < size:
+            return None
+        return self._arvore.leftmost(0, maior) + self.start
+
+    def next_fit(self, size: int, desde: int) -> Optional[int]:
+        """Primeiro extent com 'size' blocos a partir de 'desde', dando a volta."""
+        if size <= 0 or self._arvore.maximo() < size:
+            return None
+        i = self._arvore.leftmost(max(desde - self.start, 0), size)
+        if i < 0:
+            i = self._arvore.leftmost(0, size)
+        return i + self.start
+
+    def containing(self, offset: int) -> Optional[Tuple[int, int]]:
+        """Extent livre (offset, tamanho) que contem o bloco 'offset'."""
+        i = self._arvore.rightmost(offset - self.start)
+        if i < 0:
+            return None
+        size = self._get(i)
+        if i + size <= offset - self.start:
+            return None
+        return i + self.start, size
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        """Percorre os extents livres (offset, tamanho) em ordem de offset."""
+        i = self._arvore.leftmost(0, 1)
+        while i >= 0:
+            size = self._get(i)
+            yield i + self.start, size
+            i = self._arvore.leftmost(i + size, 1)
+
+    # ------------------------------
+    # Atualizacoes
+    # ------------------------------
+    def take(self, offset: int, size: int) -> bool:
+        """Marca [offset, offset + size) como ocupado; falha se nao estiver livre."""
+        ext = self.containing(offset)
+        if ext is None or size <= 0 or offset + size > ext[0] + ext[1]:
+            return False
+        e_off, e_size = ext
+        rel = e_off - self.start
+        antes = offset - e_off
+        depois = e_off + e_size - (offset + size)
+        self._set(rel, antes)
+        if antes == 0:
+            self.n_extents -= 1
+        if depois > 0:
+            self._set(offset + size - self.start, depois)
+            self.n_extents += 1
+        self.total_livre -= size
+        return True
+
+    def occupy(self, offset: int, size: int):
+        """Marca como ocupada qualquer parte livre de [offset, offset + size)."""
+        fim = min(offset + size, self.end)
+        pos = max(offset, self.start)
+        while pos < fim:
+            ext = self.containing(pos)
+            if ext is not None:
+                self.take(pos, min(ext[0] + ext[1], fim) - pos)
+            i = self._arvore.leftmost(pos - self.start, 1)
+            if i < 0:
+                return
+            pos = i + self.start
+
+    def release(self, offset: int, size: int):
+        """Devolve [offset, offset + size) ao espaco livre, coalescendo vizinhos."""
+        rel = offset - self.start
+        fim = rel + size
+        if fim < self.end - self.start:
+            depois = self._get(fim)
+            if depois:
+                self._set(fim, 0)
+                size += depois
+                self.n_extents -= 1
+        anterior = self._arvore.rightmost(rel - 1)
+        if anterior >= 0 and anterior + self._get(anterior) == rel:
+            self._set(anterior, self._get(anterior) + size)
+        else:
+            self._set(rel, size)
+            self.n_extents += 1
+        self.total_livre += fim - rel
+
+    def allocate(self, size: int) -> Optional[int]:
+        """Aloca 'size' blocos contiguos (first-fit) e retorna o offset."""
+        offset = self.first_fit(size)
+        if offset is not None:
+            self.take(offset, size)
+        return offset
+
+    def free(self, offset: int, size: int):
+        self.release(offset, size)
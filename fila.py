@@ -1,37 +1,253 @@
 from processo import Processo
 from collections import deque
+import heapq
 from dataclasses import dataclass, field
-from typing import Deque, Dict, List, Optional
-
-USER_QUANTUM_MS: Dict[int, int] = {1: 6, 2: 5, 3: 4, 4: 3, 5: 2}
-MAX_QUEUE_SIZE = 100
+from typing import Deque, Dict, Iterator, List, Optional
+from configuracao import AGING_THRESHOLD_TICKS, MAX_QUEUE_SIZE
 
 class Fila:
-    def __init__(self, name: str, capacity: int = MAX_QUEUE_SIZE):
+    """
+    Fila de um nivel de prioridade, separada em tres partes:
+    - q: processos prontos (inicializacao concluida), em ordem FIFO;
+    - chegando: heap dos que ainda inicializam, pela espera em que ficam prontos;
+    - bloqueados: prontos esperando dispositivos (pid -> processo).
+    A capacidade vale para o total das tres. politica: aging pela politica
+    de escalonamento (None = Processo.age); subclasses mudam a ordem dos prontos.
+    """
+
+    def __init__(self, name: str, capacity: int = MAX_QUEUE_SIZE,
+                 limiar_aging: int = AGING_THRESHOLD_TICKS, politica=None):
         self.name = name
         self.capacity = capacity
+        self.limiar_aging = limiar_aging
+        self.politica = politica
         self.q: Deque[Processo] = deque()
+        self.chegando: List[tuple] = []
+        self.bloqueados: Dict[int, Processo] = {}
+        self._seq = 0
+        # Espera acumulada da fila; cada processo guarda o valor que ela
+        # tinha quando foi materializado pela ultima vez (marca_espera)
+        self.espera = 0
+        self.pico = 0  # maior tamanho ja atingido
 
-    def push(self, proc: Processo) -> bool:
-        if len(self.q) >= self.capacity:
+    def _materializa(self, proc: Processo) -> Processo:
+        """Aplica ao processo a espera acumulada desde sua marca."""
+        tempo = self.espera - proc.marca_espera
+        if tempo:
+            if proc.remaining_init != 0:
+                proc.tempo_user(tempo)
+            if self.politica is None:
+                proc.age(tempo, self.limiar_aging)
+            else:
+                self.politica.envelhece(proc, tempo, self.limiar_aging)
+            proc.marca_espera = self.espera
+        return proc
+
+    def push(self, proc: Processo, forca: bool = False) -> bool:
+        """False se a fila esta cheia; forca: insere mesmo assim (reinsercao de quem ja estava no nucleo)."""
+        if len(self) >= self.capacity and not forca:
             return False
-        self.q.append(proc)
+        proc.marca_espera = self.espera
+        if proc.remaining_init == 0:
+            self._pronto(proc)
+        else:
+            heapq.heappush(self.chegando, (self.espera + proc.remaining_init, self._seq, proc))
+            self._seq += 1
+        n = len(self)
+        if n > self.pico:
+            self.pico = n
         return True
 
+    def _pronto(self, proc: Processo):
+        self.q.append(proc)
+
+    def prontos(self) -> Iterator[Processo]:
+        """Prontos na ordem em que seriam retirados (sem aplicar a espera)."""
+        return iter(self.q)
+
     def pop(self) -> Optional[Processo]:
-        return self.q.popleft() if self.q else None
+        """Retira o proximo processo pronto (nunca um que ainda inicializa)."""
+        return self._materializa(self.q.popleft()) if self.q else None
 
     def peek(self) -> Optional[Processo]:
-        return self.q[0] if self.q else None
+        return self._materializa(self.q[0]) if self.q else None
+
+    def bloqueia(self, proc: Processo):
+        """Estaciona um processo pronto que nao obteve recursos."""
+        self.bloqueados[proc.pid] = proc
+
+    def desbloqueia(self, proc: Processo):
+        """Processo recebeu seus recursos: volta a frente da fila de prontos."""
+        del self.bloqueados[proc.pid]
+        self.q.appendleft(proc)
+
+    def retira_bloqueado(self, pid: int) -> Processo:
+        """Tira da fila um processo que esperava dispositivos (migracao para outra maquina)."""
+        return self._materializa(self.bloqueados.pop(pid))
+
+    def proxima_chegada(self) -> Optional[int]:
+        """Espera que falta ate o proximo processo ficar pronto (None: nenhum)."""
+        return self.chegando[0][0] - self.espera if self.chegando else None
 
     def incrementar_tempo_espera(self, tempo):
-        for proc in self.q:
-            if proc.remaining_init != 0:
-                proc.tempo_user(tempo)
-            proc.age(tempo)
+        """O(1): a espera so e aplicada quando o processo e retirado ou inspecionado."""
+        self.espera += tempo
+        chegando = self.chegando
+        while chegando and chegando[0][0] <= self.espera:
+            self._pronto(heapq.heappop(chegando)[2])
 
     def __len__(self):
-        return len(self.q)
+        return len(self.q) + len(self.chegando) + len(self.bloqueados)
 
     def __iter__(self):
-        return iter(self.q)
+        for proc in self.prontos():
+            yield self._materializa(proc)
+        for _, _, proc in sorted(self.chegando):
+            yield self._materializa(proc)
+        for proc in self.bloqueados.values():
+            yield self._materializa(proc)
+
+
+class FilaOrdenada(Fila):
+    """
+    Prontos retirados pela menor politica.chave(proc) (heap) em vez de FIFO;
+    empates na ordem de entrada. A chave e calculada na entrada.
+    """
+
+    def __init__(self, name: str, capacity: int, limiar_aging: int, politica):
+        super().__init__(name, capacity, limiar_aging, politica)
+        self.q: List[tuple] = []
+
+    def _pronto(self, proc: Processo):
+        heapq.heappush(self.q, (self.politica.chave(proc), self._seq, proc))
+        self._seq += 1
+
+    def prontos(self) -> Iterator[Processo]:
+        return (proc for _, _, proc in sorted(self.q))
+
+    def pop(self) -> Optional[Processo]:
+        return self._materializa(heapq.heappop(self.q)[2]) if self.q else None
+
+    def peek(self) -> Optional[Processo]:
+        return self._materializa(self.q[0][2]) if self.q else None
+
+    def desbloqueia(self, proc: Processo):
+        del self.bloqueados[proc.pid]
+        self._pronto(proc)
+
+
+class _Bilhetes:
+    """
+    Processos com pesos (bilhetes) numa arvore de Fenwick sobre posicoes em
+    ordem de entrada: entrada, saida e sorteio em O(log n). Posicoes nao sao
+    reaproveitadas; quando acabam, a arvore e refeita so com os presentes,
+    na mesma ordem.
+    """
+
+    def __init__(self):
+        self.procs: List[Optional[Processo]] = []
+        self.pesos: List[int] = []
+        self.arvore = [0] * 17
+        self.total = 0
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self) -> Iterator[Processo]:
+        return (proc for proc in self.procs if proc is not None)
+
+    def _soma(self, i: int, delta: int):
+        i += 1
+        arvore = self.arvore
+        while i < len(arvore):
+            arvore[i] += delta
+            i += i & -i
+
+    def _refaz(self):
+        vivos = [(p, w) for p, w in zip(self.procs, self.pesos) if p is not None]
+        self.procs = [p for p, _ in vivos]
+        self.pesos = [w for _, w in vivos]
+        self.arvore = [0] * (max(16, 2 * len(vivos)) + 1)
+        for i, w in enumerate(self.pesos):
+            self._soma(i, w)
+
+    def adiciona(self, proc: Processo, peso: int):
+        if len(self.procs) == len(self.arvore) - 1:
+            self._refaz()
+        self.procs.append(proc)
+        self.pesos.append(peso)
+        self._soma(len(self.procs) - 1, peso)
+        self.total += peso
+        self.n += 1
+
+    def _posicao(self, alvo: int) -> int:
+        """Posicao do dono do bilhete 'alvo' (0 <= alvo < total)."""
+        arvore = self.arvore
+        pos = 0
+        passo = 1 << (len(arvore) - 1).bit_length() - 1
+        while passo:
+            if pos + passo < len(arvore) and arvore[pos + passo] <= alvo:
+                pos += passo
+                alvo -= arvore[pos]
+            passo >>= 1
+        return pos
+
+    def dono(self, alvo: int) -> Processo:
+        return self.procs[self._posicao(alvo)]
+
+    def retira(self, alvo: int) -> Processo:
+        """Retira o dono do bilhete 'alvo' (0 <= alvo < total)."""
+        pos = self._posicao(alvo)
+        proc = self.procs[pos]
+        peso = self.pesos[pos]
+        self.procs[pos] = None
+        self.pesos[pos] = 0
+        self._soma(pos, -peso)
+        self.total -= peso
+        self.n -= 1
+        if self.n == 0:
+            # arvore toda zerada: recomeca do inicio
+            self.procs.clear()
+            self.pesos.clear()
+        return proc
+
+
+class FilaSorteio(Fila):
+    """
+    Prontos sorteados com peso politica.chave(proc), com o gerador da
+    politica. peek sorteia e guarda o bilhete, que o pop seguinte usa; uma
+    mudanca nos prontos descarta o sorteio guardado.
+    """
+
+    def __init__(self, name: str, capacity: int, limiar_aging: int, politica):
+        super().__init__(name, capacity, limiar_aging, politica)
+        self.q = _Bilhetes()
+        self._sorteado: Optional[int] = None
+
+    def _sorteia(self) -> int:
+        if self._sorteado is None:
+            self._sorteado = self.politica.rng.randrange(self.q.total)
+        return self._sorteado
+
+    def _pronto(self, proc: Processo):
+        self._sorteado = None
+        self.q.adiciona(proc, self.politica.chave(proc))
+
+    def pop(self) -> Optional[Processo]:
+        if not self.q:
+            return None
+        alvo = self._sorteia()
+        self._sorteado = None
+        return self._materializa(self.q.retira(alvo))
+
+    def peek(self) -> Optional[Processo]:
+        return self._materializa(self.q.dono(self._sorteia())) if self.q else None
+
+    def bloqueia(self, proc: Processo):
+        self._sorteado = None
+        super().bloqueia(proc)
+
+    def desbloqueia(self, proc: Processo):
+        del self.bloqueados[proc.pid]
+        self._pronto(proc)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import random
+import string
+import sys
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from memoria import RT_BLOCKS, TOTAL_BLOCKS
+
+CHEGADAS = ("uniforme", "poisson", "rajadas")
+
+
+@dataclass
+class Carga:
+    """Parametros de uma carga sintetica (mesma semente => mesmos arquivos)."""
+    n_processos: int = 1000
+    semente: int = 0
+    chegada: str = "poisson"          # ver CHEGADAS
+    taxa: float = 0.5                 # chegadas por tick (poisson e rajadas)
+    horizonte: int = 1000             # ultimo tempo_inicio (uniforme)
+    tam_rajada: int = 20              # processos por rajada
+    # peso de cada prioridade 0 (tempo real) .. 5
+    pesos_prioridade: List[float] = field(default_factory=lambda: [1, 1, 1, 1, 1, 1])
+    cpu: Tuple[int, int] = (1, 20)
+    mem_rt: Tuple[int, int] = (1, RT_BLOCKS // 2)
+    mem_usuario: Tuple[int, int] = (1, 200)
+    # probabilidade de cada processo de usuario pedir o dispositivo
+    p_impressora: float = 0.2
+    p_scanner: float = 0.2
+    p_modem: float = 0.2
+    p_sata: float = 0.2
+    # sistema de arquivos
+    blocos_disco: int = 1024
+    n_segmentos: int = 16
+    n_operacoes: int = 1000
+    tam_arquivo: Tuple[int, int] = (1, 16)
+
+    def __post_init__(self):
+        if self.chegada not in CHEGADAS:
+            raise ValueError(f"chegada desconhecida: {self.chegada}")
+        if self.mem_rt[1] > RT_BLOCKS or self.mem_usuario[1] > TOTAL_BLOCKS - RT_BLOCKS:
+            raise ValueError("pedido de memoria maior que a regiao")
+
+
+def gera_processos(carga: Carga) -> List[str]:
+    """Linhas no formato lido por ler_processos."""
+    r = random.Random(carga.semente)
+    linhas: List[str] = []
+    tempo = 0.0
+    for i in range(carga.n_processos):
+        if carga.chegada == "uniforme":
+            inicio = r.randint(0, carga.horizonte)
+        elif carga.chegada == "poisson":
+            tempo += r.expovariate(carga.taxa)
+            inicio = int(tempo)
+        else:
+            # rajadas de tam_rajada processos no mesmo instante
+            if i % carga.tam_rajada == 0 and i:
+                tempo += r.expovariate(carga.taxa / carga.tam_rajada)
+            inicio = int(tempo)
+        prioridade = r.choices(range(6), weights=carga.pesos_prioridade)[0]
+        cpu = r.randint(*carga.cpu)
+        if prioridade == 0:
+            # tempo real nao usa dispositivos
+            mem = r.randint(*carga.mem_rt)
+            impressora = scanner = modem = sata = 0
+        else:
+            mem = r.randint(*carga.mem_usuario)
+            impressora = r.randint(1, 2) if r.random() < carga.p_impressora else 0
+            scanner = int(r.random() < carga.p_scanner)
+            modem = int(r.random() < carga.p_modem)
+            sata = r.randint(1, 3) if r.random() < carga.p_sata else 0
+        linhas.append(f"{inicio}, {prioridade}, {cpu}, {mem}, {impressora}, {scanner}, {modem}, {sata}")
+    return linhas
+
+
+def gera_arquivos(carga: Carga) -> List[str]:
+    """Linhas no formato lido por Despachador.load_filesystem."""
+    r = random.Random(carga.semente + 1)
+    nomes = string.ascii_uppercase + string.ascii_lowercase
+    n_segmentos = min(carga.n_segmentos, len(nomes), carga.blocos_disco // 2)
+    # segmentos existentes sem sobreposicao, em posicoes sorteadas
+    inicios = sorted(r.sample(range(0, carga.blocos_disco, 2), n_segmentos))
+    segmentos: List[str] = []
+    existentes: List[str] = []
+    for k, inicio in enumerate(inicios):
+        limite = inicios[k + 1] if k + 1 < len(inicios) else carga.blocos_disco
+        tam = r.randint(1, max(1, min(limite - inicio, carga.tam_arquivo[1])))
+        nome = nomes[k]
+        segmentos.append(f"{nome}, {inicio}, {tam}")
+        existentes.append(nome)
+
+    operacoes: List[str] = []
+    for _ in range(carga.n_operacoes):
+        # alguns pids inexistentes de proposito
+        pid = r.randint(0, carga.n_processos)
+        if existentes and r.random() < 0.4:
+            operacoes.append(f"{pid}, 1, {r.choice(existentes)}")
+        else:
+            nome = r.choice(nomes)
+            operacoes.append(f"{pid}, 0, {nome}, {r.randint(*carga.tam_arquivo)}")
+            existentes.append(nome)
+    return [str(carga.blocos_disco), str(len(segmentos))] + segmentos + operacoes
+
+
+def grava(carga: Carga, arq_processos: str, arq_arquivos: str):
+    with open(arq_processos, "w") as f:
+        f.write("\n".join(gera_processos(carga)) + "\n")
+    with open(arq_arquivos, "w") as f:
+        f.write("\n".join(gera_arquivos(carga)) + "\n")
+
+
+if __name__ == "__main__":
+    # uso: python gerador.py <n_processos> <semente> <chegada> <processos.txt> <files.txt>
+    if len(sys.argv) != 6:
+        sys.exit("uso: python gerador.py <n_processos> <semente> <chegada> <processos.txt> <files.txt>")
+    n, semente, chegada, arq_p, arq_a = sys.argv[1:]
+    grava(Carga(n_processos=int(n), semente=int(semente), chegada=chegada), arq_p, arq_a)
@@ -1,36 +1,118 @@
 # main.py
-import time
+import sys
 import threading
+from typing import Optional
 from despachador import Despachador
 from recursos import Recursos
-from dados import dados_processos
 from escalonador import Escalonador
 from memoria import MemoryManager
 from arquivos import FileManager
+from simulador import Simulador, SimuladorMultinucleo
+import cluster
+from saida import MODOS, Saida
+from metricas import Metricas
+from configuracao import Configuracao
+from politicas import ESCALONAMENTOS
+from snapshot import carrega, salva
 
-def main():
-    # Arquivos padro para debug
-    process_file = "processes.txt"
-    fileops_file = "files.txt"
+def main(eventos: bool = False, modo_saida: str = "texto", metricas: Optional[str] = None,
+         nucleos: int = 1, ate: Optional[int] = None, snapshot: Optional[str] = None,
+         retoma: Optional[str] = None, process_file: str = "processes.txt",
+         fileops_file: str = "files.txt", compactar: bool = False, politica: str = "mlfq",
+         limite_prontos: Optional[int] = None, nos: int = 1, migracao: bool = True):
+    # Arquivos padrão para debug; texto, binario ou JSONL (ver entrada.py)
 
-    recursos = Recursos()
-    memoria = MemoryManager()
-    escalanador = Escalonador(memoria, recursos)
+    saida = Saida(modo_saida)
+    simulador = None
+    if retoma:
+        # continua uma simulacao salva (com os arquivos de entrada do snapshot)
+        simulador = carrega(retoma, saida)
+        escalanador = simulador.escalonador
+        coleta = escalanador.metricas
+    else:
+        coleta = Metricas() if metricas else None
+        config = Configuracao(politica=politica, limite_prontos=limite_prontos)
+        if nos > 1:
+            # cluster (simulacao por eventos): 'nucleos' por no, memoria e dispositivos por no
+            simulador = cluster.monta(nos, nucleos, config, saida, coleta, process_file, fileops_file,
+                                      compactar=compactar, migracao=migracao)
+            escalanador = simulador.escalonador
+        else:
+            recursos = Recursos()
+            memoria = MemoryManager(compactar=compactar)
+            escalanador = Escalonador(memoria, recursos, saida, coleta, config)
 
-    # passa o escalonador para o dispatcher
-    dispatcher = Despachador(escalanador, memoria, process_file, fileops_file)
+            # passa o escalonador para o dispatcher
+            dispatcher = Despachador(escalanador, memoria, process_file, fileops_file)
 
-    # cria uma thread para rodar o escalonador
-    t_escalonador = threading.Thread(target=escalanador.main, daemon=True)
-    t_escalonador.start()
+            if nucleos > 1:
+                # varios nucleos (so na simulacao por eventos), memoria e recursos compartilhados
+                dispatcher.load_processes()
+                dispatcher.load_filesystem()
+                outros = [Escalonador(memoria, recursos, saida, coleta, config) for _ in range(nucleos - 1)]
+                simulador = SimuladorMultinucleo([escalanador] + outros, dispatcher)
+            elif eventos or ate is not None or snapshot:
+                # simulacao por eventos discretos, sem threads
+                dispatcher.load_processes()
+                dispatcher.load_filesystem()
+                simulador = Simulador(escalanador, dispatcher)
+            else:
+                # cria uma thread para rodar o escalonador
+                t_escalonador = threading.Thread(target=escalanador.main, daemon=True)
+                t_escalonador.start()
 
-    dispatcher.load_processes()
-    dispatcher.load_filesystem()
-    dispatcher.criar_processo()
+                dispatcher.load_processes()
+                dispatcher.load_filesystem()
+                # admite todos os processos e bloqueia ate o escalonador terminar
+                dispatcher.criar_processo()
+                t_escalonador.join()
 
-    while dispatcher.has_pending() or escalanador.has_ready():
-        dispatcher.criar_processo()
-        time.sleep(0.1)  # pequeno intervalo para no travar a CPU
+    # com --ate a simulacao pausa nesse instante e pode ser salva com --snapshot
+    if simulador is not None and not simulador.executar(ate) and snapshot:
+        salva(simulador, snapshot)
+
+    if metricas and coleta is not None:
+        # no cluster o resumo por no sai no relatorio do simulador
+        coleta.exporta(metricas, None if nos > 1 else escalanador)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # --saida=texto|resumo|jsonl|silencioso, --metricas=<prefixo dos arquivos>,
+    # --nucleos=N, --ate=<tick> --snapshot=<arquivo>, --retoma=<arquivo>
+    # --processos=<arquivo>, --arquivos=<arquivo>, --compactar (memoria e disco),
+    # --politica=mlfq|srt|cfs|stride|loteria, --limite-prontos=N (controle de admissao)
+    # --nos=N (cluster, com --nucleos por no), --sem-migracao
+    # (todos menos --saida, --metricas, --processos e --arquivos implicam --eventos)
+    modo_saida = "texto"
+    opcoes = {}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--metricas="):
+            opcoes["metricas"] = arg.split("=", 1)[1]
+        elif arg.startswith("--nucleos="):
+            opcoes["nucleos"] = int(arg.split("=", 1)[1])
+        elif arg.startswith("--ate="):
+            opcoes["ate"] = int(arg.split("=", 1)[1])
+        elif arg.startswith("--snapshot="):
+            opcoes["snapshot"] = arg.split("=", 1)[1]
+        elif arg.startswith("--retoma="):
+            opcoes["retoma"] = arg.split("=", 1)[1]
+        elif arg.startswith("--processos="):
+            opcoes["process_file"] = arg.split("=", 1)[1]
+        elif arg.startswith("--arquivos="):
+            opcoes["fileops_file"] = arg.split("=", 1)[1]
+        elif arg.startswith("--politica="):
+            opcoes["politica"] = arg.split("=", 1)[1]
+            if opcoes["politica"] not in ESCALONAMENTOS:
+                sys.exit(f"politica desconhecida: {opcoes['politica']} (use {', '.join(ESCALONAMENTOS)})")
+        elif arg.startswith("--nos="):
+            opcoes["nos"] = int(arg.split("=", 1)[1])
+        elif arg.startswith("--limite-prontos="):
+            opcoes["limite_prontos"] = int(arg.split("=", 1)[1])
+        elif arg.startswith("--saida="):
+            modo_saida = arg.split("=", 1)[1]
+            if modo_saida not in MODOS:
+                sys.exit(f"modo de saida desconhecido: {modo_saida} (use {', '.join(MODOS)})")
+    if opcoes.get("nos", 1) > 1 and ("snapshot" in opcoes or "retoma" in opcoes):
+        sys.exit("--snapshot e --retoma nao funcionam com --nos")
+    main(eventos="--eventos" in sys.argv[1:], modo_saida=modo_saida,
+         compactar="--compactar" in sys.argv[1:], migracao="--sem-migracao" not in sys.argv[1:],
+         **opcoes)
\ No newline at end of file
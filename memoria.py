@@ -1,31 +1,33 @@
 
 # -*- coding: utf-8 -*-
-from typing import List, Optional
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from compactacao import planeja
+from extents import FreeExtents
+from buddy import BuddyAllocator
+from blocos import BlockMap
+from ocupacao import MapaOcupacao
+from configuracao import RT_BLOCKS, TOTAL_BLOCKS
 
-TOTAL_BLOCKS = 1024
-RT_BLOCKS = 64
 USER_BLOCKS = TOTAL_BLOCKS - RT_BLOCKS
 
-class MemoryManager:
-    def __init__(self):
-        # Representa cada bloco da memoria
-        self.blocks: List[Optional[int]] = [None] * TOTAL_BLOCKS
+ALOCADORES = ("linear", "extents", "buddy", "bitmap")
 
-    def allocate(self, pid: int, size: int, is_real_time: int) -> Optional[int]:
-        """
-        Aloca 'size' blocos contiguos para o processo 'pid'.
-        Retorna o offset inicial ou None se nao couber.
-        """
-        if is_real_time == 0:
-            start, end = 0, RT_BLOCKS
-        else:
-            start, end = RT_BLOCKS, TOTAL_BLOCKS
 
+class _RegiaoLinear:
+    """Regiao [start, end) com a busca contigua bloco a bloco original."""
+
+    def __init__(self, start: int, end: int):
+        self.start = start
+        self.end = end
+        self.ocupado: List[bool] = [False] * (end - start)
+
+    def allocate(self, size: int) -> Optional[int]:
         # busca contigua (first-fit)
         free_count = 0
         offset = None
-        for i in range(start, end):
-            if self.blocks[i] is None:
+        for i in range(self.end - self.start):
+            if not self.ocupado[i]:
                 free_count += 1
                 if free_count == size:
                     offset = i - size + 1
@@ -36,13 +38,245 @@ class MemoryManager:
         if offset is None:
             return None  # nao coube
 
-        # marca blocos como ocupados pelo pid
         for j in range(offset, offset + size):
-            self.blocks[j] = pid
+            self.ocupado[j] = True
+        return offset + self.start
+
+    def occupy(self, offset: int, size: int):
+        for j in range(offset - self.start, offset - self.start + size):
+            self.ocupado[j] = True
+
+    def free(self, offset: int, size: int):
+        for j in range(offset - self.start, offset - self.start + size):
+            self.ocupado[j] = False
+
+    @property
+    def total_livre(self) -> int:
+        return self.ocupado.count(False)
+
+    def largest(self) -> int:
+        maior = atual = 0
+        for ocupado in self.ocupado:
+            atual = 0 if ocupado else atual + 1
+            maior = max(maior, atual)
+        return maior
+
+
+class _RegiaoBitmap:
+    """Regiao [start, end) sobre um BlockMap compartilhado."""
+
+    def __init__(self, mapa: BlockMap, start: int, end: int):
+        self.mapa = mapa
+        self.start = start
+        self.end = end
+
+    def allocate(self, size: int, dono: Optional[int] = None) -> Optional[int]:
+        offset = self.mapa.find_run(size, self.start, self.end)
+        if offset is not None:
+            self.mapa.mark(offset, size, dono)
+        return offset
+
+    def occupy(self, offset: int, size: int, dono: Optional[int] = None):
+        self.mapa.mark(offset, size, dono)
+
+    def free(self, offset: int, size: int):
+        self.mapa.clear(offset, size)
+
+    @property
+    def total_livre(self) -> int:
+        return self.mapa.count_free(self.start, self.end)
+
+    def largest(self) -> int:
+        return self.mapa.largest_run(self.start, self.end)
+
+
+def _nova_regiao(alocador: str, start: int, end: int, mapa: BlockMap):
+    if alocador == "linear":
+        return _RegiaoLinear(start, end)
+    if alocador == "extents":
+        return FreeExtents(start, end)
+    if alocador == "buddy":
+        return BuddyAllocator(start, end)
+    if alocador == "bitmap":
+        return _RegiaoBitmap(mapa, start, end)
+    raise ValueError(f"alocador desconhecido: {alocador}")
+
+
+class MemoryManager:
+    def __init__(self, alocador: str = "extents", alocador_rt: Optional[str] = None,
+                 total_blocks: int = TOTAL_BLOCKS, rt_blocks: int = RT_BLOCKS,
+                 compactar: bool = False):
+        """
+        alocador: politica da regiao de usuario ("linear", "extents", "buddy"
+                  ou "bitmap").
+        alocador_rt: politica da regiao de tempo real (padrao: a mesma).
+        total_blocks/rt_blocks: tamanho da memoria e da regiao de tempo real.
+        compactar: quando o pedido nao cabe contiguo mas ha blocos livres
+                   suficientes, desliza processos para abrir espaco (nao se
+                   aplica ao buddy, cujos blocos tem posicao fixa).
+        """
+        self.alocador = alocador
+        self.alocador_rt = alocador_rt or alocador
+        self.total_blocks = total_blocks
+        self.rt_blocks = rt_blocks
+        self.capacidade = (rt_blocks, total_blocks - rt_blocks)
+        # Mapa de ocupacao + donos, usado pelas regioes "bitmap"
+        self.mapa: Optional[BlockMap] = None
+        if "bitmap" in (alocador, self.alocador_rt):
+            self.mapa = BlockMap(total_blocks)
+        # Regiao 0: tempo real, regiao 1: usuario
+        self.regioes = (_nova_regiao(self.alocador_rt, 0, rt_blocks, self.mapa),
+                        _nova_regiao(alocador, rt_blocks, total_blocks, self.mapa))
+        # Mapeia pid -> (offset, tamanho)
+        self.owners: Dict[int, Tuple[int, int]] = {}
+        # Mapa por trechos (pid de cada alocacao), com historico de versoes
+        self.ocupacao = MapaOcupacao(total_blocks)
+        # Contadores por regiao
+        self.alocacoes = [0, 0]
+        self.falhas = [0, 0]
+        # Blocos ocupados agora e no pico
+        self.ocupados = [0, 0]
+        self.pico = [0, 0]
+        # Incrementado a cada free que devolve blocos (quem espera memoria
+        # so precisa tentar de novo quando ele muda)
+        self.liberacoes = 0
+        self.compactar = compactar
+        # Chamado com (pid, novo offset) para cada processo movido
+        self.ao_mover: Optional[Callable[[int, int], None]] = None
+        self.compactacoes = [0, 0]
+        self.blocos_movidos = [0, 0]
+        self.tempo_compactacao = [0.0, 0.0]
+
+    def allocate(self, pid: int, size: int, is_real_time: int) -> Optional[int]:
+        """
+        Aloca 'size' blocos contiguos para o processo 'pid'.
+        Retorna o offset inicial ou None se nao couber.
+        """
+        r = 0 if is_real_time == 0 else 1
+        offset = self._aloca(r, size, pid)
+        if offset is None and self._compactavel(r, size) and self._compacta(r, size):
+            offset = self._aloca(r, size, pid)
+        if offset is None:
+            self.falhas[r] += 1
+            return None  # nao coube
+        self.alocacoes[r] += 1
+        self.ocupados[r] += size
+        if self.ocupados[r] > self.pico[r]:
+            self.pico[r] = self.ocupados[r]
+        self.owners[pid] = (offset, size)
+        self.ocupacao.marca(offset, size, pid)
         return offset
 
+    def _aloca(self, r: int, size: int, pid: int) -> Optional[int]:
+        regiao = self.regioes[r]
+        if isinstance(regiao, _RegiaoBitmap):
+            # o mapa e compartilhado: ja marca a ocupacao com o dono
+            return regiao.allocate(size, pid)
+        return regiao.allocate(size)
+
+    def _ocupa(self, r: int, offset: int, size: int, pid: int):
+        """Marca [offset, offset + size) como de 'pid' (compactacao e snapshot)."""
+        regiao = self.regioes[r]
+        if isinstance(regiao, _RegiaoBitmap):
+            regiao.occupy(offset, size, pid)
+        else:
+            regiao.occupy(offset, size)
+
     def free(self, pid: int):
         """Libera todos os blocos ocupados pelo processo 'pid'."""
-        for i in range(TOTAL_BLOCKS):
-            if self.blocks[i] == pid:
-                self.blocks[i] = None
+        alocado = self.owners.pop(pid, None)
+        if alocado is None:
+            return
+        offset, size = alocado
+        r = 0 if offset < self.rt_blocks else 1
+        self.regioes[r].free(offset, size)
+        self.ocupacao.limpa(offset, size)
+        self.ocupados[r] -= size
+        self.liberacoes += 1
+
+    def maior_livre(self, is_real_time: int) -> int:
+        """Maior alocacao que ainda cabe na regiao (0 = tempo real)."""
+        r = 0 if is_real_time == 0 else 1
+        if self._compactavel(r, 1):
+            return self.regioes[r].total_livre
+        return self.regioes[r].largest()
+
+    def livre_sem(self, pid: int) -> int:
+        """Maior alocacao que caberia na regiao do processo 'pid' se ele saisse dela."""
+        offset, size = self.owners[pid]
+        r = 0 if offset < self.rt_blocks else 1
+        regiao = self.regioes[r]
+        if isinstance(regiao, BuddyAllocator):
+            # o bloco so se junta com o par: nao da para saber sem liberar
+            return regiao.largest()
+        if self.compactar:
+            return regiao.total_livre + size
+        return max(regiao.largest(), self.ocupacao.buraco(offset, regiao.start, regiao.end))
+
+    # ------------------------------
+    # Compactacao
+    # ------------------------------
+    def _compactavel(self, r: int, size: int) -> bool:
+        return (self.compactar and not isinstance(self.regioes[r], BuddyAllocator)
+                and self.regioes[r].total_livre >= size)
+
+    def _compacta(self, r: int, size: int) -> bool:
+        """Move o minimo de processos da regiao para abrir 'size' blocos contiguos."""
+        inicio_t = time.perf_counter()
+        regiao = self.regioes[r]
+        moveis = [(offset, tam, pid) for pid, (offset, tam) in self.owners.items()
+                  if regiao.start <= offset < regiao.end]
+        plano = planeja(moveis, (), regiao.start, regiao.end, size)
+        if plano is None:
+            self.tempo_compactacao[r] += time.perf_counter() - inicio_t
+            return False
+        for pid, antigo, novo, tam in plano:
+            regiao.free(antigo, tam)
+            self._ocupa(r, novo, tam, pid)
+            self.ocupacao.limpa(antigo, tam)
+            self.ocupacao.marca(novo, tam, pid)
+            self.owners[pid] = (novo, tam)
+            self.blocos_movidos[r] += tam
+            if self.ao_mover is not None:
+                self.ao_mover(pid, novo)
+        self.compactacoes[r] += 1
+        self.tempo_compactacao[r] += time.perf_counter() - inicio_t
+        return True
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Estatisticas de fragmentacao e admissao por regiao."""
+        resultado = {}
+        for r, nome in enumerate(("rt", "user")):
+            regiao = self.regioes[r]
+            livre = regiao.total_livre
+            maior = regiao.largest()
+            resultado[nome] = {
+                "alocador": self.alocador_rt if r == 0 else self.alocador,
+                "alocacoes": self.alocacoes[r],
+                "falhas": self.falhas[r],
+                "livre": livre,
+                "maior_livre": maior,
+                # 0 = todo o espaco livre e contiguo, ->1 = muito fragmentado
+                "fragmentacao_externa": 1 - maior / livre if livre else 0.0,
+                "fragmentacao_interna": getattr(regiao, "desperdicio", 0),
+                "compactacoes": self.compactacoes[r],
+                "blocos_movidos": self.blocos_movidos[r],
+                "tempo_compactacao_s": self.tempo_compactacao[r],
+            }
+        return resultado
+
+    def mapa_trechos(self) -> List[tuple]:
+        """Memoria em trechos (offset, tamanho, pid ou None = livre)."""
+        return list(self.ocupacao.trechos())
+
+    def mudancas(self, desde: int) -> tuple:
+        """(versao, trechos alterados desde a versao 'desde'), ver MapaOcupacao.mudancas."""
+        return self.ocupacao.mudancas(desde)
+
+    @property
+    def blocks(self) -> List[Optional[int]]:
+        """Visao bloco a bloco (pid ou None), apenas para depuracao."""
+        blocks: List[Optional[int]] = [None] * self.total_blocks
+        for pid, (offset, size) in self.owners.items():
+            blocks[offset:offset + size] = [pid] * size
+        return blocks
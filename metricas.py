@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+from array import array
+from typing import Dict, List
+
+from memoria import RT_BLOCKS, USER_BLOCKS
+
+
+def _percentil(valores: List[int], p: int):
+    if not valores:
+        return None
+    valores.sort()
+    return valores[min(len(valores) - 1, len(valores) * p // 100)]
+
+
+class Metricas:
+    """
+    Coleta de metricas do escalonamento, para exportar no fim da execucao.
+
+    Por processo guarda, em arrays indexados pelo pid, os ticks de chegada
+    ao escalonador, do primeiro despacho e da conclusao (-1 = ainda nao
+    aconteceu). Filas, memoria e dispositivos sao integrados no tempo a cada
+    avanco do relogio (tamanho x ticks), e a cada 'intervalo' ticks uma
+    amostra do tamanho das filas e da memoria ocupada vai para a serie.
+    """
+
+    def __init__(self, intervalo: int = 100):
+        self.intervalo = intervalo
+        self.prioridade = array("b")
+        self.cpu = array("q")
+        self.chegada = array("q")
+        self.primeira = array("q")
+        self.conclusao = array("q")
+        self.tempo = 0
+        self.area_filas = [0] * 6
+        self.area_memoria = [0, 0]
+        self.ocupado: Dict[str, int] = {}
+        self.bloqueado: Dict[str, int] = {}
+        # (tick, tamanho dos niveis 0..5, blocos ocupados rt, usuario)
+        self.serie: List[tuple] = []
+        self._proxima_amostra = 0
+        self.capacidade_memoria = (RT_BLOCKS, USER_BLOCKS)
+
+    # ------------------------------
+    # Eventos por processo
+    # ------------------------------
+    def _garante(self, pid: int):
+        falta = pid + 1 - len(self.chegada)
+        if falta > 0:
+            for coluna in (self.cpu, self.chegada, self.primeira, self.conclusao):
+                coluna.extend(array("q", [-1]) * falta)
+            self.prioridade.extend(array("b", [-1]) * falta)
+
+    def chegou(self, proc, tick: int):
+        self._garante(proc.pid)
+        self.prioridade[proc.pid] = proc.init_priority
+        self.cpu[proc.pid] = proc.cpu_time
+        self.chegada[proc.pid] = tick
+
+    def despachou(self, proc, tick: int):
+        if self.primeira[proc.pid] < 0:
+            self.primeira[proc.pid] = tick
+
+    def concluiu(self, proc, tick: int):
+        self.conclusao[proc.pid] = tick
+
+    # ------------------------------
+    # Integracao no tempo
+    # ------------------------------
+    def avanca(self, tamanhos: List[int], memoria, recursos, inicio: int, ticks: int):
+        """
+        Acumula por 'ticks' a partir do tick 'inicio' o estado atual: o
+        tamanho de cada nivel de fila (0..5), a memoria e os dispositivos.
+        """
+        if ticks <= 0:
+            return
+        area = self.area_filas
+        for nivel, n in enumerate(tamanhos):
+            if n:
+                area[nivel] += n * ticks
+        ocupados = memoria.ocupados
+        self.capacidade_memoria = memoria.capacidade
+        self.area_memoria[0] += ocupados[0] * ticks
+        self.area_memoria[1] += ocupados[1] * ticks
+        if recursos is not None:
+            self.dispositivos(recursos, ticks)
+
+        self.tempo = inicio + ticks
+        if self.tempo > self._proxima_amostra:
+            self.serie.append((inicio,) + tuple(tamanhos) + (ocupados[0], ocupados[1]))
+            self._proxima_amostra = (self.tempo // self.intervalo + 1) * self.intervalo
+
+    def dispositivos(self, recursos, ticks: int, prefixo: str = ""):
+        """Acumula por 'ticks' o uso e a espera de cada dispositivo (nome com 'prefixo')."""
+        if recursos.em_uso or recursos.pedidos:
+            for dev, espera in recursos.espera.items():
+                nome = f"{prefixo}{dev[0]}{dev[1]}"
+                if recursos._dono(dev) is not None:
+                    self.ocupado[nome] = self.ocupado.get(nome, 0) + ticks
+                if espera:
+                    self.bloqueado[nome] = self.bloqueado.get(nome, 0) + len(espera) * ticks
+
+    # ------------------------------
+    # Exportacao
+    # ------------------------------
+    def processos(self):
+        """(pid, prioridade, cpu, chegada, primeira, conclusao, turnaround, espera, resposta)."""
+        for pid in range(len(self.chegada)):
+            chegada = self.chegada[pid]
+            if chegada < 0:
+                continue
+            primeira, conclusao = self.primeira[pid], self.conclusao[pid]
+            resposta = primeira - chegada if primeira >= 0 else None
+            if conclusao >= 0:
+                turnaround = conclusao - chegada
+                espera = turnaround - self.cpu[pid]
+            else:
+                turnaround = espera = None
+            yield (pid, self.prioridade[pid], self.cpu[pid], chegada, primeira, conclusao,
+                   turnaround, espera, resposta)
+
+    def resumo(self, escalonador=None) -> Dict[str, object]:
+        n = concluidos = 0
+        soma_turnaround = soma_espera = soma_resposta = respondidos = 0
+        turnarounds: List[int] = []
+        respostas: List[int] = []
+        for _, _, _, _, _, _, turnaround, espera, resposta in self.processos():
+            n += 1
+            if resposta is not None:
+                respondidos += 1
+                soma_resposta += resposta
+                respostas.append(resposta)
+            if turnaround is not None:
+                concluidos += 1
+                soma_turnaround += turnaround
+                soma_espera += espera
+                turnarounds.append(turnaround)
+        tempo = self.tempo or 1
+        resultado: Dict[str, object] = {
+            "ticks": self.tempo,
+            "processos": n,
+            "concluidos": concluidos,
+            "turnaround_medio": soma_turnaround / concluidos if concluidos else None,
+            "espera_media": soma_espera / concluidos if concluidos else None,
+            "resposta_media": soma_resposta / respondidos if respondidos else None,
+            # cauda, para comparar politicas de escalonamento
+            "turnaround_p99": _percentil(turnarounds, 99),
+            "resposta_p99": _percentil(respostas, 99),
+            "fila_media": {f"nivel{k}": a / tempo for k, a in enumerate(self.area_filas)},
+            "memoria_utilizacao": {"rt": self.area_memoria[0] / (tempo * self.capacidade_memoria[0]),
+                                   "user": self.area_memoria[1] / (tempo * self.capacidade_memoria[1])},
+            "dispositivo_ocupado": {d: t / tempo for d, t in self.ocupado.items()},
+            "dispositivo_bloqueado_ticks": dict(self.bloqueado),
+        }
+        if escalonador is not None:
+            # com varios nucleos, o pico de cada nivel e o do nucleo mais cheio
+            nucleos = escalonador.nucleos
+            resultado["fila_pico"] = {f"nivel{k}": max(n.niveis[k].pico for n in nucleos)
+                                      for k in range(6)}
+            resultado["memoria_pico"] = {"rt": escalonador.memoria.pico[0],
+                                         "user": escalonador.memoria.pico[1]}
+            # fila cheia: chegadas que esperaram vaga e admissoes seguradas
+            resultado["transbordos"] = sum(n.transbordos for n in nucleos)
+            resultado["contencoes"] = sum(n.contencoes for n in nucleos)
+        return resultado
+
+    def exporta(self, prefixo: str, escalonador=None):
+        """Grava <prefixo>_processos.csv, <prefixo>_serie.csv e <prefixo>.json."""
+        with open(f"{prefixo}_processos.csv", "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(("pid", "prioridade", "cpu", "chegada", "primeira_execucao", "conclusao",
+                        "turnaround", "espera", "resposta"))
+            w.writerows(self.processos())
+        with open(f"{prefixo}_serie.csv", "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(("tick",) + tuple(f"nivel{k}" for k in range(6)) + ("mem_rt", "mem_user"))
+            w.writerows(self.serie)
+        with open(f"{prefixo}.json", "w") as f:
+            json.dump(self.resumo(escalonador), f, indent=2)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+
+from extents import ArvoreMaximos
+
+HISTORICO = 4096
+
+
+class MapaOcupacao:
+    """
+    Ocupacao de [0, total) em trechos (run-length): um trecho (offset,
+    tamanho, dono) por alocacao, em ordem de offset, atualizado a cada
+    marca/limpa em vez de um valor por bloco. Os inicios dos trechos ficam
+    numa ArvoreMaximos (folha = tamanho do trecho que comeca ali), entao
+    marca/limpa e achar o trecho seguinte ou anterior custam O(log n).
+
+    Cada mudanca incrementa 'versao' e guarda o intervalo alterado num
+    historico das ultimas 'historico' mudancas; mudancas(desde) devolve so
+    os trechos atuais desses intervalos, para quem consulta o mapa com
+    frequencia nao precisar percorrer tudo.
+    """
+
+    def __init__(self, total: int, historico: int = HISTORICO):
+        self.total = total
+        self.historico = historico
+        self._inicios = ArvoreMaximos(total)
+        self._trechos: Dict[int, Tuple[int, Hashable]] = {}
+        self.versao = 0
+        # (offset, tamanho) de cada mudanca; a ultima e a da versao atual
+        self._log: List[Tuple[int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._trechos)
+
+    def _muda(self, offset: int, tamanho: int):
+        self.versao += 1
+        self._log.append((offset, tamanho))
+        if len(self._log) >= 2 * self.historico:
+            del self._log[:-self.historico]
+
+    def marca(self, offset: int, tamanho: int, dono: Hashable):
+        self._inicios.set(offset, tamanho)
+        self._trechos[offset] = (tamanho, dono)
+        self._muda(offset, tamanho)
+
+    def limpa(self, offset: int, tamanho: int):
+        """Libera o trecho marcado em 'offset' (sempre uma alocacao inteira)."""
+        del self._trechos[offset]
+        self._inicios.set(offset, 0)
+        self._muda(offset, tamanho)
+
+    def esquece(self):
+        """Descarta o historico: quem tinha uma versao anterior rele o mapa todo."""
+        self._log.clear()
+
+    def buraco(self, offset: int, inicio: int, fim: int) -> int:
+        """Espaco livre contiguo em [inicio, fim) que o trecho em 'offset' deixaria ao ser limpo."""
+        inicios = self._inicios
+        antes = inicio
+        anterior = inicios.rightmost(offset - 1)
+        if anterior >= 0:
+            antes = max(antes, anterior + self._trechos[anterior][0])
+        depois = inicios.leftmost(offset + 1, 1)
+        return min(depois if depois >= 0 else fim, fim) - antes
+
+    def _corta(self, inicio: int, fim: int) -> Iterator[Tuple[int, int, Optional[Hashable]]]:
+        """Trechos de [inicio, fim), com os livres (dono None) e vizinhos do mesmo dono unidos."""
+        inicios, trechos = self._inicios, self._trechos
+        # i: inicio do primeiro trecho que ainda nao acabou em 'inicio' (-1: nenhum)
+        i = inicios.rightmost(inicio)
+        if i < 0 or i + trechos[i][0] <= inicio:
+            i = inicios.leftmost(inicio, 1)
+        pos, dono_atual, inicio_atual = inicio, None, inicio
+        while pos < fim:
+            if 0 <= i <= pos:
+                tamanho, dono = trechos[i]
+                proximo = min(i + tamanho, fim)
+                i = inicios.leftmost(i + 1, 1)
+            else:
+                dono = None
+                proximo = min(i, fim) if i >= 0 else fim
+            if dono != dono_atual:
+                if pos > inicio_atual:
+                    yield (inicio_atual, pos - inicio_atual, dono_atual)
+                dono_atual, inicio_atual = dono, pos
+            pos = proximo
+        if pos > inicio_atual:
+            yield (inicio_atual, pos - inicio_atual, dono_atual)
+
+    def alocacoes(self) -> Iterator[Tuple[int, int, Hashable]]:
+        """Os trechos marcados, um por alocacao (sem unir vizinhos), em ordem de offset."""
+        inicios, trechos = self._inicios, self._trechos
+        offset = inicios.leftmost(0, 1)
+        while offset >= 0:
+            tamanho, dono = trechos[offset]
+            yield (offset, tamanho, dono)
+            offset = inicios.leftmost(offset + 1, 1)
+
+    def trechos(self) -> Iterator[Tuple[int, int, Optional[Hashable]]]:
+        """O mapa inteiro como (offset, tamanho, dono), dono None = livre."""
+        return self._corta(0, self.total)
+
+    def mudancas(self, desde: int) -> Tuple[int, Optional[List[Tuple[int, int, Optional[Hashable]]]]]:
+        """
+        (versao atual, trechos atuais dos intervalos alterados depois da
+        versao 'desde'); None no lugar dos trechos se o historico ja nao
+        cobre 'desde' (releia trechos()).
+        """
+        n = self.versao - desde
+        if n < 0 or n > len(self._log):
+            return self.versao, None
+        intervalos = sorted((o, o + t) for o, t in self._log[len(self._log) - n:])
+        resultado: List[Tuple[int, int, Optional[Hashable]]] = []
+        k = 0
+        while k < len(intervalos):
+            inicio, fim = intervalos[k]
+            k += 1
+            while k < len(intervalos) and intervalos[k][0] <= fim:
+                fim = max(fim, intervalos[k][1])
+                k += 1
+            resultado.extend(self._corta(inicio, fim))
+        return self.versao, resultado
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+import random
+from abc import ABC, abstractmethod
+from typing import Dict
+
+from fila import Fila, FilaOrdenada, FilaSorteio
+
+# CFS: peso por prioridade de usuario (tabela nice -> peso do Linux,
+# nice -10, -5, 0, 5, 10); o tempo virtual anda PESO_BASE/peso por tick,
+# em unidades de 1/RESOLUCAO_CFS tick (senao os pesos maiores que PESO_BASE
+# truncariam o avanco de fatias curtas para 0)
+PESOS_CFS: Dict[int, int] = {1: 9548, 2: 3121, 3: 1024, 4: 335, 5: 110}
+PESO_BASE = 1024
+RESOLUCAO_CFS = 1024
+# Loteria e stride: bilhetes por prioridade de usuario
+BILHETES: Dict[int, int] = {1: 500, 2: 400, 3: 300, 4: 200, 5: 100}
+PASSO_BASE = 1 << 20
+
+
+class Politica:
+    """
+    Politica de escalonamento dos processos de usuario (tempo real continua
+    FIFO e com precedencia). Um objeto por escalonador (nucleo).
+
+    - fila(): fila de prontos de cada nivel 1..5; a ordem em que ela devolve
+      os processos e a escolha do proximo;
+    - enfileira(proc): nivel de um processo que chega (ou migra) ao nucleo;
+    - nivel(proc): nivel em que um processo desbloqueado volta a concorrer;
+    - fatia(proc): ticks da proxima fatia;
+    - fim_fatia(proc, ran): contabiliza a fatia e devolve o nivel de reinsercao;
+    - envelhece(proc, tempo, limiar): aging durante a espera na fila.
+    As filas unicas usam so o nivel 1.
+    """
+
+    nome = ""
+
+    def __init__(self, config):
+        self.config = config
+
+    def fila(self, name: str, capacidade: int, limiar: int) -> Fila:
+        return Fila(name, capacidade, limiar, self)
+
+    def chave(self, proc) -> int:
+        """Ordem (ou peso, no sorteio) do processo na fila de prontos."""
+        return 0
+
+    def nivel(self, proc) -> int:
+        return 1
+
+    def enfileira(self, proc) -> int:
+        return self.nivel(proc)
+
+    def fatia(self, proc) -> int:
+        return self.config.quantum[proc.init_priority]
+
+    def fim_fatia(self, proc, ran: int) -> int:
+        return self.nivel(proc)
+
+    def envelhece(self, proc, tempo: int, limiar: int):
+        pass
+
+    def estado(self) -> Dict[str, object]:
+        """Estado proprio da politica, para o snapshot."""
+        return {}
+
+    def restaura(self, estado: Dict[str, object]):
+        pass
+
+
+class MLFQ(Politica):
+    """Fila multinivel com realimentacao: 5 niveis FIFO, quantum por nivel, rebaixa a cada fatia."""
+
+    nome = "mlfq"
+
+    def fila(self, name: str, capacidade: int, limiar: int) -> Fila:
+        # sem politica na fila: aging direto por Processo.age
+        return Fila(name, capacidade, limiar)
+
+    def nivel(self, proc) -> int:
+        return min(max(proc.current_priority, 1), 5)
+
+    def fatia(self, proc) -> int:
+        return self.config.quantum[proc.current_priority]
+
+    def fim_fatia(self, proc, ran: int) -> int:
+        # realimentacao: nao terminou -> rebaixa (ate 5), zera aging
+        if proc.current_priority < 5:
+            proc.current_priority += 1
+        proc.aging_counter = 0
+        return proc.current_priority
+
+
+class SRT(Politica):
+    """Menor tempo restante primeiro: heap em remaining_cpu, fila unica."""
+
+    nome = "srt"
+
+    def fila(self, name: str, capacidade: int, limiar: int) -> Fila:
+        return FilaOrdenada(name, capacidade, limiar, self)
+
+    def chave(self, proc) -> int:
+        return proc.remaining_cpu
+
+
+class _TempoVirtual(Politica, ABC):
+    """
+    Roda o menor tempo virtual (proc.vtempo), numa heap. Quem chega ou migra
+    comeca no menor tempo virtual ja escalonado, para nao passar na frente
+    com credito acumulado.
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.vtempo_min = 0
+
+    def fila(self, name: str, capacidade: int, limiar: int) -> Fila:
+        return FilaOrdenada(name, capacidade, limiar, self)
+
+    def chave(self, proc) -> int:
+        return proc.vtempo
+
+    def enfileira(self, proc) -> int:
+        proc.vtempo = max(proc.vtempo, self.vtempo_min)
+        return 1
+
+    @abstractmethod
+    def avanco(self, proc, ran: int) -> int:
+        """Quanto o tempo virtual de 'proc' anda por 'ran' ticks de CPU."""
+
+    def fim_fatia(self, proc, ran: int) -> int:
+        # quem acabou de rodar tinha o menor tempo virtual da fila
+        self.vtempo_min = max(self.vtempo_min, proc.vtempo)
+        proc.vtempo += self.avanco(proc, ran)
+        return 1
+
+    def estado(self) -> Dict[str, object]:
+        return {"vtempo_min": self.vtempo_min}
+
+    def restaura(self, estado: Dict[str, object]):
+        self.vtempo_min = estado["vtempo_min"]
+
+
+class CFS(_TempoVirtual):
+    """Estilo CFS: tempo virtual ponderado pelo peso da prioridade (PESOS_CFS)."""
+
+    nome = "cfs"
+
+    def avanco(self, proc, ran: int) -> int:
+        return ran * PESO_BASE * RESOLUCAO_CFS // PESOS_CFS[proc.init_priority]
+
+
+class Stride(_TempoVirtual):
+    """Stride: o passe anda PASSO_BASE/bilhetes por quantum usado (proporcional a fatia)."""
+
+    nome = "stride"
+
+    def avanco(self, proc, ran: int) -> int:
+        return PASSO_BASE // BILHETES[proc.init_priority] * ran // self.fatia(proc)
+
+
+class Loteria(Politica):
+    """Sorteio ponderado pelos bilhetes da prioridade, com semente da configuracao."""
+
+    nome = "loteria"
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.rng = random.Random(config.semente)
+
+    def fila(self, name: str, capacidade: int, limiar: int) -> Fila:
+        return FilaSorteio(name, capacidade, limiar, self)
+
+    def chave(self, proc) -> int:
+        return BILHETES[proc.init_priority]
+
+    def estado(self) -> Dict[str, object]:
+        versao, interno, gauss = self.rng.getstate()
+        return {"rng": [versao, list(interno), gauss]}
+
+    def restaura(self, estado: Dict[str, object]):
+        versao, interno, gauss = estado["rng"]
+        self.rng.setstate((versao, tuple(interno), gauss))
+
+
+ESCALONAMENTOS = {p.nome: p for p in (MLFQ, SRT, CFS, Stride, Loteria)}
+
+
+def nova_politica(config) -> Politica:
+    try:
+        return ESCALONAMENTOS[config.politica](config)
+    except KeyError:
+        raise ValueError(f"politica de escalonamento desconhecida: {config.politica} "
+                         f"(use {', '.join(ESCALONAMENTOS)})") from None
@@ -3,12 +3,11 @@
 from collections import deque
 from dataclasses import dataclass, field
 from typing import Deque, Dict, List, Optional
+from configuracao import AGING_THRESHOLD_TICKS
 
-USER_QUANTUM_MS: Dict[int, int] = {1: 6, 2: 5, 3: 4, 4: 3, 5: 2}
-MAX_QUEUE_SIZE = 100
-AGING_THRESHOLD_TICKS = 3  # ciclos sem executar => sobe prioridade (min 1)
-
-@dataclass
+# slots: sem __dict__ por instancia (menos memoria e acesso mais rapido
+# com centenas de milhares de processos vivos)
+@dataclass(slots=True)
 class Processo:
     pid: int
     start: int                  # tempo de inicializao (tempo_init)
@@ -24,12 +23,16 @@ class Processo:
     remaining_cpu: int = field(init=False)
     remaining_init: int = field(init=False)
     aging_counter: int = field(default=0, repr=False)
+    marca_espera: int = field(default=0, repr=False)  # ver Fila.espera
+    nucleo: int = field(default=0, repr=False)  # nucleo dono das filas do processo
+    vtempo: int = field(default=0, repr=False)  # tempo virtual (politicas cfs e stride)
     offset: int = field(default=-1)  # posio inicial na memria
 
-    req_printer= None
-    req_scanner= None
-    req_sata= None
-    req_modem= None
+    # dispositivos obtidos (None = ainda nao alocado)
+    req_printer: Optional[int] = field(default=None, repr=False, compare=False)
+    req_scanner: Optional[int] = field(default=None, repr=False, compare=False)
+    req_sata: Optional[int] = field(default=None, repr=False, compare=False)
+    req_modem: Optional[int] = field(default=None, repr=False, compare=False)
 
     def checa_recursos(self) -> bool:
         if self.printer_id != 0 and self.req_printer is None:
@@ -60,13 +63,13 @@ class Processo:
     def __str__(self):
         return f"P{self.pid}(prio={self.current_priority}, rem={self.remaining_cpu})"
 
-    def age(self, tempo: int):
-        if (self.aging_counter + 1) > 6:
-            self.aging_counter = (self.aging_counter + tempo) % 6
+    def age(self, tempo: int, limiar: int = AGING_THRESHOLD_TICKS):
+        if (self.aging_counter + 1) > limiar:
+            self.aging_counter = (self.aging_counter + tempo) % limiar
             self.current_priority = max(self.current_priority, 1)
 
         else:
-            self.aging_counter = (self.aging_counter + tempo) % 6
+            self.aging_counter = (self.aging_counter + tempo) % limiar
 
     def tempo_user(self, tempo: int):
         self.remaining_init = max(self.remaining_init - tempo, 0)
@@ -1,6 +1,11 @@
 ﻿
 # -*- coding: utf-8 -*-
-from typing import Optional, Dict
+from collections import deque
+from typing import Deque, Optional, Dict, List, Tuple
+
+# Um dispositivo e identificado por (tipo, numero): ("scanner", 0),
+# ("printer", 1..2), ("modem", 0) ou ("sata", 1..3)
+Dispositivo = Tuple[str, int]
 
 class Recursos:
     def __init__(self):
@@ -9,6 +14,58 @@ class Recursos:
         self.printers: Dict[int, Optional[int]] = {1: None, 2: None}
         self.modem: Optional[int] = None
         self.sata: Dict[int, Optional[int]] = {1: None, 2: None, 3: None}
+        # Fila de espera (pids, FIFO) de cada dispositivo
+        self.espera: Dict[Dispositivo, Deque[int]] = {d: deque() for d in self._todos()}
+        # pid -> (processo, dispositivos) de quem esta esperando
+        self.pedidos: Dict[int, Tuple[object, List[Dispositivo]]] = {}
+        # Quantos dispositivos estao ocupados agora
+        self.em_uso = 0
+
+    def _todos(self) -> List[Dispositivo]:
+        return ([("scanner", 0), ("modem", 0)] + [("printer", k) for k in self.printers]
+                + [("sata", k) for k in self.sata])
+
+    def _dispositivos(self, scanner_req: int, printer_id: int,
+                      modem_req: int, sata_id: int) -> List[Dispositivo]:
+        """Dispositivos pedidos (codigos invalidos sao ignorados, como antes)."""
+        devs: List[Dispositivo] = []
+        if scanner_req == 1:
+            devs.append(("scanner", 0))
+        if printer_id in self.printers and printer_id != 0:
+            devs.append(("printer", printer_id))
+        if modem_req == 1:
+            devs.append(("modem", 0))
+        if sata_id in self.sata and sata_id != 0:
+            devs.append(("sata", sata_id))
+        return devs
+
+    def _dono(self, dev: Dispositivo) -> Optional[int]:
+        tipo, k = dev
+        if tipo == "scanner":
+            return self.scanner
+        if tipo == "modem":
+            return self.modem
+        if tipo == "printer":
+            return self.printers[k]
+        return self.sata[k]
+
+    def _concede(self, proc, pid: int, devs: List[Dispositivo]):
+        printer, scanner, sata, modem = proc.req_printer, proc.req_scanner, proc.req_sata, proc.req_modem
+        for tipo, k in devs:
+            if tipo == "scanner":
+                self.scanner = pid
+                scanner = 1
+            elif tipo == "modem":
+                self.modem = pid
+                modem = 1
+            elif tipo == "printer":
+                self.printers[k] = pid
+                printer = k
+            else:
+                self.sata[k] = pid
+                sata = k
+        self.em_uso += len(devs)
+        proc.aloca_recursos(printer=printer, scanner=scanner, sata=sata, modem=modem)
 
     # ------------------------------
     # Alocacao
@@ -16,58 +73,84 @@ class Recursos:
     def request(self, proc,pid: int, scanner_req: int, printer_id: int,
                 modem_req: int, sata_id: int) -> bool:
         """
-        Tenta alocar recursos para o processo pid.
+        Tenta alocar recursos para o processo pid (tudo ou nada).
         Retorna True se todos foram alocados, False se algum nao disponivel.
+        Em caso de falha o processo entra na fila de espera de cada
+        dispositivo pedido e so e atendido, em ordem FIFO, por release().
         """
+        if pid in self.pedidos:
+            return False  # ja esta esperando
 
-        # 1. Verificação de disponibilidade
-        if scanner_req == 1 and self.scanner is not None:
-            return False
-
-        if printer_id in self.printers and printer_id != 0:
-            if self.printers[printer_id] is not None:
-                return False
-
-        if modem_req == 1 and self.modem is not None:
-            return False
+        devs = self._dispositivos(scanner_req, printer_id, modem_req, sata_id)
 
-        if sata_id in self.sata and sata_id != 0:
-            if self.sata[sata_id] is not None:
-                return False
-
-        # 2. Se chegou aqui, todos estão livres efetiva a alocação
-        if scanner_req == 1:
-            self.scanner = pid
-            proc.aloca_recursos(printer = proc.req_printer,scanner = 1, sata = proc.req_sata, modem = proc.req_modem)
+        # 1. Verificação de disponibilidade (ninguem livre na frente)
+        if all(self._dono(d) is None and not self.espera[d] for d in devs):
+            # 2. Se chegou aqui, todos estão livres efetiva a alocação
+            if devs:
+                self._concede(proc, pid, devs)
+            return True
 
-        if printer_id in self.printers and printer_id != 0:
-            self.printers[printer_id] = pid
-            proc.aloca_recursos(printer = printer_id,scanner = proc.req_scanner, sata = proc.req_sata, modem = proc.req_modem)
-
-        if modem_req == 1:
-            self.modem = pid
-            proc.aloca_recursos(printer = proc.req_printer,scanner = proc.req_scanner, sata = proc.req_sata, modem = 1)
+        self.pedidos[pid] = (proc, devs)
+        for d in devs:
+            self.espera[d].append(pid)
+        return False
 
-        if sata_id in self.sata and sata_id != 0:
-            self.sata[sata_id] = pid
-            proc.aloca_recursos(printer = proc.req_printer,scanner = proc.req_scanner, sata = sata_id, modem = proc.req_modem)
+    def disponivel(self, scanner_req: int, printer_id: int, modem_req: int, sata_id: int) -> bool:
+        """Os dispositivos pedidos estao livres e sem fila (request atenderia na hora)."""
+        return all(self._dono(d) is None and not self.espera[d]
+                   for d in self._dispositivos(scanner_req, printer_id, modem_req, sata_id))
 
-        return True
+    def cancela(self, pid: int) -> List:
+        """
+        Retira o pedido pendente de 'pid' (o processo saiu desta maquina) e
+        atende quem estava atras dele. Retorna os processos atendidos.
+        """
+        _, devs = self.pedidos.pop(pid)
+        for d in devs:
+            self.espera[d].remove(pid)
+        return self._atende(devs)
 
     # ------------------------------
     # Liberacao
     # ------------------------------
-    def release(self, proc, pid: int):
-        """Libera todos os recursos ocupados por um processo."""
+    def release(self, proc, pid: int) -> List:
+        """
+        Libera todos os recursos ocupados por um processo e atende quem
+        esperava por eles. Retorna os processos que receberam seus recursos.
+        """
+        liberados: List[Dispositivo] = []
         if self.scanner == pid:
             self.scanner = None
+            liberados.append(("scanner", 0))
         for k in self.printers:
             if self.printers[k] == pid:
                 self.printers[k] = None
+                liberados.append(("printer", k))
         if self.modem == pid:
             self.modem = None
+            liberados.append(("modem", 0))
         for k in self.sata:
             if self.sata[k] == pid:
                 self.sata[k] = None
+                liberados.append(("sata", k))
         proc.aloca_recursos()
+        self.em_uso -= len(liberados)
+        return self._atende(liberados)
+
+    def _atende(self, liberados: List[Dispositivo]) -> List:
+        acordados = []
+        for dev in liberados:
+            if not self.espera[dev]:
+                continue
+            # so o primeiro da fila pode levar, e apenas se for o primeiro em
+            # todas as filas que pediu e todos os dispositivos estiverem livres
+            primeiro = self.espera[dev][0]
+            wproc, devs = self.pedidos[primeiro]
+            if all(self._dono(d) is None and self.espera[d][0] == primeiro for d in devs):
+                for d in devs:
+                    self.espera[d].popleft()
+                del self.pedidos[primeiro]
+                self._concede(wproc, primeiro, devs)
+                acordados.append(wproc)
+        return acordados
 
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+import json
+import sys
+import threading
+from typing import List, Optional, TextIO
+
+MODOS = ("texto", "resumo", "jsonl", "silencioso")
+
+# Resultado de cada operacao de arquivo
+OP_OK = "ok"
+OP_SEM_PROCESSO = "sem_processo"
+OP_SEM_ESPACO = "sem_espaco"
+OP_NEGADA = "negada"
+
+
+class Saida:
+    """
+    Destino dos logs do escalonador, do despachador e do relatorio do disco.
+
+    Modos:
+    - "texto": o log completo de sempre, uma linha por instrucao;
+    - "resumo": uma linha por fatia, com o intervalo de instrucoes;
+    - "jsonl": um objeto JSON por evento;
+    - "silencioso": nada e formatado nem escrito.
+    O texto e acumulado e escrito no arquivo em blocos de 'tam_buffer'
+    caracteres; flush() precisa ser chamado no fim da simulacao. Pode ser
+    usada pelas threads do escalonador e do despachador ao mesmo tempo.
+    """
+
+    def __init__(self, modo: str = "texto", arquivo: Optional[TextIO] = None,
+                 tam_buffer: int = 1 << 16):
+        if modo not in MODOS:
+            raise ValueError(f"modo de saida desconhecido: {modo}")
+        self.modo = modo
+        self.arquivo = arquivo if arquivo is not None else sys.stdout
+        self.tam_buffer = tam_buffer
+        self.ativo = modo != "silencioso"
+        self._buffer: List[str] = []
+        self._tamanho = 0
+        self._lock = threading.Lock()
+        # texto: o cabecalho do sistema de arquivos ja foi escrito
+        self.cabecalho_arquivos = False
+
+    def escreve(self, texto: str):
+        """Acrescenta uma linha (como print) ao buffer."""
+        with self._lock:
+            self._buffer.append(texto + "\n")
+            self._tamanho += len(texto) + 1
+            if self._tamanho >= self.tam_buffer:
+                self._descarrega()
+
+    def _json(self, **campos):
+        self.escreve(json.dumps(campos, separators=(",", ":")))
+
+    def _descarrega(self):
+        if self._buffer:
+            self.arquivo.write("".join(self._buffer))
+            self._buffer.clear()
+            self._tamanho = 0
+
+    def flush(self):
+        with self._lock:
+            self._descarrega()
+            self.arquivo.flush()
+
+    # ------------------------------
+    # Eventos
+    # ------------------------------
+    def admissao(self, proc):
+        if self.modo == "texto":
+            self.escreve(
+                f"dispatcher =>\nPID: {proc.pid}\noffset: {proc.offset}\n"
+                f"blocks: {proc.mem_blocks}\npriority: {proc.init_priority}\n"
+                f"time: {proc.cpu_time}\nscanners: {proc.scanner_req}\n"
+                f"printers: {proc.printer_id}\nmodems: {proc.modem_req}\n"
+                f"sata: {proc.sata_id}\n\n")
+        elif self.modo == "resumo":
+            self.escreve(f"dispatcher => P{proc.pid} offset={proc.offset} "
+                         f"blocks={proc.mem_blocks} priority={proc.init_priority} time={proc.cpu_time}")
+        elif self.modo == "jsonl":
+            self._json(evento="admissao", pid=proc.pid, offset=proc.offset,
+                       blocos=proc.mem_blocks, prioridade=proc.init_priority,
+                       tempo=proc.cpu_time, scanner=proc.scanner_req,
+                       impressora=proc.printer_id, modem=proc.modem_req, sata=proc.sata_id)
+
+    def descarte(self, blocos_mem: int, prioridade: int):
+        if self.modo == "jsonl":
+            self._json(evento="descarte", blocos=blocos_mem, prioridade=prioridade)
+        elif self.ativo:
+            self.escreve(f"dispatcher => processo de {blocos_mem} blocos "
+                         f"(prioridade {prioridade}) nao cabe na memoria\n")
+
+    def transbordo(self, proc, fila: str):
+        if self.modo == "jsonl":
+            self._json(evento="transbordo", pid=proc.pid, fila=fila)
+        elif self.ativo:
+            self.escreve(f"[Escalonador] fila {fila} cheia: processo {proc.pid} aguarda vaga")
+
+    def migracao(self, proc, origem: int, destino: int, custo: int):
+        if self.modo == "jsonl":
+            self._json(evento="migracao", pid=proc.pid, origem=origem, destino=destino, custo=custo)
+        elif self.ativo:
+            self.escreve(f"[Cluster] processo {proc.pid} migrou do no {origem} para o no {destino} "
+                         f"({proc.mem_blocks} blocos, {custo} ticks)")
+
+    def recebido(self, proc):
+        if self.modo == "texto":
+            self.escreve(f"[Escalonador] Recebi processo {proc}")
+        elif self.modo == "jsonl":
+            self._json(evento="recebido", pid=proc.pid, prioridade=proc.current_priority,
+                       restante=proc.remaining_cpu)
+
+    def fatia(self, proc, prioridade: int, restante_antes: int, concluido: bool):
+        """
+        Uma fatia de 'proc' executada com a prioridade 'prioridade', que
+        comecou com 'restante_antes' instrucoes faltando e termina no estado
+        atual do processo.
+        """
+        if not self.ativo:
+            return
+        pid = proc.pid
+        ran = restante_antes - proc.remaining_cpu
+        primeira = proc.cpu_time - restante_antes + 1
+        if self.modo == "texto":
+            linhas = [f"\nExecutando P{pid}(prio={prioridade}, rem={restante_antes})"]
+            for i in range(ran):
+                linhas.append(f"P{pid}(prio={prioridade}, rem={restante_antes - i}) instruction {primeira + i}")
+            if concluido:
+                fim = "\n" if proc.is_real_time else ""
+                linhas.append(f"P{pid}(prio={prioridade}, rem=0) return SIGINT{fim}")
+                linhas.append(f"Processo P{pid} concluido, memoria liberada")
+            self.escreve("\n".join(linhas))
+        elif self.modo == "resumo":
+            fim = " concluido" if concluido else ""
+            self.escreve(f"P{pid} prio={prioridade} instrucoes {primeira}-{primeira + ran - 1}{fim}")
+        else:
+            self._json(evento="fatia", pid=pid, prioridade=prioridade, de=primeira,
+                       ate=primeira + ran - 1, concluido=concluido)
+
+    def operacao(self, i: int, pid: int, op: int, name: str, resultado: str):
+        """Resultado da i-esima operacao de arquivo, no momento em que e executada."""
+        if self.modo == "jsonl":
+            self._json(evento="arquivo", operacao=i, pid=pid,
+                       op="criar" if op == 0 else "deletar", nome=name, resultado=resultado)
+            return
+        if not self.ativo:
+            return
+        if not self.cabecalho_arquivos:
+            self.cabecalho_arquivos = True
+            self.escreve("\nSistema de arquivos =>")
+        if resultado == OP_SEM_PROCESSO:
+            self.escreve(f"Operacao {i} => Falha\nO processo {pid} nao existe.")
+        elif op == 0:  # criar
+            if resultado == OP_OK:
+                self.escreve(f"Operacao {i} => Sucesso\nO processo {pid} criou o arquivo {name}.")
+            else:
+                self.escreve(f"Operacao {i} => Falha\nO processo {pid} nao pode criar o arquivo {name} (falta de espaco).")
+        else:  # deletar
+            if resultado == OP_OK:
+                self.escreve(f"Operacao {i} => Sucesso\nO processo {pid} deletou o arquivo {name}.")
+            else:
+                self.escreve(f"Operacao {i} => Falha\nO processo {pid} nao pode deletar o arquivo {name}.")
+
+    def mapa_disco(self, mapa: str):
+        """Mapa do disco no fim da simulacao."""
+        if self.modo == "jsonl":
+            self._json(evento="mapa_disco", mapa=mapa)
+            return
+        if not self.ativo:
+            return
+        if not self.cabecalho_arquivos:
+            self.cabecalho_arquivos = True
+            self.escreve("\nSistema de arquivos =>")
+        self.escreve("\nMapa de ocupacao do disco:\n" + mapa)
+
+    def nos(self, relatorio: list, contencoes: int):
+        """Utilizacao e migracoes de cada no do cluster, no fim da simulacao."""
+        if self.modo == "jsonl":
+            for no in relatorio:
+                self._json(evento="no", **no)
+            self._json(evento="cluster", contencoes=contencoes)
+        elif self.ativo:
+            self.escreve(f"\nCluster => {contencoes} admissoes seguradas")
+            for no in relatorio:
+                mem = no["memoria_utilizacao"]
+                self.escreve(f"no {no['no']}: {no['processos']} processos, "
+                             f"cpu {no['cpu_utilizacao']:.1%}, memoria rt {mem['rt']:.1%} "
+                             f"user {mem['user']:.1%}, dispositivos {no['dispositivos_utilizacao']:.1%}, "
+                             f"migracoes {no['migracoes_entrada']} entrada / {no['migracoes_saida']} saida "
+                             f"({no['blocos_migrados']} blocos, {no['custo_migracao_ticks']} ticks)")
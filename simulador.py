@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+import heapq
+from typing import List, Optional
+
+# Tipos de evento; no mesmo instante sao tratados nesta ordem
+LIBERACAO = 0    # processo terminou: memoria e dispositivos liberados
+CHEGADA = 1      # passada do despachador pelos processos pendentes
+ARQUIVOS = 2     # operacoes do sistema de arquivos
+FIM_FATIA = 3    # CPU volta a ficar livre
+DECISAO = 4      # escalonador escolhe o proximo processo
+
+
+class Simulador:
+    """
+    Nucleo de simulacao por eventos discretos, em uma unica thread.
+
+    Mantem um relogio virtual global e um heap de eventos (tempo, tipo, seq).
+    Quando nenhum processo pode rodar, em vez de avancar um tick por vez o
+    relogio salta direto para o instante em que o proximo processo termina a
+    inicializacao, com as mesmas decisoes de escalonamento do laco tick a
+    tick (pular_ocioso=False executa esse laco, para comparacao).
+    """
+
+    def __init__(self, escalonador, despachador, pular_ocioso: bool = True):
+        self.escalonador = escalonador
+        self.despachador = despachador
+        self.pular_ocioso = pular_ocioso
+        self.relogio = 0
+        self.eventos: List[tuple] = []
+        self._seq = 0
+        self.cpu_ocupada = False
+        self._decisao_agendada = False
+        self.bloqueado = False  # terminou com processos que nunca podem rodar
+        self.decisoes = 0  # chamadas ao escalonador (para o benchmark)
+        self.iniciado = False
+
+    def agenda(self, tempo: int, tipo: int, dados=None):
+        heapq.heappush(self.eventos, (tempo, tipo, self._seq, dados))
+        self._seq += 1
+
+    def _agenda_decisao(self, tempo: int):
+        if not self._decisao_agendada:
+            self._decisao_agendada = True
+            self.agenda(tempo, DECISAO)
+
+    def _inicia(self, ate: Optional[int]) -> bool:
+        """Agenda a primeira chegada; False se o proximo evento passa de 'ate'."""
+        if not self.iniciado:
+            self.iniciado = True
+            self.agenda(0, CHEGADA)
+        return ate is None or not self.eventos or self.eventos[0][0] <= ate
+
+    def executar(self, ate: Optional[int] = None) -> bool:
+        """
+        Roda a simulacao ate nao haver mais eventos. Com 'ate', para antes do
+        primeiro evento depois desse instante (para salvar um snapshot e
+        continuar depois com outra chamada); retorna True se terminou.
+        """
+        while self._inicia(ate) and self.eventos:
+            tempo, tipo, _, dados = heapq.heappop(self.eventos)
+            self.relogio = tempo
+            if tipo == LIBERACAO:
+                if self.despachador.has_pending():
+                    self.agenda(tempo, CHEGADA)
+            elif tipo == CHEGADA:
+                self._chegada()
+            elif tipo == ARQUIVOS:
+                self.despachador.executa_arquivos()
+            elif tipo == FIM_FATIA:
+                self.cpu_ocupada = False
+                if dados.remaining_cpu == 0:
+                    self.agenda(tempo, LIBERACAO, dados)
+                self._agenda_decisao(tempo)
+            elif tipo == DECISAO:
+                self._decisao_agendada = False
+                self._decisao()
+
+        saida = self.escalonador.saida
+        if self.eventos:
+            saida.flush()
+            return False
+        self.despachador.finaliza_arquivos()
+        saida.flush()
+        return True
+
+    def _chegada(self):
+        despachador, escalonador = self.despachador, self.escalonador
+        while True:
+            for proc in despachador.admitir():
+                escalonador.processos.put(proc)
+            if not despachador.has_pending() or self.memoria_ocupada():
+                break
+            # nada na memoria e ainda assim nao coube: nunca sera admitido
+            despachador.descarta_pendentes()
+        if despachador.tem_operacoes():
+            # operacoes de arquivo dos processos que acabaram de chegar
+            self.agenda(self.relogio, ARQUIVOS)
+        if not despachador.has_pending():
+            escalonador.despachador_finalizado = True
+        if not self.cpu_ocupada:
+            self._agenda_decisao(self.relogio)
+
+    def memoria_ocupada(self) -> bool:
+        return bool(self.despachador.memoria.owners)
+
+    def _decisao(self):
+        escalonador = self.escalonador
+        self.decisoes += 1
+        proc = escalonador.passo()
+        if proc is not None:
+            self.cpu_ocupada = True
+            self.agenda(self.relogio + escalonador.ultima_fatia, FIM_FATIA, proc)
+            return
+
+        if not escalonador.has_ready():
+            # sem processos: fim, ou pendentes esperando memoria que ninguem libera
+            self.bloqueado = not escalonador.despachador_finalizado
+            escalonador.finalizado = True
+            return
+        ticks = escalonador.ticks_ate_pronto()
+        if ticks is None:
+            # prontos mas bloqueados em recursos que ninguem vai liberar
+            self.bloqueado = True
+            escalonador.finalizado = True
+            return
+        if self.pular_ocioso:
+            escalonador.ocioso(ticks)
+            self._agenda_decisao(self.relogio + ticks)
+        else:
+            escalonador.ocioso(1)
+            self._agenda_decisao(self.relogio + 1)
+
+
+class SimuladorMultinucleo(Simulador):
+    """
+    Simulacao por eventos com N nucleos, cada um com seu proprio escalonador
+    (fila RT + cinco filas de realimentacao); memoria e recursos sao
+    compartilhados. Processos novos vao para o nucleo menos carregado e um
+    nucleo sem nada pronto rouba o proximo processo pronto do nucleo mais
+    carregado. O tempo ocioso de cada nucleo e aplicado na sua proxima
+    decisao, ja que outro nucleo pode lhe dar trabalho antes do previsto.
+    """
+
+    def __init__(self, nucleos: List, despachador, roubo: bool = True):
+        super().__init__(nucleos[0], despachador)
+        self.nucleos = nucleos
+        self.roubo = roubo
+        for i, nucleo in enumerate(nucleos):
+            nucleo.indice = i
+            nucleo.nucleos = nucleos
+        self.ocupado = [False] * len(nucleos)
+        # instante da decisao pendente de cada nucleo (None: dormindo ou rodando)
+        self.agendada: List[Optional[int]] = [None] * len(nucleos)
+        self.roubos = 0
+        self.metricas = nucleos[0].metricas
+        if self.metricas is not None:
+            for nucleo in nucleos:
+                nucleo.integra_metricas = False
+        self._integrado = 0  # ate onde as metricas do sistema foram integradas
+        self.integra = self.metricas is not None
+
+    def _agenda_nucleo(self, i: int, tempo: int):
+        if self.agendada[i] is None or self.agendada[i] > tempo:
+            self.agendada[i] = tempo
+            self.agenda(tempo, DECISAO, i)
+
+    def _acorda(self):
+        for i, ocupado in enumerate(self.ocupado):
+            if not ocupado:
+                self._agenda_nucleo(i, self.relogio)
+
+    def _integra(self, tempo: int):
+        nucleos = self.nucleos
+        tamanhos = [sum(len(n.niveis[k]) for n in nucleos) for k in range(6)]
+        self.metricas.avanca(tamanhos, self.despachador.memoria, self.escalonador.recursos,
+                             self._integrado, tempo - self._integrado)
+        self._integrado = tempo
+
+    def executar(self, ate: Optional[int] = None) -> bool:
+        """Roda a simulacao ate nao haver mais eventos (ou ate 'ate', ver Simulador)."""
+        while self._inicia(ate) and self.eventos:
+            tempo, tipo, _, dados = heapq.heappop(self.eventos)
+            if self.integra and tempo > self._integrado:
+                self._integra(tempo)
+            self.relogio = tempo
+            if tipo == LIBERACAO:
+                if self.despachador.has_pending():
+                    self.agenda(tempo, CHEGADA)
+            elif tipo == CHEGADA:
+                self._chegada()
+            elif tipo == ARQUIVOS:
+                self.despachador.executa_arquivos()
+            elif tipo == FIM_FATIA:
+                i, proc = dados
+                self.ocupado[i] = False
+                if proc.remaining_cpu == 0:
+                    self.agenda(tempo, LIBERACAO, proc)
+                # a fatia pode ter desbloqueado ou deixado trabalho para outros nucleos
+                self._acorda()
+            elif tipo == DECISAO:
+                if self.agendada[dados] != tempo:
+                    continue  # substituida por uma decisao anterior
+                self.agendada[dados] = None
+                self._decisao_nucleo(dados)
+
+        if self.eventos:
+            self.escalonador.saida.flush()
+            return False
+        self.bloqueado = self.despachador.has_pending() or any(n.has_ready() for n in self.nucleos)
+        for nucleo in self.nucleos:
+            nucleo.finalizado = True
+        saida = self.escalonador.saida
+        self.despachador.finaliza_arquivos()
+        saida.flush()
+        return True
+
+    def _chegada(self):
+        despachador, nucleos, ocupado = self.despachador, self.nucleos, self.ocupado
+        while True:
+            for proc in despachador.admitir():
+                alvo = min(nucleos, key=lambda n: n.carga() + ocupado[n.indice])
+                alvo.processos.put(proc)
+            if not despachador.has_pending() or self.memoria_ocupada():
+                break
+            despachador.descarta_pendentes()
+        if despachador.tem_operacoes():
+            self.agenda(self.relogio, ARQUIVOS)
+        if not despachador.has_pending():
+            for nucleo in nucleos:
+                nucleo.despachador_finalizado = True
+        self._acorda()
+
+    def _rouba(self, ladrao) -> bool:
+        # so entre os nucleos que dividem memoria e dispositivos com o ladrao
+        vitimas = [n for n in ladrao.nucleos if n is not ladrao and n.mascara_prontos]
+        if not vitimas:
+            return False
+        proc = max(vitimas, key=lambda n: n.carga()).cede()
+        ladrao.adiciona_fila(proc, forca=True)
+        self.roubos += 1
+        return True
+
+    def _decisao_nucleo(self, i: int):
+        nucleo = self.nucleos[i]
+        if nucleo.relogio < self.relogio:
+            nucleo.ocioso(self.relogio - nucleo.relogio)
+        self.decisoes += 1
+        proc = nucleo.passo()
+        if proc is None and self.roubo and self._rouba(nucleo):
+            proc = nucleo.passo()
+        if proc is not None:
+            self.ocupado[i] = True
+            self.agenda(self.relogio + nucleo.ultima_fatia, FIM_FATIA, (i, proc))
+            return
+        ticks = nucleo.ticks_ate_pronto()
+        if ticks is not None:
+            self._agenda_nucleo(i, self.relogio + ticks)
+        # senao dorme ate a proxima chegada ou fim de fatia
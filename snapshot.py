@@ -0,0 +1,438 @@
+# -*- coding: utf-8 -*-
+"""
+Snapshot do estado completo de uma simulacao por eventos.
+
+Formato: MAGICO, tamanho do cabecalho (uint64), cabecalho JSON (escalares,
+nomes e strings) e, alinhadas em 8 bytes, secoes de inteiros de 64 bits
+(processos, filas, eventos, memoria...). As secoes sao lidas direto do
+arquivo mapeado com mmap. Os alocadores sao reconstruidos a partir do mapa
+de donos (seu estado e determinado pelos blocos ocupados), e o despachador
+volta a ler os arquivos de entrada do byte seguinte ao ultimo registro
+consumido (Leitor.posicao), sem reler o comeco.
+"""
+
+import heapq
+import itertools
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+from arquivos import FileManager
+from cluster import SimuladorCluster
+from configuracao import Configuracao
+from despachador import Despachador, ler_operacoes, ler_processos
+from escalonador import Escalonador
+from memoria import MemoryManager
+from metricas import Metricas
+from processo import Processo
+from recursos import Recursos
+from saida import Saida
+from simulador import FIM_FATIA, LIBERACAO, DECISAO, Simulador, SimuladorMultinucleo
+
+MAGICO = b"SOSNAP\x00\x01"
+VERSAO = 4
+
+# Colunas da tabela de processos (req_* = -1 quando None)
+CAMPOS_PROCESSO = ("pid", "start", "init_priority", "cpu_time", "mem_blocks", "printer_id",
+                   "scanner_req", "modem_req", "sata_id", "current_priority", "remaining_cpu",
+                   "remaining_init", "aging_counter", "marca_espera", "offset", "nucleo", "vtempo",
+                   "req_printer", "req_scanner", "req_sata", "req_modem")
+_N_INICIAIS = 9  # campos passados ao construtor de Processo
+
+
+class _Escritor:
+    def __init__(self):
+        self.meta: Dict[str, object] = {}
+        self._secoes: List[tuple] = []
+
+    def secao(self, nome: str, valores: Iterable[int]):
+        self._secoes.append((nome, array("q", valores)))
+
+    def grava(self, path: str):
+        indice: Dict[str, List[int]] = {}
+        pos = 0
+        for nome, valores in self._secoes:
+            indice[nome] = [pos, len(valores)]
+            pos += len(valores) * 8
+        cabecalho = json.dumps({"versao": VERSAO, "meta": self.meta, "secoes": indice},
+                               separators=(",", ":")).encode("utf-8")
+        tamanho = len(MAGICO) + 8 + len(cabecalho)
+        with open(path, "wb") as f:
+            f.write(MAGICO)
+            f.write(struct.pack("<Q", len(cabecalho)))
+            f.write(cabecalho)
+            f.write(bytes(-tamanho % 8))
+            for _, valores in self._secoes:
+                if sys.byteorder == "big":
+                    valores.byteswap()
+                f.write(valores.tobytes())
+
+
+class _Leitor:
+    def __init__(self, path: str):
+        self._f = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGICO)] != MAGICO:
+            self.fecha()
+            raise ValueError(f"{path} nao e um snapshot do simulador")
+        n = struct.unpack_from("<Q", self._mm, len(MAGICO))[0]
+        inicio = len(MAGICO) + 8
+        cabecalho = json.loads(self._mm[inicio:inicio + n].decode("utf-8"))
+        if cabecalho["versao"] != VERSAO:
+            self.fecha()
+            raise ValueError(f"versao de snapshot nao suportada: {cabecalho['versao']}")
+        self.meta = cabecalho["meta"]
+        self._indice = cabecalho["secoes"]
+        self._dados = inicio + n + (-(inicio + n) % 8)
+
+    def secao(self, nome: str) -> List[int]:
+        pos, n = self._indice[nome]
+        inicio = self._dados + pos
+        if sys.byteorder == "big":
+            valores = array("q", self._mm[inicio:inicio + 8 * n])
+            valores.byteswap()
+            return valores.tolist()
+        with memoryview(self._mm)[inicio:inicio + 8 * n] as bruto, bruto.cast("q") as valores:
+            return valores.tolist()
+
+    def linhas(self, nome: str, largura: int) -> List[List[int]]:
+        valores = self.secao(nome)
+        return [valores[i:i + largura] for i in range(0, len(valores), largura)]
+
+    def fecha(self):
+        self._mm.close()
+        self._f.close()
+
+
+def _n(valor: Optional[int]) -> int:
+    return -1 if valor is None else valor
+
+
+def _o(valor: int) -> Optional[int]:
+    return None if valor == -1 else valor
+
+
+def _trechos(fm: FileManager) -> List[list]:
+    """
+    Trechos ocupados do disco [nome, offset, tamanho], um por alocacao,
+    incluindo os que ficaram sem entrada em fm.files (nome recriado).
+    """
+    return [[nome, offset, tamanho] for offset, tamanho, nome in fm.ocupacao.alocacoes()]
+
+
+# ------------------------------
+# Gravacao
+# ------------------------------
+def salva(simulador: Simulador, path: str):
+    """Grava o estado completo de 'simulador' (pausado com executar(ate=...))."""
+    if isinstance(simulador, SimuladorCluster):
+        raise ValueError("snapshot do modo cluster nao e suportado")
+    e = _Escritor()
+    meta = e.meta
+    despachador = simulador.despachador
+    multi = isinstance(simulador, SimuladorMultinucleo)
+    nucleos = simulador.nucleos if multi else [simulador.escalonador]
+    simulador.escalonador.saida.flush()
+
+    # processos: todos os admitidos, na ordem do pid (a ordem no arquivo;
+    # descartados deixam buracos)
+    procs = [despachador.por_pid[pid] for pid in sorted(despachador.por_pid)]
+    e.secao("processos", (_n(getattr(p, c)) for p in procs for c in CAMPOS_PROCESSO))
+
+    # simulador
+    meta["simulador"] = {
+        "multi": multi, "relogio": simulador.relogio, "seq": simulador._seq,
+        "cpu_ocupada": simulador.cpu_ocupada, "decisao_agendada": simulador._decisao_agendada,
+        "pular_ocioso": simulador.pular_ocioso, "bloqueado": simulador.bloqueado,
+        "decisoes": simulador.decisoes, "iniciado": simulador.iniciado,
+    }
+    eventos = []
+    for tempo, tipo, seq, dados in simulador.eventos:
+        if dados is None:
+            a, b = -1, -1
+        elif isinstance(dados, tuple):  # (nucleo, processo)
+            a, b = dados[0], dados[1].pid
+        elif isinstance(dados, int):  # nucleo da decisao
+            a, b = dados, -1
+        else:
+            a, b = -1, dados.pid
+        eventos.extend((tempo, tipo, seq, a, b))
+    e.secao("eventos", eventos)
+    if multi:
+        meta["simulador"].update(roubo=simulador.roubo, roubos=simulador.roubos,
+                                 integrado=simulador._integrado)
+        e.secao("multi", itertools.chain(simulador.ocupado, (_n(t) for t in simulador.agendada)))
+
+    # escalonadores
+    config = nucleos[0].config
+    meta["config"] = {"quantum": [config.quantum[p] for p in range(1, 6)],
+                      "limiar_aging": config.limiar_aging, "capacidade_fila": config.capacidade_fila,
+                      "total_blocks": config.total_blocks, "rt_blocks": config.rt_blocks,
+                      "politica": config.politica, "semente": config.semente,
+                      "limite_prontos": config.limite_prontos}
+    meta["nucleos"] = []
+    for i, nucleo in enumerate(nucleos):
+        meta["nucleos"].append({
+            "tick_count": nucleo.tick_count, "ultima_fatia": nucleo.ultima_fatia,
+            "relogio": nucleo.relogio, "fatias": nucleo.fatias, "finalizado": nucleo.finalizado,
+            "despachador_finalizado": nucleo.despachador_finalizado,
+            "filas": [[f.espera, f._seq, f.pico] for f in nucleo.niveis],
+            "politica": nucleo.politica.estado(),
+            "transbordos": nucleo.transbordos, "contencoes": nucleo.contencoes,
+        })
+        e.secao(f"n{i}.recebidos", (p.pid for p in list(nucleo.processos.queue)))
+        for k, fila in enumerate(nucleo.niveis):
+            e.secao(f"n{i}.f{k}.q", (p.pid for p in fila.prontos()))
+            e.secao(f"n{i}.f{k}.chegando", (x for chave, seq, p in fila.chegando
+                                             for x in (chave, seq, p.pid)))
+            e.secao(f"n{i}.f{k}.bloqueados", fila.bloqueados)
+            e.secao(f"n{i}.f{k}.transbordo", (p.pid for p in nucleo.transbordo[k]))
+
+    # memoria
+    memoria = despachador.memoria
+    meta["memoria"] = {"alocador": memoria.alocador, "alocador_rt": memoria.alocador_rt,
+                       "total_blocks": memoria.total_blocks, "rt_blocks": memoria.rt_blocks,
+                       "alocacoes": memoria.alocacoes, "falhas": memoria.falhas,
+                       "liberacoes": memoria.liberacoes, "ocupados": memoria.ocupados,
+                       "pico": memoria.pico, "compactar": memoria.compactar,
+                       "compactacoes": memoria.compactacoes, "blocos_movidos": memoria.blocos_movidos,
+                       "tempo_compactacao": memoria.tempo_compactacao,
+                       "versao_ocupacao": memoria.ocupacao.versao}
+    e.secao("memoria.donos", (x for pid, (off, tam) in memoria.owners.items() for x in (pid, off, tam)))
+
+    # recursos
+    recursos = simulador.escalonador.recursos
+    meta["recursos"] = {"em_uso": recursos.em_uso,
+                        "donos": [[d[0], d[1], _n(recursos._dono(d))] for d in recursos._todos()]}
+    for d, espera in recursos.espera.items():
+        e.secao(f"recursos.espera.{d[0]}{d[1]}", espera)
+    e.secao("recursos.pedidos", recursos.pedidos)
+
+    # despachador
+    meta["despachador"] = {
+        "process_file": despachador.process_file, "fileops_file": despachador.fileops_file,
+        "janela": despachador.janela, "lidos": despachador._lidos,
+        "lendo": despachador._registros is not None,
+        "posicao": getattr(despachador._registros, "posicao", None),
+        "posicao_ops": getattr(despachador._ops, "posicao", None),
+        "menor_esperando": despachador._menor_esperando,
+        "liberacoes_vistas": despachador._liberacoes_vistas,
+        "lendo_ops": despachador.tem_operacoes(), "ops_feitas": despachador.ops_feitas,
+        "op_pendente": despachador._op_pendente,
+        "arquivos_finalizados": despachador.arquivos_finalizados,
+        "cabecalho_arquivos": simulador.escalonador.saida.cabecalho_arquivos,
+    }
+    e.secao("despachador.chegadas", (x for tempo, ordem, reg in despachador.chegadas
+                                     for x in (tempo, ordem) + tuple(reg)))
+    for r, espera in enumerate(despachador.esperando_memoria):
+        e.secao(f"despachador.espera{r}", (x for tempo, ordem, reg in espera
+                                           for x in (tempo, ordem) + tuple(reg)))
+
+    # sistema de arquivos
+    fm = getattr(despachador, "file_manager", None)
+    if fm is not None:
+        meta["arquivos"] = {"total_blocks": fm.total_blocks, "backend": fm.backend,
+                            "politica": fm.politica, "cursor": fm._cursor, "creates": fm.creates,
+                            "falhas_create": fm.falhas_create, "compactar": fm.compactar,
+                            "compactacoes": fm.compactacoes, "blocos_movidos": fm.blocos_movidos,
+                            "tempo_compactacao": fm.tempo_compactacao,
+                            "trechos": _trechos(fm), "files": fm.files,
+                            "versao_ocupacao": fm.ocupacao.versao}
+
+    # metricas
+    m = nucleos[0].metricas
+    if m is not None:
+        meta["metricas"] = {"intervalo": m.intervalo, "tempo": m.tempo, "area_filas": m.area_filas,
+                            "area_memoria": m.area_memoria, "ocupado": m.ocupado,
+                            "bloqueado": m.bloqueado, "proxima_amostra": m._proxima_amostra,
+                            "capacidade_memoria": list(m.capacidade_memoria)}
+        for nome in ("prioridade", "cpu", "chegada", "primeira", "conclusao"):
+            e.secao(f"metricas.{nome}", getattr(m, nome))
+        e.secao("metricas.serie", (x for linha in m.serie for x in linha))
+
+    e.grava(path)
+
+
+# ------------------------------
+# Restauracao
+# ------------------------------
+def carrega(path: str, saida: Optional[Saida] = None,
+            registros: Optional[Iterable[tuple]] = None) -> Simulador:
+    """
+    Reconstroi o simulador salvo em 'path'; basta chamar executar() para
+    continuar. registros: entrada ja lida, se o despachador nao usava arquivo.
+    """
+    leitor = _Leitor(path)
+    try:
+        return _carrega(leitor, saida or Saida(), registros)
+    finally:
+        leitor.fecha()
+
+
+def _carrega(l: _Leitor, saida: Saida, registros) -> Simulador:
+    meta = l.meta
+    mc = meta["config"]
+    config = Configuracao(quantum=dict(zip(range(1, 6), mc["quantum"])),
+                          limiar_aging=mc["limiar_aging"], capacidade_fila=mc["capacidade_fila"],
+                          total_blocks=mc["total_blocks"], rt_blocks=mc["rt_blocks"],
+                          politica=mc["politica"], semente=mc["semente"],
+                          limite_prontos=mc["limite_prontos"])
+
+    # processos (pid -> processo)
+    procs: Dict[int, Processo] = {}
+    for linha in l.linhas("processos", len(CAMPOS_PROCESSO)):
+        proc = Processo(*linha[:_N_INICIAIS])
+        for campo, valor in zip(CAMPOS_PROCESSO[_N_INICIAIS:], linha[_N_INICIAIS:]):
+            setattr(proc, campo, _o(valor) if campo.startswith("req_") else valor)
+        procs[proc.pid] = proc
+
+    # memoria: alocadores reconstruidos a partir dos donos
+    mm = meta["memoria"]
+    memoria = MemoryManager(mm["alocador"], mm["alocador_rt"], mm["total_blocks"], mm["rt_blocks"],
+                            mm["compactar"])
+    for pid, off, tam in l.linhas("memoria.donos", 3):
+        r = 0 if off < memoria.rt_blocks else 1
+        memoria._ocupa(r, off, tam, pid)
+        memoria.owners[pid] = (off, tam)
+        memoria.ocupacao.marca(off, tam, pid)
+    memoria.alocacoes, memoria.falhas = mm["alocacoes"], mm["falhas"]
+    memoria.liberacoes, memoria.ocupados, memoria.pico = mm["liberacoes"], mm["ocupados"], mm["pico"]
+    memoria.compactacoes, memoria.blocos_movidos = mm["compactacoes"], mm["blocos_movidos"]
+    memoria.tempo_compactacao = mm["tempo_compactacao"]
+    # a versao continua; o historico de mudancas nao e salvo
+    memoria.ocupacao.versao = mm["versao_ocupacao"]
+    memoria.ocupacao.esquece()
+
+    # recursos
+    recursos = Recursos()
+    for tipo, k, dono in meta["recursos"]["donos"]:
+        if tipo == "scanner":
+            recursos.scanner = _o(dono)
+        elif tipo == "modem":
+            recursos.modem = _o(dono)
+        elif tipo == "printer":
+            recursos.printers[k] = _o(dono)
+        else:
+            recursos.sata[k] = _o(dono)
+    recursos.em_uso = meta["recursos"]["em_uso"]
+    for d in recursos._todos():
+        recursos.espera[d] = deque(l.secao(f"recursos.espera.{d[0]}{d[1]}"))
+    for pid in l.secao("recursos.pedidos"):
+        p = procs[pid]
+        recursos.pedidos[pid] = (p, recursos._dispositivos(p.scanner_req, p.printer_id,
+                                                           p.modem_req, p.sata_id))
+
+    # metricas
+    metricas = None
+    if "metricas" in meta:
+        mt = meta["metricas"]
+        metricas = Metricas(mt["intervalo"])
+        metricas.tempo, metricas.area_filas, metricas.area_memoria = mt["tempo"], mt["area_filas"], mt["area_memoria"]
+        metricas.ocupado, metricas.bloqueado = mt["ocupado"], mt["bloqueado"]
+        metricas._proxima_amostra = mt["proxima_amostra"]
+        metricas.capacidade_memoria = tuple(mt["capacidade_memoria"])
+        metricas.prioridade = array("b", l.secao("metricas.prioridade"))
+        for nome in ("cpu", "chegada", "primeira", "conclusao"):
+            setattr(metricas, nome, array("q", l.secao(f"metricas.{nome}")))
+        metricas.serie = [tuple(linha) for linha in l.linhas("metricas.serie", 9)]
+
+    # escalonadores
+    nucleos: List[Escalonador] = []
+    for i, mn in enumerate(meta["nucleos"]):
+        nucleo = Escalonador(memoria, recursos, saida, metricas, config)
+        nucleo.tick_count, nucleo.ultima_fatia, nucleo.relogio = mn["tick_count"], mn["ultima_fatia"], mn["relogio"]
+        nucleo.fatias, nucleo.finalizado = mn["fatias"], mn["finalizado"]
+        nucleo.despachador_finalizado = mn["despachador_finalizado"]
+        for pid in l.secao(f"n{i}.recebidos"):
+            nucleo.processos.put(procs[pid])
+        for k, (fila, (espera, seq, pico)) in enumerate(zip(nucleo.niveis, mn["filas"])):
+            fila.espera, fila._seq, fila.pico = espera, seq, pico
+            for pid in l.secao(f"n{i}.f{k}.q"):
+                fila._pronto(procs[pid])
+            fila.chegando = [(chave, s, procs[pid]) for chave, s, pid in l.linhas(f"n{i}.f{k}.chegando", 3)]
+            heapq.heapify(fila.chegando)
+            for pid in l.secao(f"n{i}.f{k}.bloqueados"):
+                fila.bloqueados[pid] = procs[pid]
+            nucleo.transbordo[k].extend(procs[pid] for pid in l.secao(f"n{i}.f{k}.transbordo"))
+            nucleo.em_transbordo += len(nucleo.transbordo[k])
+        nucleo.politica.restaura(mn["politica"])
+        nucleo.transbordos, nucleo.contencoes = mn["transbordos"], mn["contencoes"]
+        nucleo._atualiza_niveis()
+        nucleos.append(nucleo)
+
+    # despachador
+    md = meta["despachador"]
+    despachador = Despachador(nucleos[0], memoria, md["process_file"], md["fileops_file"], md["janela"])
+    despachador._lidos = md["lidos"]
+    despachador.por_pid = procs
+    despachador._menor_esperando = md["menor_esperando"]
+    despachador._liberacoes_vistas = md["liberacoes_vistas"]
+    if md["lendo"]:
+        if registros is not None or md["posicao"] is None and md["lidos"]:
+            # entrada ja lida (em memoria): pula os registros consumidos
+            fonte = iter(registros) if registros is not None else ler_processos(md["process_file"])
+            despachador._registros = itertools.islice(fonte, md["lidos"], None)
+        else:
+            # continua o arquivo do byte seguinte ao ultimo registro consumido
+            despachador._registros = ler_processos(md["process_file"], md["posicao"])
+    despachador.chegadas = [(linha[0], linha[1], tuple(linha[2:]))
+                            for linha in l.linhas("despachador.chegadas", 10)]
+    heapq.heapify(despachador.chegadas)
+    despachador.esperando_memoria = [deque((linha[0], linha[1], tuple(linha[2:]))
+                                           for linha in l.linhas(f"despachador.espera{r}", 10))
+                                     for r in range(2)]
+    if "arquivos" in meta:
+        ma = meta["arquivos"]
+        despachador.ops_feitas = md["ops_feitas"]
+        despachador.arquivos_finalizados = md["arquivos_finalizados"]
+        if md["lendo_ops"]:
+            # continua as operacoes depois das ja lidas (feitas e a pendente)
+            pendente = md["op_pendente"]
+            despachador._op_pendente = tuple(pendente) if pendente is not None else None
+            lidas = md["ops_feitas"] + (pendente is not None)
+            if md["posicao_ops"] is None and lidas:
+                # operacoes ja lidas em memoria: pula as lidas
+                despachador._ops = itertools.islice(ler_operacoes(md["fileops_file"]), lidas, None)
+            else:
+                despachador._ops = ler_operacoes(md["fileops_file"], md["posicao_ops"])
+        saida.cabecalho_arquivos = md["cabecalho_arquivos"]
+        fm = FileManager(ma["total_blocks"], ma["backend"], ma["politica"], ma["compactar"])
+        fm.load_existing([(nome, offset, tamanho, -1) for nome, offset, tamanho in ma["trechos"]])
+        fm.files = ma["files"]
+        fm._cursor, fm.creates, fm.falhas_create = ma["cursor"], ma["creates"], ma["falhas_create"]
+        fm.compactacoes, fm.blocos_movidos = ma["compactacoes"], ma["blocos_movidos"]
+        fm.tempo_compactacao = ma["tempo_compactacao"]
+        fm.ocupacao.versao = ma["versao_ocupacao"]
+        fm.ocupacao.esquece()
+        despachador.file_manager = fm
+
+    # simulador
+    ms = meta["simulador"]
+    if ms["multi"]:
+        simulador = SimuladorMultinucleo(nucleos, despachador, ms["roubo"])
+        simulador.roubos, simulador._integrado = ms["roubos"], ms["integrado"]
+        estado = l.secao("multi")
+        n = len(nucleos)
+        simulador.ocupado = [bool(x) for x in estado[:n]]
+        simulador.agendada = [_o(x) for x in estado[n:]]
+    else:
+        simulador = Simulador(nucleos[0], despachador, ms["pular_ocioso"])
+    simulador.relogio, simulador._seq = ms["relogio"], ms["seq"]
+    simulador.cpu_ocupada, simulador._decisao_agendada = ms["cpu_ocupada"], ms["decisao_agendada"]
+    simulador.bloqueado, simulador.decisoes, simulador.iniciado = ms["bloqueado"], ms["decisoes"], ms["iniciado"]
+    for tempo, tipo, seq, a, b in l.linhas("eventos", 5):
+        if tipo == FIM_FATIA and ms["multi"]:
+            dados = (a, procs[b])
+        elif tipo in (FIM_FATIA, LIBERACAO):
+            dados = procs[b]
+        elif tipo == DECISAO and ms["multi"]:
+            dados = a
+        else:
+            dados = None
+        simulador.eventos.append((tempo, tipo, seq, dados))
+    heapq.heapify(simulador.eventos)
+    return simulador
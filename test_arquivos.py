@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+
+from arquivos import POLITICAS, FileManager
+
+
+def _livres(blocos):
+    """Trechos livres (offset, tamanho) do disco bloco a bloco (None = livre)."""
+    resultado = []
+    i = 0
+    while i < len(blocos):
+        if blocos[i] is not None:
+            i += 1
+            continue
+        j = i
+        while j < len(blocos) and blocos[j] is None:
+            j += 1
+        resultado.append((i, j - i))
+        i = j
+    return resultado
+
+
+def _escolha(politica: str, livres, size: int, cursor: int):
+    cabem = [(o, t) for o, t in livres if t >= size]
+    if not cabem:
+        return None
+    if politica == "first-fit":
+        return cabem[0][0]
+    if politica == "best-fit":
+        return min(cabem, key=lambda e: (e[1], e[0]))[0]
+    if politica == "worst-fit":
+        return min(cabem, key=lambda e: (-e[1], e[0]))[0]
+    depois = [o for o, _ in cabem if o >= cursor]
+    return depois[0] if depois else cabem[0][0]
+
+
+@pytest.mark.parametrize("politica", POLITICAS)
+@pytest.mark.parametrize("semente", range(8))
+def test_politica_de_colocacao(politica, semente):
+    """create escolhe o trecho da politica, igual nos dois backends."""
+    r = random.Random(semente)
+    total = r.randint(5, 200)
+    discos = [FileManager(total, backend, politica) for backend in ("lista", "bitmap")]
+    for fm in discos:
+        fm.load_existing([("X", 0, 2, 0), ("Y", 3, 1, 0)])
+    cursor = 0
+    for i in range(300):
+        vivos = sorted(discos[0].files)
+        if vivos and r.random() < 0.4:
+            nome = r.choice(vivos)
+            for fm in discos:
+                assert fm.delete(0, nome, True)
+        else:
+            nome, size = f"a{i}", r.randint(1, 15)
+            esperado = _escolha(politica, _livres(discos[0].blocks), size, cursor)
+            for fm in discos:
+                assert fm.create(1, nome, size, False) == (esperado is not None)
+                if esperado is not None:
+                    assert fm.files[nome]["offset"] == esperado
+            if esperado is not None:
+                cursor = (esperado + size) % total
+        assert discos[0].show_map() == discos[1].show_map()
+        assert list(discos[0].livres) == _livres(discos[0].blocks)
+
+
+def test_usuario_so_deleta_o_que_criou():
+    fm = FileManager(10)
+    assert fm.create(1, "A", 3, False)
+    assert not fm.delete(2, "A", False)
+    assert fm.delete(2, "A", True)  # tempo real pode
+    assert not fm.delete(1, "A", False)  # ja nao existe
+    assert fm.show_map() == "0" * 10
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+
+from buddy import BuddyAllocator
+from memoria import RT_BLOCKS, MemoryManager
+
+
+class _BuddyReferencia:
+    """Buddy por listas simples: menor ordem que cabe, menor offset dela; coalesce dentro da raiz."""
+
+    def __init__(self, tamanho: int):
+        self.livres = {}  # offset relativo -> ordem
+        self.raizes = []
+        base = 0
+        for k in range(tamanho.bit_length() - 1, -1, -1):
+            if tamanho & (1 << k):
+                self.raizes.append((base, k))
+                self.livres[base] = k
+                base += 1 << k
+        self.ordem = {}
+
+    def allocate(self, size: int):
+        k = (size - 1).bit_length()
+        cabem = [(j, rel) for rel, j in self.livres.items() if j >= k]
+        if not cabem:
+            return None
+        j, rel = min(cabem)
+        del self.livres[rel]
+        while j > k:
+            j -= 1
+            self.livres[rel + (1 << j)] = j
+        self.ordem[rel] = k
+        return rel
+
+    def free(self, rel: int):
+        k = self.ordem.pop(rel)
+        limite = next(kr for base, kr in self.raizes if rel < base + (1 << kr))
+        while k < limite and self.livres.get(rel ^ (1 << k)) == k:
+            del self.livres[rel ^ (1 << k)]
+            rel = min(rel, rel ^ (1 << k))
+            k += 1
+        self.livres[rel] = k
+
+
+@pytest.mark.parametrize("semente", range(20))
+def test_buddy_igual_a_referencia(semente):
+    r = random.Random(semente)
+    start = r.choice([0, 64])
+    tamanho = r.choice([64, 960, r.randint(1, 1000)])
+    buddy = BuddyAllocator(start, start + tamanho)
+    referencia = _BuddyReferencia(tamanho)
+    vivos = {}
+    for _ in range(600):
+        if vivos and r.random() < 0.45:
+            offset = r.choice(sorted(vivos))
+            buddy.free(offset, vivos.pop(offset))
+            referencia.free(offset - start)
+        else:
+            size = r.randint(1, max(1, tamanho // 4))
+            esperado = referencia.allocate(size)
+            offset = buddy.allocate(size)
+            assert offset == (None if esperado is None else esperado + start)
+            if offset is not None:
+                # alinhado ao proprio tamanho dentro do bloco raiz
+                rel, k = offset - start, (size - 1).bit_length()
+                base = max(b for b, _ in referencia.raizes if b <= rel)
+                assert (rel - base) % (1 << k) == 0
+                vivos[offset] = size
+        assert buddy.total_livre == sum(1 << k for k in referencia.livres.values())
+        assert buddy.largest() == max((1 << k for k in referencia.livres.values()), default=0)
+    for offset, size in list(vivos.items()):
+        buddy.free(offset, size)
+    # tudo livre de novo: os blocos raiz voltam inteiros
+    assert buddy.total_livre == tamanho
+    assert buddy.desperdicio == 0
+    assert buddy.largest() == 1 << (tamanho.bit_length() - 1)
+
+
+@pytest.mark.parametrize("semente", range(10))
+def test_buddy_reconstruido_por_occupy(semente):
+    """occupy a partir do mapa de donos (snapshot) da o mesmo alocador."""
+    r = random.Random(semente)
+    buddy = BuddyAllocator(64, 1024)
+    vivos = {}
+    for _ in range(300):
+        if vivos and r.random() < 0.4:
+            offset = r.choice(sorted(vivos))
+            buddy.free(offset, vivos.pop(offset))
+        else:
+            size = r.randint(1, 120)
+            offset = buddy.allocate(size)
+            if offset is not None:
+                vivos[offset] = size
+    copia = BuddyAllocator(64, 1024)
+    for offset, size in vivos.items():
+        copia.occupy(offset, size)
+    assert copia.total_livre == buddy.total_livre
+    for _ in range(100):
+        size = r.randint(1, 120)
+        assert copia.allocate(size) == buddy.allocate(size)
+
+
+def test_memoria_buddy_sem_sobreposicao():
+    r = random.Random(7)
+    memoria = MemoryManager("buddy")
+    vivos = []
+    for pid in range(2000):
+        if vivos and r.random() < 0.45:
+            memoria.free(vivos.pop(r.randrange(len(vivos))))
+        else:
+            prioridade = r.choice([0, 1])
+            if memoria.allocate(pid, r.randint(1, 32 if prioridade == 0 else 200), prioridade) is not None:
+                vivos.append(pid)
+        trechos = sorted(memoria.owners.values())
+        for (o1, t1), (o2, _) in zip(trechos, trechos[1:]):
+            assert o1 + t1 <= o2
+        assert all((o < RT_BLOCKS) == (o + t <= RT_BLOCKS) for o, t in trechos)
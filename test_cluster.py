@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import io
+import random
+
+import pytest
+
+import cluster
+import snapshot
+from configuracao import Configuracao
+from gerador import Carga, grava
+from metricas import Metricas
+from saida import Saida
+
+
+def _monta(tmp_path, carga, n_nos, nucleos_por_no, out=None, **kw):
+    processos, arquivos = str(tmp_path / "p.txt"), str(tmp_path / "f.txt")
+    grava(carga, processos, arquivos)
+    return cluster.monta(n_nos, nucleos_por_no, kw.pop("config", Configuracao()),
+                         Saida("texto", out if out is not None else io.StringIO()),
+                         Metricas(), processos, arquivos, **kw)
+
+
+def _confere(simulador):
+    """Cada processo vivo esta em um no so, com a memoria que pediu; os contadores batem."""
+    despachador, memoria = simulador.despachador, simulador.memoria
+    metricas = simulador.escalonador.metricas
+    vistos = set()
+    for no in simulador.nos:
+        ocupados = [0, 0]
+        for pid, (offset, tamanho) in no.memoria.owners.items():
+            assert pid not in vistos
+            vistos.add(pid)
+            proc = despachador.por_pid[pid]
+            assert memoria.no_de[pid] == no.indice
+            assert (offset, tamanho) == (proc.offset, proc.mem_blocks)
+            ocupados[0 if offset < no.memoria.rt_blocks else 1] += tamanho
+        assert no.memoria.ocupados == ocupados
+    for pid in despachador.por_pid:
+        # admitido: ainda tem memoria em algum no ou ja terminou
+        assert pid in vistos or metricas.conclusao[pid] >= 0
+    relatorio = simulador.relatorio()
+    assert sum(n["migracoes_entrada"] for n in relatorio) == simulador.migracoes
+    assert sum(n["migracoes_saida"] for n in relatorio) == simulador.migracoes
+
+
+@pytest.mark.parametrize("semente", range(8))
+def test_cluster_conserva_processos_e_blocos(tmp_path, semente):
+    r = random.Random(semente)
+    carga = Carga(n_processos=r.choice([100, 300]), semente=semente,
+                  chegada=r.choice(["rajadas", "poisson"]), horizonte=r.choice([0, 50]),
+                  p_scanner=0.6, p_modem=0.6, p_impressora=0.4, p_sata=0.4,
+                  mem_usuario=(1, r.choice([200, 900])), n_operacoes=20)
+    config = Configuracao(capacidade_fila=r.choice([3, 100]), limite_prontos=r.choice([None, 5]),
+                          politica=r.choice(["mlfq", "srt", "cfs", "stride", "loteria"]))
+    simulador = _monta(tmp_path, carga, r.choice([2, 3]), r.choice([1, 2]), config=config,
+                       compactar=r.random() < 0.3, migracao=r.random() < 0.7)
+    ate = 0
+    while not simulador.executar(ate):
+        _confere(simulador)
+        ate += r.randint(1, 40)
+    _confere(simulador)
+    resumo = simulador.escalonador.metricas.resumo(simulador.escalonador)
+    assert not simulador.bloqueado
+    assert resumo["concluidos"] == resumo["processos"] == len(simulador.despachador.por_pid)
+    assert sum(n["processos"] for n in simulador.relatorio()) == resumo["processos"]
+    for no in simulador.nos:
+        assert not no.memoria.owners and not no.recursos.pedidos and no.recursos.em_uso == 0
+
+
+def test_cluster_migra_e_e_deterministico(tmp_path):
+    """Dispositivos e memoria disputados: ha migracoes, e duas execucoes dao a mesma saida."""
+    carga = Carga(n_processos=300, semente=3, chegada="rajadas", horizonte=0,
+                  p_scanner=0.8, p_modem=0.8, p_impressora=0.8, p_sata=0.8,
+                  mem_usuario=(50, 900), pesos_prioridade=[0, 1, 1, 1, 1, 1], n_operacoes=5)
+    saidas = []
+    for _ in range(2):
+        out = io.StringIO()
+        simulador = _monta(tmp_path, carga, 3, 1, out)
+        assert simulador.executar()
+        _confere(simulador)
+        assert simulador.migracoes > 0
+        saidas.append(out.getvalue())
+    assert saidas[0] == saidas[1]
+    assert "[Cluster] processo" in saidas[0]
+
+
+def test_cluster_sem_migracao(tmp_path):
+    carga = Carga(n_processos=150, semente=5, chegada="rajadas", horizonte=0,
+                  p_scanner=0.8, p_modem=0.8, n_operacoes=0)
+    simulador = _monta(tmp_path, carga, 3, 1, migracao=False)
+    assert simulador.executar()
+    assert simulador.migracoes == 0
+    # a colocacao espalha a carga pelos nos mesmo sem migracao
+    assert all(n["processos"] > 0 for n in simulador.relatorio())
+
+
+def test_cluster_sem_snapshot(tmp_path):
+    simulador = _monta(tmp_path, Carga(n_processos=20, semente=1), 2, 1)
+    simulador.executar(5)
+    with pytest.raises(ValueError):
+        snapshot.salva(simulador, str(tmp_path / "cluster.snap"))
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+
+from arquivos import FileManager
+from compactacao import planeja
+from memoria import MemoryManager
+
+
+def _aplica(trechos, plano):
+    """Aplica o plano a {chave: (offset, tamanho)}, conferindo que cada destino esta livre."""
+    ocupado = {o + i for o, t in trechos.values() for i in range(t)}
+    for chave, antigo, novo, tam in plano:
+        assert trechos[chave] == (antigo, tam) and novo < antigo
+        ocupado -= set(range(antigo, antigo + tam))
+        assert not ocupado & set(range(novo, novo + tam))
+        ocupado |= set(range(novo, novo + tam))
+        trechos[chave] = (novo, tam)
+    return ocupado
+
+
+def _maior_livre(ocupado, fim: int) -> int:
+    maior = atual = 0
+    for b in range(fim):
+        atual = 0 if b in ocupado else atual + 1
+        maior = max(maior, atual)
+    return maior
+
+
+def _trechos(mapa):
+    """(offset, tamanho, dono) do mapa bloco a bloco, unindo vizinhos iguais."""
+    trechos = []
+    for b, dono in enumerate(mapa):
+        if trechos and trechos[-1][2] == dono:
+            o, t, _ = trechos[-1]
+            trechos[-1] = (o, t + 1, dono)
+        else:
+            trechos.append((b, 1, dono))
+    return trechos
+
+
+@pytest.mark.parametrize("semente", range(30))
+def test_planeja_abre_o_buraco(semente):
+    r = random.Random(semente)
+    fim = r.randint(10, 120)
+    trechos, pos = {}, 0
+    while pos < fim:
+        tam = r.randint(1, 8)
+        if r.random() < 0.5 and pos + tam <= fim:
+            trechos[pos] = (pos, tam)
+        pos += tam + r.randint(0, 4)
+    fixos = [trechos.pop(k) for k in list(trechos) if r.random() < 0.15]
+    size = r.randint(1, fim)
+    plano = planeja([(o, t, k) for k, (o, t) in trechos.items()], fixos, 0, fim, size)
+    ocupado = {o + i for o, t in fixos for i in range(t)}
+    if not fixos:
+        assert (plano is not None) == (fim - sum(t for _, t in trechos.values()) >= size)
+    if plano is None:
+        return
+    ocupado |= _aplica(trechos, plano)
+    assert _maior_livre(ocupado, fim) >= size
+
+
+@pytest.mark.parametrize("backend", ["lista", "bitmap"])
+@pytest.mark.parametrize("semente", range(10))
+def test_disco_compacta_sempre_que_ha_espaco(backend, semente):
+    """Com compactar, create so falha quando o total livre nao basta."""
+    r = random.Random(semente)
+    total = r.randint(20, 300)
+    fm = FileManager(total, backend, r.choice(["first-fit", "best-fit", "next-fit"]), compactar=True)
+    for i in range(400):
+        if fm.files and r.random() < 0.45:
+            assert fm.delete(0, r.choice(sorted(fm.files)), True)
+            continue
+        size = r.randint(1, total // 3)
+        livre = fm.livres.total_livre
+        assert fm.create(1, f"a{i}", size, False) == (livre >= size)
+        # arquivos inteiros e sem sobreposicao depois de mover
+        mapa = [None] * total
+        for nome, info in fm.files.items():
+            for b in range(info["offset"], info["offset"] + info["size"]):
+                assert mapa[b] is None
+                mapa[b] = nome
+        assert fm.mapa_trechos() == _trechos(mapa)
+        assert fm.livres.total_livre == mapa.count(None)
+        if backend == "lista":
+            assert fm.blocks == mapa
+
+
+@pytest.mark.parametrize("alocador", ["linear", "extents", "bitmap"])
+@pytest.mark.parametrize("semente", range(8))
+def test_memoria_compacta_sempre_que_ha_espaco(alocador, semente):
+    r = random.Random(semente)
+    memoria = MemoryManager(alocador, compactar=True)
+    offsets = {}
+    memoria.ao_mover = offsets.__setitem__
+    for pid in range(1500):
+        if offsets and r.random() < 0.45:
+            morto = r.choice(sorted(offsets))
+            memoria.free(morto)
+            del offsets[morto]
+            continue
+        prioridade = r.choice([0, 1, 1])
+        regiao = memoria.regioes[0 if prioridade == 0 else 1]
+        size = r.randint(1, 32 if prioridade == 0 else 300)
+        livre = regiao.total_livre
+        offset = memoria.allocate(pid, size, prioridade)
+        assert (offset is not None) == (livre >= size)
+        if offset is not None:
+            offsets[pid] = offset
+        # quem foi movido foi avisado (ao_mover) e nada se sobrepoe
+        assert offsets == {p: o for p, (o, _) in memoria.owners.items()}
+        trechos = sorted(memoria.owners.values())
+        for (o1, t1), (o2, _) in zip(trechos, trechos[1:]):
+            assert o1 + t1 <= o2
+        if memoria.mapa is not None:
+            assert list(memoria.mapa.dono) == [-1 if p is None else p for p in memoria.blocks]
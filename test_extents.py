@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+
+from extents import FreeExtents
+from memoria import MemoryManager
+
+
+def _extents(ocupado, start):
+    """Extents livres (offset, tamanho) de uma lista de blocos ocupados."""
+    resultado = []
+    i = 0
+    while i < len(ocupado):
+        if ocupado[i]:
+            i += 1
+            continue
+        j = i
+        while j < len(ocupado) and not ocupado[j]:
+            j += 1
+        resultado.append((i + start, j - i))
+        i = j
+    return resultado
+
+
+def _referencia(extents, politica, size, desde):
+    """Escolha da politica por varredura dos extents livres."""
+    cabem = [(o, t) for o, t in extents if t >= size]
+    if not cabem:
+        return None
+    if politica == "first_fit":
+        return cabem[0][0]
+    if politica == "best_fit":
+        return min(cabem, key=lambda e: (e[1], e[0]))[0]
+    if politica == "worst_fit":
+        return min(cabem, key=lambda e: (-e[1], e[0]))[0]
+    depois = [o for o, _ in cabem if o >= desde]
+    return depois[0] if depois else cabem[0][0]
+
+
+@pytest.mark.parametrize("semente", range(20))
+def test_free_extents_igual_a_varredura(semente):
+    r = random.Random(semente)
+    start = r.choice([0, 64])
+    n = r.randint(1, 300)
+    livres = FreeExtents(start, start + n, ordenar_por_tamanho=True)
+    ocupado = [False] * n
+    vivos = []
+    for _ in range(400):
+        if vivos and r.random() < 0.4:
+            offset, size = vivos.pop(r.randrange(len(vivos)))
+            livres.release(offset, size)
+            for j in range(offset - start, offset - start + size):
+                ocupado[j] = False
+        else:
+            politica = r.choice(["first_fit", "best_fit", "worst_fit", "next_fit"])
+            size = r.randint(1, 40)
+            desde = r.randint(start, start + n)
+            esperado = _referencia(_extents(ocupado, start), politica, size, desde)
+            args = (size, desde) if politica == "next_fit" else (size,)
+            offset = getattr(livres, politica)(*args)
+            assert offset == esperado
+            if offset is not None:
+                assert livres.take(offset, size)
+                vivos.append((offset, size))
+                for j in range(offset - start, offset - start + size):
+                    ocupado[j] = True
+        extents = _extents(ocupado, start)
+        assert list(livres) == extents
+        assert livres.total_livre == ocupado.count(False)
+        assert livres.n_extents == len(extents)
+        assert livres.largest() == max((t for _, t in extents), default=0)
+
+
+@pytest.mark.parametrize("alocador", ["extents", "bitmap"])
+@pytest.mark.parametrize("semente", range(10))
+def test_memoria_igual_ao_first_fit_linear(alocador, semente):
+    """Os alocadores first-fit indexados devolvem os offsets da busca linear original."""
+    r = random.Random(semente)
+    referencia = MemoryManager("linear")
+    memoria = MemoryManager(alocador)
+    vivos = []
+    for pid in range(1500):
+        if vivos and r.random() < 0.45:
+            morto = vivos.pop(r.randrange(len(vivos)))
+            referencia.free(morto)
+            memoria.free(morto)
+        else:
+            prioridade = r.choice([0, 1, 1, 1])
+            size = r.randint(1, 32 if prioridade == 0 else 200)
+            offset = referencia.allocate(pid, size, prioridade)
+            assert memoria.allocate(pid, size, prioridade) == offset
+            if offset is not None:
+                vivos.append(pid)
+    assert memoria.owners == referencia.owners
+    assert memoria.blocks == referencia.blocks
+    if memoria.mapa is not None:
+        assert list(memoria.mapa.dono) == [-1 if b is None else b for b in referencia.blocks]
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+
+from arquivos import FileManager
+from ocupacao import MapaOcupacao
+
+
+def _trechos(blocos):
+    """(offset, tamanho, dono) do mapa bloco a bloco, unindo vizinhos do mesmo dono."""
+    trechos = []
+    for b, dono in enumerate(blocos):
+        if trechos and trechos[-1][2] == dono:
+            o, t, _ = trechos[-1]
+            trechos[-1] = (o, t + 1, dono)
+        else:
+            trechos.append((b, 1, dono))
+    return trechos
+
+
+def _aplica(copia, trechos):
+    for offset, tamanho, dono in trechos:
+        copia[offset:offset + tamanho] = [dono] * tamanho
+
+
+@pytest.mark.parametrize("historico", [1, 4, 64])
+@pytest.mark.parametrize("semente", range(10))
+def test_mudancas_reproduzem_o_mapa(historico, semente):
+    """Quem aplica mudancas(desde) numa copia (ou rele tudo quando o historico nao cobre) fica igual."""
+    r = random.Random(semente)
+    total = r.randint(1, 200)
+    mapa = MapaOcupacao(total, historico)
+    blocos = [None] * total
+    vivos = {}
+    copia, versao_copia = [None] * total, 0
+    relidas = 0
+    for _ in range(500):
+        if vivos and r.random() < 0.45:
+            offset = r.choice(sorted(vivos))
+            tamanho = vivos.pop(offset)
+            mapa.limpa(offset, tamanho)
+            blocos[offset:offset + tamanho] = [None] * tamanho
+        else:
+            tamanho = r.randint(1, 20)
+            livres = [o for o in range(total - tamanho + 1)
+                      if all(b is None for b in blocos[o:o + tamanho])]
+            if not livres:
+                continue
+            offset, dono = r.choice(livres), r.choice("ABC")
+            mapa.marca(offset, tamanho, dono)
+            vivos[offset] = tamanho
+            blocos[offset:offset + tamanho] = [dono] * tamanho
+        assert list(mapa.trechos()) == _trechos(blocos)
+        assert list(mapa.alocacoes()) == sorted((o, t, blocos[o]) for o, t in vivos.items())
+        assert len(mapa) == len(vivos)
+        if r.random() < 0.3:
+            versao, trechos = mapa.mudancas(versao_copia)
+            if trechos is None:
+                relidas += 1
+                copia = [None] * total
+                trechos = list(mapa.trechos())
+            _aplica(copia, trechos)
+            versao_copia = versao
+            assert copia == blocos
+    versao, trechos = mapa.mudancas(mapa.versao)
+    assert versao == mapa.versao and trechos == []
+    if historico == 1:
+        assert relidas > 0
+
+
+@pytest.mark.parametrize("semente", range(10))
+def test_buraco_ao_limpar(semente):
+    r = random.Random(semente)
+    mapa = MapaOcupacao(100)
+    blocos = [None] * 100
+    pos = 0
+    while pos < 100:
+        tamanho = r.randint(1, 10)
+        if pos + tamanho <= 100 and r.random() < 0.6:
+            mapa.marca(pos, tamanho, pos)
+            blocos[pos:pos + tamanho] = [pos] * tamanho
+        pos += tamanho
+    inicio, fim = 10, 90
+    for offset, tamanho, dono in list(mapa.alocacoes()):
+        if not inicio <= offset < fim or offset + tamanho > fim:
+            continue
+        sem = blocos[:]
+        sem[offset:offset + tamanho] = [None] * tamanho
+        a, b = offset, offset + tamanho
+        while a > inicio and sem[a - 1] is None:
+            a -= 1
+        while b < fim and sem[b] is None:
+            b += 1
+        assert mapa.buraco(offset, inicio, fim) == b - a
+
+
+def test_disco_mudancas_depois_de_create_e_delete():
+    fm = FileManager(12)
+    fm.load_existing([("X", 0, 2, 0)])
+    versao, _ = fm.mudancas(0)
+    fm.create(1, "A", 3, False)
+    fm.delete(0, "X", True)
+    versao, trechos = fm.mudancas(versao)
+    assert trechos == [(0, 2, None), (2, 3, "A")]
+    assert fm.show_map() == "00AAA0000000"
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+import random
+from collections import Counter
+
+import pytest
+
+from configuracao import Configuracao
+from politicas import BILHETES, ESCALONAMENTOS, PESOS_CFS, _TempoVirtual, nova_politica
+from processo import Processo
+
+
+def _proc(pid: int, prioridade: int = 1, cpu: int = 10) -> Processo:
+    return Processo(pid, 0, prioridade, cpu, 1, 0, 0, 0, 0)
+
+
+def _politica(nome: str, **kw):
+    return nova_politica(Configuracao(politica=nome, **kw))
+
+
+def _esvazia(fila):
+    ordem = []
+    while True:
+        proc = fila.pop()
+        if proc is None:
+            return ordem
+        ordem.append(proc.pid)
+
+
+def test_mlfq_fifo_e_rebaixa():
+    politica = _politica("mlfq")
+    fila = politica.fila("p1", 10, 5)
+    for pid in range(5):
+        fila.push(_proc(pid))
+    assert _esvazia(fila) == [0, 1, 2, 3, 4]
+    proc = _proc(9, prioridade=4)
+    assert politica.fim_fatia(proc, 1) == 5
+    assert politica.fim_fatia(proc, 1) == 5  # nao passa do ultimo nivel
+
+
+def test_srt_menor_tempo_restante_primeiro():
+    fila = _politica("srt").fila("srt", 20, 5)
+    restantes = [7, 3, 9, 3, 1, 7]
+    for pid, cpu in enumerate(restantes):
+        fila.push(_proc(pid, cpu=cpu))
+    # empates na ordem de entrada
+    assert _esvazia(fila) == [4, 1, 3, 0, 5, 2]
+
+
+@pytest.mark.parametrize("nome", ["cfs", "stride"])
+def test_tempo_virtual_menor_primeiro(nome):
+    politica = _politica(nome)
+    fila = politica.fila(nome, 20, 5)
+    for pid, vtempo in enumerate([50, 10, 30, 10]):
+        proc = _proc(pid)
+        proc.vtempo = vtempo
+        fila.push(proc)
+    assert fila.peek().pid == 1
+    assert _esvazia(fila) == [1, 3, 2, 0]
+
+
+@pytest.mark.parametrize("nome", ["cfs", "stride"])
+def test_tempo_virtual_proporcional_ao_peso(nome):
+    """
+    Rodando sempre o menor tempo virtual, o cfs divide os ticks de CPU pelos
+    pesos e o stride divide as fatias pelos bilhetes.
+    """
+    politica = _politica(nome)
+    fila = politica.fila(nome, 20, 5)
+    procs = [_proc(p, prioridade=p, cpu=10 ** 9) for p in (1, 3, 5)]
+    for proc in procs:
+        politica.enfileira(proc)
+        fila.push(proc)
+    cpu = Counter()
+    for _ in range(6000):
+        proc = fila.pop()
+        ran = politica.fatia(proc)
+        cpu[proc.init_priority] += ran if nome == "cfs" else 1
+        politica.fim_fatia(proc, ran)
+        fila.push(proc)
+    pesos = PESOS_CFS if nome == "cfs" else BILHETES
+    total = sum(pesos[p] for p in (1, 3, 5))
+    for p in (1, 3, 5):
+        assert cpu[p] / sum(cpu.values()) == pytest.approx(pesos[p] / total, abs=0.02)
+
+
+def test_tempo_virtual_quem_chega_nao_fura_a_fila():
+    politica = _politica("cfs")
+    politica.vtempo_min = 500
+    proc = _proc(1)
+    politica.enfileira(proc)
+    assert proc.vtempo == 500
+
+
+def test_loteria_deterministica_e_proporcional():
+    def sorteios(semente):
+        politica = _politica("loteria", semente=semente)
+        fila = politica.fila("loteria", 20, 5)
+        ganhos = []
+        for _ in range(4000):
+            for p in range(1, 6):
+                fila.push(_proc(p, prioridade=p))
+            ganhos.append(fila.pop().init_priority)
+            _esvazia(fila)
+        return ganhos
+
+    ganhos = sorteios(3)
+    assert ganhos == sorteios(3)
+    contagem = Counter(ganhos)
+    total = sum(BILHETES.values())
+    for p in range(1, 6):
+        assert contagem[p] / len(ganhos) == pytest.approx(BILHETES[p] / total, abs=0.03)
+
+
+def test_loteria_peek_e_o_proximo_pop():
+    politica = _politica("loteria", semente=1)
+    fila = politica.fila("loteria", 50, 5)
+    for pid in range(30):
+        fila.push(_proc(pid, prioridade=1 + pid % 5))
+    while len(fila):
+        espiado = fila.peek()
+        assert fila.peek() is espiado
+        assert fila.pop() is espiado
+    assert fila.peek() is None
+
+
+def test_loteria_push_descarta_o_sorteio_guardado():
+    """Mesmo gerador: peek seguido de push sorteia de novo no pop, entre todos."""
+    politica = _politica("loteria", semente=5)
+    fila = politica.fila("loteria", 50, 5)
+    fila.push(_proc(0))
+    assert fila.peek().pid == 0
+    fila.push(_proc(1))
+    estado = politica.rng.getstate()
+    escolhido = fila.pop()
+    politica.rng.setstate(estado)
+    alvo = politica.rng.randrange(2 * BILHETES[1])
+    assert escolhido.pid == alvo // BILHETES[1]
+
+
+def test_politica_desconhecida():
+    with pytest.raises(ValueError):
+        _politica("fifo")
+    assert set(ESCALONAMENTOS) == {"mlfq", "srt", "cfs", "stride", "loteria"}
+
+
+def test_tempo_virtual_e_abstrata():
+    with pytest.raises(TypeError):
+        _TempoVirtual(Configuracao())
+
+
+@pytest.mark.parametrize("nome", sorted(ESCALONAMENTOS))
+def test_estado_restaurado(nome):
+    """estado()/restaura() (snapshot) reproduzem as proximas escolhas."""
+    r = random.Random(0)
+    politica = _politica(nome)
+    fila = politica.fila(nome, 100, 5)
+    for pid in range(40):
+        proc = _proc(pid, prioridade=r.randint(1, 5), cpu=r.randint(1, 30))
+        politica.enfileira(proc)
+        fila.push(proc)
+    for _ in range(10):
+        proc = fila.pop()
+        politica.fim_fatia(proc, politica.fatia(proc))
+    copia = _politica(nome)
+    copia.restaura(politica.estado())
+    assert copia.estado() == politica.estado()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import io
+import random
+
+import pytest
+
+import entrada
+import snapshot
+from configuracao import Configuracao
+from despachador import Despachador, ler_disco, ler_operacoes, ler_processos
+from escalonador import Escalonador
+from gerador import Carga, grava
+from memoria import ALOCADORES, MemoryManager
+from metricas import Metricas
+from recursos import Recursos
+from saida import Saida
+from simulador import Simulador, SimuladorMultinucleo
+
+
+@pytest.fixture(scope="module")
+def entradas(tmp_path_factory):
+    """Uma carga gravada nos tres formatos: formato -> (processos, arquivos)."""
+    pasta = tmp_path_factory.mktemp("carga")
+    txt = (str(pasta / "p.txt"), str(pasta / "f.txt"))
+    grava(Carga(n_processos=300, semente=4, chegada="uniforme", horizonte=200,
+                n_operacoes=60, p_scanner=0.4, p_modem=0.4), *txt)
+    registros = list(ler_processos(txt[0]))
+    disco, operacoes = ler_disco(txt[1]), list(ler_operacoes(txt[1]))
+    caminhos = {"texto": txt}
+    for formato, gp, ga in (("binario", entrada.grava_processos, entrada.grava_arquivos),
+                            ("jsonl", entrada.grava_processos_jsonl, entrada.grava_arquivos_jsonl)):
+        caminhos[formato] = (str(pasta / f"p.{formato}"), str(pasta / f"f.{formato}"))
+        gp(registros, caminhos[formato][0])
+        ga(*disco, operacoes, caminhos[formato][1])
+    return caminhos
+
+
+def _monta(arquivos, nucleos, alocador, config, compactar, janela, out):
+    memoria = MemoryManager(alocador, compactar=compactar)
+    recursos = Recursos()
+    saida = Saida("texto", out)
+    metricas = Metricas()
+    escalonadores = [Escalonador(memoria, recursos, saida, metricas, config) for _ in range(nucleos)]
+    despachador = Despachador(escalonadores[0], memoria, *arquivos, janela=janela)
+    despachador.load_processes()
+    despachador.load_filesystem()
+    if nucleos > 1:
+        return SimuladorMultinucleo(escalonadores, despachador)
+    return Simulador(escalonadores[0], despachador)
+
+
+@pytest.mark.parametrize("semente", range(12))
+def test_snapshot_continua_igual(entradas, tmp_path, semente):
+    """Pausar, salvar, carregar e continuar da a mesma saida e metricas da execucao direta."""
+    r = random.Random(semente)
+    arquivos = entradas[r.choice(sorted(entradas))]
+    nucleos, janela, alocador = r.choice([1, 1, 3]), r.choice([4, 4096]), r.choice(ALOCADORES)
+    compactar = r.random() < 0.3
+    config = Configuracao(politica=r.choice(["mlfq", "srt", "cfs", "stride", "loteria"]),
+                          limite_prontos=r.choice([None, 5]), semente=semente)
+
+    direto = io.StringIO()
+    simulador = _monta(arquivos, nucleos, alocador, config, compactar, janela, direto)
+    assert simulador.executar()
+    esperado = simulador.escalonador.metricas.resumo(simulador.escalonador)
+    pausas = sorted(r.randint(1, max(simulador.relogio, 1)) for _ in range(2))
+
+    out = io.StringIO()
+    simulador = _monta(arquivos, nucleos, alocador, config, compactar, janela, out)
+    for ate in pausas:
+        if simulador.executar(ate):
+            break
+        path = str(tmp_path / f"s{ate}.snap")
+        snapshot.salva(simulador, path)
+        simulador = snapshot.carrega(path, Saida("texto", out))
+    simulador.executar()
+    assert out.getvalue() == direto.getvalue()
+    assert simulador.escalonador.metricas.resumo(simulador.escalonador) == esperado
+
+
+@pytest.mark.parametrize("formato", ["texto", "binario", "jsonl"])
+def test_snapshot_continua_do_byte_salvo(entradas, tmp_path, formato):
+    """Com a leitura pela metade, a retomada usa a posicao salva e nao rele o comeco."""
+    arquivos = entradas[formato]
+    simulador = _monta(arquivos, 1, "extents", Configuracao(), False, 4, io.StringIO())
+    simulador.executar(20)
+    despachador = simulador.despachador
+    assert despachador._registros is not None and despachador._lidos > 0
+    posicao = despachador._registros.posicao
+    path = str(tmp_path / "meio.snap")
+    snapshot.salva(simulador, path)
+    retomado = snapshot.carrega(path, Saida("silencioso"))
+    assert retomado.despachador._registros.posicao == posicao
+    restantes = list(retomado.despachador._registros)
+    assert restantes == list(ler_processos(arquivos[0]))[despachador._lidos:]
+    # operacoes: as feitas e a pendente ja foram lidas
+    lidas = despachador.ops_feitas + (despachador._op_pendente is not None)
+    assert lidas > 0
+    assert retomado.despachador._ops.posicao == despachador._ops.posicao
+    assert list(retomado.despachador._ops) == list(ler_operacoes(arquivos[1]))[lidas:]
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import cluster
+from configuracao import (AGING_THRESHOLD_TICKS, MAX_QUEUE_SIZE, RT_BLOCKS, TOTAL_BLOCKS,
+                          USER_QUANTUM_MS, Configuracao)
+from despachador import Despachador, ler_arquivos, ler_processos
+from escalonador import Escalonador
+from memoria import MemoryManager
+from metricas import Metricas
+from politicas import ESCALONAMENTOS
+from recursos import Recursos
+from saida import Saida
+from simulador import Simulador, SimuladorMultinucleo
+
+# Carga lida uma vez no processo principal e entregue a cada worker pelo
+# initializer (uma copia por worker, nao por simulacao)
+_carga: Optional[tuple] = None
+
+
+def _inicia_worker(registros: List[tuple], arquivos: tuple):
+    global _carga
+    _carga = (registros, arquivos)
+
+
+def _achata(prefixo: str, valor, linha: Dict[str, object]):
+    if isinstance(valor, dict):
+        for k, v in valor.items():
+            _achata(f"{prefixo}.{k}" if prefixo else k, v, linha)
+    else:
+        linha[prefixo] = valor
+
+
+def simula(params: Dict[str, object]) -> Dict[str, object]:
+    """Uma simulacao por eventos, sem log, com os parametros da grade."""
+    registros, arquivos = _carga
+    config = Configuracao(quantum=dict(zip(range(1, 6), params["quantum"])),
+                          limiar_aging=params["limiar_aging"],
+                          capacidade_fila=params["capacidade_fila"],
+                          total_blocks=params["total_blocks"],
+                          rt_blocks=params["rt_blocks"],
+                          politica=params.get("politica", "mlfq"),
+                          limite_prontos=params.get("limite_prontos") or None)
+    saida = Saida("silencioso")
+    metricas = Metricas()
+    if params.get("nos", 1) > 1:
+        # cluster: 'nucleos' por no
+        simulador = cluster.monta(params["nos"], params["nucleos"], config, saida, metricas, None, None,
+                                  params["alocador"], params.get("compactar", False),
+                                  registros=registros, arquivos=arquivos)
+    else:
+        memoria = MemoryManager(params["alocador"], total_blocks=config.total_blocks,
+                                rt_blocks=config.rt_blocks, compactar=params.get("compactar", False))
+        recursos = Recursos()
+        nucleos = [Escalonador(memoria, recursos, saida, metricas, config)
+                   for _ in range(params["nucleos"])]
+        despachador = Despachador(nucleos[0], memoria, None, None)
+        despachador.load_processes(registros)
+        despachador.load_filesystem(arquivos)
+        if len(nucleos) > 1:
+            simulador = SimuladorMultinucleo(nucleos, despachador)
+        else:
+            simulador = Simulador(nucleos[0], despachador)
+    inicio = time.perf_counter()
+    simulador.executar()
+
+    linha: Dict[str, object] = dict(params)
+    linha["quantum"] = ",".join(map(str, params["quantum"]))
+    linha["segundos"] = time.perf_counter() - inicio
+    linha["relogio"] = simulador.relogio
+    linha["bloqueado"] = simulador.bloqueado
+    linha["decisoes"] = simulador.decisoes
+    if isinstance(simulador, cluster.SimuladorCluster):
+        linha["migracoes"] = simulador.migracoes
+        linha["contencoes_cluster"] = simulador.despachador.contencoes
+    _achata("", metricas.resumo(simulador.escalonador), linha)
+    return linha
+
+
+def grade(**eixos: Sequence) -> List[Dict[str, object]]:
+    """Produto cartesiano dos valores de cada parametro."""
+    nomes = list(eixos)
+    return [dict(zip(nomes, valores)) for valores in itertools.product(*eixos.values())]
+
+
+def varre(process_file: str, fileops_file: str, pontos: List[Dict[str, object]],
+          workers: Optional[int] = None) -> List[Dict[str, object]]:
+    """Roda todas as simulacoes em paralelo; devolve uma linha por ponto, na ordem da grade."""
+    registros = list(ler_processos(process_file))
+    arquivos = ler_arquivos(fileops_file)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             initializer=_inicia_worker, initargs=(registros, arquivos)) as pool:
+        return list(pool.map(simula, pontos))
+
+
+def grava_tabela(linhas: List[Dict[str, object]], path: str):
+    colunas: List[str] = []
+    for linha in linhas:
+        colunas.extend(c for c in linha if c not in colunas)
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=colunas)
+        w.writeheader()
+        w.writerows(linhas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Varredura de parametros do simulador")
+    parser.add_argument("processos")
+    parser.add_argument("arquivos")
+    parser.add_argument("--quantum", nargs="+",
+                        default=[",".join(str(USER_QUANTUM_MS[p]) for p in range(1, 6))],
+                        help="quanta das prioridades 1..5, ex.: 6,5,4,3,2")
+    parser.add_argument("--aging", nargs="+", type=int, default=[AGING_THRESHOLD_TICKS])
+    parser.add_argument("--fila", nargs="+", type=int, default=[MAX_QUEUE_SIZE])
+    parser.add_argument("--total-blocks", nargs="+", type=int, default=[TOTAL_BLOCKS])
+    parser.add_argument("--rt-blocks", nargs="+", type=int, default=[RT_BLOCKS])
+    parser.add_argument("--alocador", nargs="+", default=["extents"])
+    parser.add_argument("--nucleos", nargs="+", type=int, default=[1])
+    parser.add_argument("--nos", nargs="+", type=int, default=[1], help="nos do cluster (nucleos por no)")
+    parser.add_argument("--compactar", nargs="+", type=int, default=[0], help="0 e/ou 1")
+    parser.add_argument("--politica", nargs="+", default=["mlfq"], choices=list(ESCALONAMENTOS))
+    parser.add_argument("--limite-prontos", nargs="+", type=int, default=[0],
+                        help="controle de admissao (0 = capacidade de todos os niveis)")
+    parser.add_argument("--workers", type=int, help="processos paralelos (padrao: todos os nucleos)")
+    parser.add_argument("--saida", default="varredura.csv")
+    args = parser.parse_args()
+
+    pontos = grade(quantum=[tuple(int(q) for q in v.split(",")) for v in args.quantum],
+                   limiar_aging=args.aging, capacidade_fila=args.fila,
+                   total_blocks=args.total_blocks, rt_blocks=args.rt_blocks,
+                   alocador=args.alocador, nucleos=args.nucleos,
+                   compactar=[bool(c) for c in args.compactar], politica=args.politica,
+                   limite_prontos=args.limite_prontos, nos=args.nos)
+    inicio = time.perf_counter()
+    linhas = varre(args.processos, args.arquivos, pontos, args.workers)
+    grava_tabela(linhas, args.saida)
+    print(f"{len(linhas)} simulacoes em {time.perf_counter() - inicio:.1f}s -> {args.saida}")